@@ -0,0 +1,265 @@
+"""
+Benchmark de ponta a ponta do ciclo de análise
+Uso: python -m benchmarks.cycle_benchmark --sizes 100,1000 --output benchmarks/baselines/main.json
+"""
+
+import argparse
+import asyncio
+import inspect
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, Any, List
+
+from benchmarks.synthetic import generate_games, split_by_league
+
+# Credenciais fictícias: o ciclo completo fala apenas com o servidor local
+os.environ.setdefault('ODDS_API_KEY', 'benchmark')
+os.environ.setdefault('TELEGRAM_BOT_TOKEN', '123456:' + 'b' * 35)
+os.environ.setdefault('TELEGRAM_CHAT_ID', '1')
+
+from src.analyzer import BettingAnalyzer
+from src.database import DatabaseManager
+from src.local_api import LocalApiServer
+from src.odds_index import GameIndex
+from src.telegram_bot import TelegramNotifier
+
+STAGES = [
+    'json_decode',
+    'normalization',
+    'analyze_game',
+    'filter_opportunities',
+    'store_games_data',
+    'format_messages',
+    'full_cycle',
+]
+
+async def _measure(fn: Callable, repeat: int, setup: Callable = None) -> Dict[str, Any]:
+    """Executa `fn` `repeat` vezes e retorna mediana e mínimo (segundos)"""
+    times = []
+    for _ in range(repeat):
+        args = ()
+        if setup:
+            args = setup()
+            if inspect.isawaitable(args):
+                args = await args
+        start = time.perf_counter()
+        result = fn(*args)
+        if inspect.isawaitable(result):
+            await result
+        times.append(time.perf_counter() - start)
+
+    return {'median': statistics.median(times), 'min': min(times), 'runs': repeat}
+
+async def run_size(n_games: int, args, workdir: Path) -> Dict[str, Any]:
+    """Executa todas as etapas para um tamanho de payload"""
+    from src.config import Config
+    config = Config()
+
+    games_raw = generate_games(
+        n_games,
+        n_bookmakers=args.bookmakers,
+        markets=args.markets,
+        totals_lines=args.totals_lines,
+        spread_lines=args.spread_lines,
+        leagues=config.TARGET_LEAGUES,
+        seed=args.seed
+    )
+    by_league = split_by_league(games_raw)
+    payloads = {league: json.dumps(games).encode() for league, games in by_league.items()}
+
+    results: Dict[str, Any] = {
+        'games': n_games,
+        'payload_bytes': sum(len(p) for p in payloads.values()),
+    }
+
+    # 1. Decodificação JSON
+    decoded: Dict[str, list] = {}
+    def decode():
+        decoded.clear()
+        for league, payload in payloads.items():
+            decoded[league] = json.loads(payload)
+    results['json_decode'] = await _measure(decode, args.repeat)
+
+    games = []
+    for league, league_games in decoded.items():
+        for game in league_games:
+            game['sport'] = league
+            games.append(game)
+
+    # 2. Normalização (índice de odds)
+    indexes: List[GameIndex] = []
+    def normalize():
+        indexes[:] = [GameIndex.from_game(game) for game in games]
+    results['normalization'] = await _measure(normalize, args.repeat)
+
+    # 3. analyze_game
+    analyzer = BettingAnalyzer(config)
+    opportunities = []
+    async def analyze():
+        opportunities.clear()
+        for game, index in zip(games, indexes):
+            opportunities.extend(await analyzer.analyze_game(game, index))
+    results['analyze_game'] = await _measure(analyze, args.repeat)
+    results['opportunities'] = len(opportunities)
+
+    # 4. filter_opportunities
+    results['filter_opportunities'] = await _measure(
+        lambda: analyzer.filter_opportunities(opportunities), args.repeat
+    )
+
+    # 5. store_games_data
+    db_manager = DatabaseManager(str(workdir / f'store_{n_games}.db'))
+    await db_manager.init_database()
+    results['store_games_data'] = await _measure(lambda: db_manager.store_games_data(games), args.repeat)
+
+    # 6. Formatação de mensagens (todas as oportunidades, não só o top 5)
+    notifier = TelegramNotifier(config.TELEGRAM_BOT_TOKEN, config.TELEGRAM_CHAT_ID)
+    results['format_messages'] = await _measure(
+        lambda: [notifier.format_betting_message(opp) for opp in opportunities], args.repeat
+    )
+
+    # 7. Ciclo completo contra o servidor local (sem limites nem pausas)
+    server = LocalApiServer(
+        odds_provider=lambda sport, params: by_league.get(sport, []),
+        odds_rate=0,
+        telegram_rate=0,
+        quota=10 ** 9
+    )
+    base_url = await server.start(port=0)
+    os.environ['ODDS_API_BASE_URL'] = f'{base_url}/v4'
+    os.environ['TELEGRAM_API_BASE_URL'] = base_url
+
+    import main
+    bots = []
+    run_count = [0]
+
+    async def new_bot():
+        run_count[0] += 1
+        bot = main.FootballBettingBot()
+        bot.config.LEAGUE_REQUEST_INTERVAL = 0
+        bot.config.TELEGRAM_SEND_INTERVAL = 0
+        bot.db_manager = DatabaseManager(str(workdir / f'cycle_{n_games}_{run_count[0]}.db'))
+        await bot.db_manager.init_database()
+        bots.append(bot)
+        return (bot,)
+
+    try:
+        results['full_cycle'] = await _measure(
+            lambda bot: bot.run_analysis_cycle(), args.cycle_repeat, setup=new_bot
+        )
+    finally:
+        for bot in bots:
+            await bot.data_collector.close()
+        await server.stop()
+
+    return results
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return 'unknown'
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Compara medianas com a baseline; retorna a lista de regressões"""
+    regressions = []
+    print(f"\nComparação com {baseline.get('commit', '?')} (tolerância {tolerance:.0%})")
+
+    for size, stages in current['results'].items():
+        base_stages = baseline.get('results', {}).get(size)
+        if not base_stages:
+            continue
+        for stage in STAGES:
+            if stage not in stages or stage not in base_stages:
+                continue
+            now, before = stages[stage]['median'], base_stages[stage]['median']
+            ratio = now / before if before > 0 else 1.0
+            flag = ''
+            if ratio > 1 + tolerance:
+                flag = '  <-- REGRESSÃO'
+                regressions.append(f"{size}/{stage}: {ratio:.2f}x")
+            print(f"  {size:>6} {stage:<22} {before * 1000:10.2f}ms -> {now * 1000:10.2f}ms ({ratio:5.2f}x){flag}")
+
+    return regressions
+
+def _float_list(text: str) -> List[float]:
+    return [float(value) for value in text.split(',') if value.strip()]
+
+async def _run(args) -> Dict[str, Any]:
+    report = {
+        'commit': _git_commit(),
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'params': {
+            'bookmakers': args.bookmakers,
+            'markets': args.markets,
+            'totals_lines': args.totals_lines,
+            'spread_lines': args.spread_lines,
+            'seed': args.seed,
+            'repeat': args.repeat,
+        },
+        'results': {},
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            print(f"Executando benchmark com {size} jogos...")
+            stages = await run_size(size, args, Path(tmp))
+            report['results'][str(size)] = stages
+            for stage in STAGES:
+                print(f"  {stage:<22} {stages[stage]['median'] * 1000:10.2f}ms")
+
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark do ciclo de análise')
+    parser.add_argument('--sizes', default='100,1000,10000', help='Quantidades de jogos')
+    parser.add_argument('--bookmakers', type=int, default=10)
+    parser.add_argument('--markets', default='h2h,totals,spreads')
+    parser.add_argument('--totals-lines', type=_float_list, default=[1.5, 2.5, 3.5])
+    parser.add_argument('--spread-lines', type=_float_list, default=[-1.5, -0.5, 0.5])
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeat', type=int, default=5, help='Repetições por etapa')
+    parser.add_argument('--cycle-repeat', type=int, default=1, help='Repetições do ciclo completo')
+    parser.add_argument('--output', help='Salvar resultados (baseline) em JSON')
+    parser.add_argument('--compare', help='Baseline JSON para comparação')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Piora relativa aceita')
+    args = parser.parse_args()
+
+    args.sizes = [int(size) for size in args.sizes.split(',') if size.strip()]
+    args.markets = [market for market in args.markets.split(',') if market.strip()]
+
+    # O benchmark mede o código, não o log por jogo
+    logging.disable(logging.INFO)
+
+    report = asyncio.run(_run(args))
+
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResultados salvos em {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regressão(ões): {', '.join(regressions)}")
+            sys.exit(1)
+        print("\nSem regressões")
+
+if __name__ == '__main__':
+    main()
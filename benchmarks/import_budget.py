@@ -0,0 +1,98 @@
+"""
+Verificação do tempo de importação (cold start) do bot
+Uso: python -m benchmarks.import_budget --budget-ms 150 --runs 5
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Módulos que não podem ser carregados por `import main`
+FORBIDDEN_MODULES = (
+    'aiohttp',
+    'numpy',
+    'pandas',
+    'pyarrow',
+    'cryptography',
+    'keyring',
+    'telegram',
+    'orjson',
+)
+
+DEFAULT_BUDGET_MS = 200.0
+
+_IMPORTTIME_LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)')
+
+def _run_import(module: str) -> Tuple[Dict[str, int], List[str]]:
+    """Importa o módulo em um processo novo; retorna tempos cumulativos (us) e módulos carregados"""
+    code = f"import sys, {module}; print('\\n'.join(sorted(sys.modules)))"
+    env = dict(os.environ, PYTHONPATH=str(ROOT), PYTHONDONTWRITEBYTECODE='1')
+
+    # Diretório temporário: o import de main cria o arquivo de log no diretório atual
+    with tempfile.TemporaryDirectory() as tmp:
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', code],
+            cwd=tmp, env=env, capture_output=True, text=True, check=True
+        )
+
+    cumulative: Dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            cumulative[match.group(4)] = int(match.group(2))
+    return cumulative, result.stdout.split()
+
+def check(module: str, budget_ms: float, runs: int, top: int) -> List[str]:
+    """Executa a medição e retorna a lista de violações"""
+    totals = []
+    cumulative: Dict[str, int] = {}
+    loaded: List[str] = []
+
+    for _ in range(runs):
+        cumulative, loaded = _run_import(module)
+        totals.append(cumulative.get(module, 0) / 1000)
+
+    # Melhor execução: elimina ruído de cache de disco e da máquina
+    best = min(totals)
+    print(f"import {module}: {best:.1f}ms (melhor de {runs}; orçamento {budget_ms:.0f}ms)")
+
+    print(f"\nMaiores importações (cumulativo):")
+    for name, micros in sorted(cumulative.items(), key=lambda item: item[1], reverse=True)[:top]:
+        print(f"  {micros / 1000:8.1f}ms  {name}")
+
+    violations = []
+    if best > budget_ms:
+        violations.append(f"tempo de importação {best:.1f}ms acima do orçamento de {budget_ms:.0f}ms")
+
+    for forbidden in FORBIDDEN_MODULES:
+        if any(name == forbidden or name.startswith(forbidden + '.') for name in loaded):
+            violations.append(f"módulo pesado carregado na inicialização: {forbidden}")
+
+    return violations
+
+def main():
+    parser = argparse.ArgumentParser(description='Orçamento de tempo de importação do bot')
+    parser.add_argument('--module', default='main', help='Módulo a importar')
+    parser.add_argument('--budget-ms', type=float,
+                        default=float(os.getenv('IMPORT_BUDGET_MS', DEFAULT_BUDGET_MS)))
+    parser.add_argument('--runs', type=int, default=3, help='Execuções (vale a melhor)')
+    parser.add_argument('--top', type=int, default=10, help='Maiores importações exibidas')
+    args = parser.parse_args()
+
+    violations = check(args.module, args.budget_ms, args.runs, args.top)
+    if violations:
+        print(f"\n{len(violations)} violação(ões):")
+        for violation in violations:
+            print(f"  - {violation}")
+        sys.exit(1)
+    print("\nDentro do orçamento")
+
+if __name__ == '__main__':
+    main()
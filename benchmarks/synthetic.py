@@ -0,0 +1,97 @@
+"""
+Gerador de payloads sintéticos no formato da The Odds API
+"""
+
+import random
+from datetime import datetime, timedelta, timezone
+from typing import List, Dict, Any, Optional, Sequence
+
+DEFAULT_LEAGUES = [
+    'soccer_brazil_serie_a',
+    'soccer_england_premier_league',
+    'soccer_spain_la_liga',
+    'soccer_italy_serie_a',
+    'soccer_germany_bundesliga',
+    'soccer_france_ligue_one',
+    'soccer_uefa_champs_league',
+    'soccer_uefa_europa_league'
+]
+
+def _price(rng: random.Random, probability: float, margin: float) -> float:
+    """Odd decimal com margem da casa e ruído, arredondada como nas casas reais"""
+    noisy = probability * (1 + margin) * rng.uniform(0.95, 1.05)
+    return round(max(1.01, 1 / noisy), 2)
+
+def generate_games(n_games: int, n_bookmakers: int = 10,
+                   markets: Sequence[str] = ('h2h', 'totals', 'spreads'),
+                   totals_lines: Sequence[float] = (1.5, 2.5, 3.5),
+                   spread_lines: Sequence[float] = (-1.5, -0.5, 0.5),
+                   leagues: Sequence[str] = DEFAULT_LEAGUES,
+                   seed: int = 42, now: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    """Gera jogos determinísticos (mesma seed = mesmo payload) nas próximas 24 horas"""
+    rng = random.Random(seed)
+    now = now or datetime.now(timezone.utc)
+    games = []
+
+    for i in range(n_games):
+        home_team = f"Home FC {i}"
+        away_team = f"Away United {i}"
+        commence_time = now + timedelta(minutes=rng.randint(30, 23 * 60))
+
+        p_home = rng.uniform(0.25, 0.6)
+        p_draw = rng.uniform(0.2, 0.3)
+        p_away = max(0.05, 1 - p_home - p_draw)
+
+        bookmakers = []
+        for b in range(n_bookmakers):
+            margin = rng.uniform(0.02, 0.08)
+            book_markets = []
+
+            if 'h2h' in markets:
+                book_markets.append({'key': 'h2h', 'outcomes': [
+                    {'name': home_team, 'price': _price(rng, p_home, margin)},
+                    {'name': away_team, 'price': _price(rng, p_away, margin)},
+                    {'name': 'Draw', 'price': _price(rng, p_draw, margin)},
+                ]})
+
+            if 'totals' in markets:
+                outcomes = []
+                for point in totals_lines:
+                    p_over = min(0.95, max(0.05, 0.55 - (point - 2.5) * 0.2 + rng.uniform(-0.05, 0.05)))
+                    outcomes.append({'name': 'Over', 'price': _price(rng, p_over, margin), 'point': point})
+                    outcomes.append({'name': 'Under', 'price': _price(rng, 1 - p_over, margin), 'point': point})
+                book_markets.append({'key': 'totals', 'outcomes': outcomes})
+
+            if 'spreads' in markets:
+                outcomes = []
+                for point in spread_lines:
+                    p_cover = min(0.95, max(0.05, p_home + p_draw * (point > 0) + point * 0.1))
+                    outcomes.append({'name': home_team, 'price': _price(rng, p_cover, margin), 'point': point})
+                    outcomes.append({'name': away_team, 'price': _price(rng, 1 - p_cover, margin), 'point': -point})
+                book_markets.append({'key': 'spreads', 'outcomes': outcomes})
+
+            bookmakers.append({
+                'key': f'book{b}',
+                'title': f'Bookmaker {b}',
+                'last_update': now.isoformat().replace('+00:00', 'Z'),
+                'markets': book_markets,
+            })
+
+        games.append({
+            'id': f'{seed:x}{i:08x}',
+            'sport_key': leagues[i % len(leagues)],
+            'sport_title': leagues[i % len(leagues)],
+            'commence_time': commence_time.strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'home_team': home_team,
+            'away_team': away_team,
+            'bookmakers': bookmakers,
+        })
+
+    return games
+
+def split_by_league(games: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    """Agrupa os jogos por liga, como a API retorna por endpoint"""
+    by_league: Dict[str, List[Dict[str, Any]]] = {}
+    for game in games:
+        by_league.setdefault(game['sport_key'], []).append(game)
+    return by_league
@@ -29,6 +29,25 @@ import {
   type ActivityLog,
 } from "@/lib/database"
 
+// Bot event stream (SSE, GET /events); when unset the dashboard falls back to Supabase realtime
+const BOT_STREAM_URL = process.env.NEXT_PUBLIC_BOT_STREAM_URL
+
+interface CycleEvent {
+  state: "started" | "stage" | "stage_finished" | "finished"
+  stage?: string
+  status?: string
+  at: number
+}
+
+const mergeOpportunity = (current: Opportunity[], opportunity: Opportunity) => {
+  if (current.some((item) => item.id === opportunity.id)) {
+    return current.map((item) => (item.id === opportunity.id ? opportunity : item))
+  }
+  return [opportunity, ...current]
+    .sort((a, b) => new Date(b.created_at).getTime() - new Date(a.created_at).getTime())
+    .slice(0, 10)
+}
+
 export default function RealTimeDashboard() {
   const [botStatus, setBotStatus] = useState<BotStatus | null>(null)
   const [opportunities, setOpportunities] = useState<Opportunity[]>([])
@@ -42,6 +61,8 @@ export default function RealTimeDashboard() {
   })
   const [loading, setLoading] = useState(true)
   const [refreshing, setRefreshing] = useState(false)
+  const [streamConnected, setStreamConnected] = useState(false)
+  const [cycle, setCycle] = useState<CycleEvent | null>(null)
 
   const loadData = async () => {
     try {
@@ -126,6 +147,48 @@ export default function RealTimeDashboard() {
   useEffect(() => {
     loadData()
 
+    if (BOT_STREAM_URL) {
+      // Live events pushed by the bot; EventSource reconnects and resumes from Last-Event-ID
+      const source = new EventSource(BOT_STREAM_URL)
+      source.onopen = () => setStreamConnected(true)
+      source.onerror = () => setStreamConnected(false)
+
+      source.addEventListener("opportunity", (event) => {
+        const opportunity: Opportunity = JSON.parse((event as MessageEvent).data)
+        setOpportunities((current) => mergeOpportunity(current, opportunity))
+      })
+
+      source.addEventListener("cycle", (event) => {
+        const data: CycleEvent = JSON.parse((event as MessageEvent).data)
+        setCycle(data)
+        setBotStatus((current) =>
+          current
+            ? {
+                ...current,
+                status: data.state === "finished" ? "online" : "analyzing",
+                last_analysis:
+                  data.state === "finished" ? new Date(data.at * 1000).toISOString() : current.last_analysis,
+              }
+            : current,
+        )
+      })
+
+      source.addEventListener("metrics", (event) => {
+        const { today } = JSON.parse((event as MessageEvent).data)
+        setBotStatus((current) =>
+          current
+            ? {
+                ...current,
+                games_analyzed_today: today.games_analyzed,
+                opportunities_found_today: today.opportunities_found,
+              }
+            : current,
+        )
+      })
+
+      return () => source.close()
+    }
+
     // Set up real-time subscriptions
     const opportunitiesSubscription = DatabaseService.subscribeToOpportunities((payload) => {
       console.log("Real-time opportunity update:", payload)
@@ -137,11 +200,7 @@ export default function RealTimeDashboard() {
       loadData() // Reload data when changes occur
     })
 
-    // Auto-refresh every 30 seconds
-    const interval = setInterval(loadData, 30000)
-
     return () => {
-      clearInterval(interval)
       opportunitiesSubscription.unsubscribe()
       botStatusSubscription.unsubscribe()
     }
@@ -204,7 +263,7 @@ export default function RealTimeDashboard() {
                 <ExternalLink className="h-4 w-4 ml-2" />
               </Button>
             </Link>
-            <Button onClick={runAutomatedAnalysis} variant="outline">
+            <Button onClick={runAutomatedAnalysis} variant="outline" disabled={streamConnected}>
               <Bot className="h-4 w-4 mr-2" />
               Executar Análise
             </Button>
@@ -253,6 +312,9 @@ export default function RealTimeDashboard() {
                   {botStatus?.status || "offline"}
                 </Badge>
               </div>
+              {botStatus?.status === "analyzing" && cycle?.stage && (
+                <p className="text-xs text-muted-foreground mt-2">Etapa: {cycle.stage}</p>
+              )}
               <p className="text-xs text-muted-foreground mt-2">
                 Última análise:{" "}
                 {botStatus?.last_analysis ? new Date(botStatus.last_analysis).toLocaleString("pt-BR") : "Nunca"}
@@ -4,16 +4,33 @@ Sistema automatizado para análise de apostas esportivas
 """
 
 import asyncio
+import json
 import logging
 import os
-from datetime import datetime, timedelta
-from typing import List, Dict, Any
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import List, Dict, Any, Optional
 
-from src.data_collector import OddsDataCollector
-from src.analyzer import BettingAnalyzer
+from src.providers import build_collector
+from src.analyzer import BettingAnalyzer, BettingOpportunity
+from src.arbitrage import ArbitrageScanner, ArbitrageOpportunity
+from src.checkpoint import CycleCheckpoint, serialize, deserialize
+from src.odds_index import GameIndex
+from src.line_movement import LineMovementTracker
+from src.narrowing import RequestPlanner
+from src.registry import NameRegistry
+from src.sharding import LeaseManager, NOTIFIER, COMPACTOR, SETTLER, REPORTER, SYNCER, ARBITRAGE, outbox_rows
+from src.retention import HistoryCompactor
+from src.settlement import SettlementJob
+from src.dashboard_sync import DashboardSync, PostgrestSink
+from src.event_stream import EventStream
+from src.strategies import load_strategies, analysis_envelope, extend_targets
 from src.telegram_bot import TelegramNotifier
 from src.database import DatabaseManager
 from src.config import Config
+from src.metrics import metrics, MetricsServer
+from src.profiler import SamplingProfiler
 
 # Configuração de logging
 logging.basicConfig(
@@ -32,80 +49,545 @@ class FootballBettingBot:
     
     def __init__(self):
         self.config = Config()
-        self.data_collector = OddsDataCollector(self.config.ODDS_API_KEY)
-        self.analyzer = BettingAnalyzer()
+        # Estratégias avaliadas sobre a mesma coleta (ligas/mercados extras entram na coleta)
+        self.strategies = load_strategies(self.config)
+        extend_targets(self.config, self.strategies)
+        self.db_manager = DatabaseManager()
+        self.registry = NameRegistry()
+        self._registry_loaded = False
+        # Estreitamento das requisições à Odds API pelo histórico de melhores preços
+        self.request_planner = RequestPlanner(
+            full_sweep_hours=self.config.FULL_SWEEP_HOURS,
+            coverage=self.config.NARROW_COVERAGE,
+            min_bookmakers=self.config.NARROW_MIN_BOOKMAKERS,
+            max_bookmakers=self.config.NARROW_MAX_BOOKMAKERS
+        ) if self.config.ADAPTIVE_REQUESTS else None
+        self.data_collector = build_collector(
+            self.config, self.registry, self.request_planner,
+            # Pelo atributo: o banco pode ser trocado depois da construção (benchmarks, testes)
+            allocate=lambda names: self.db_manager.allocate_entities(names)
+        )
+        # Uma passada de análise com o envelope mais permissivo; cada estratégia filtra depois
+        self.analyzer = BettingAnalyzer(analysis_envelope(self.strategies))
+        self.arbitrage_scanner = ArbitrageScanner(
+            min_margin=self.config.MIN_ARBITRAGE_MARGIN,
+            total_stake=self.config.ARBITRAGE_TOTAL_STAKE
+        )
+        self.line_tracker = LineMovementTracker(
+            history_size=self.config.LINE_HISTORY_SIZE,
+            steam_window=self.config.STEAM_WINDOW_SECONDS,
+            steam_threshold=self.config.STEAM_THRESHOLD,
+            steam_min_bookmakers=self.config.STEAM_MIN_BOOKMAKERS,
+            # Folga para ciclos atrasados; além disso a mudança vem do histórico antigo
+            max_fetch_interval=self.config.CYCLE_INTERVAL_HOURS * 3600 * 1.5
+        )
+        self._line_history_loaded = False
         self.telegram_notifier = TelegramNotifier(
             self.config.TELEGRAM_BOT_TOKEN,
-            self.config.TELEGRAM_CHAT_ID
+            self.config.TELEGRAM_CHAT_ID,
+            api_base_url=self.config.TELEGRAM_API_BASE_URL,
+            retry_attempts=self.config.RETRY_ATTEMPTS
         )
-        self.db_manager = DatabaseManager()
+        # Em modo distribuído, ciclos e checkpoints são por worker e os envios vão para a fila
+        self.worker_id = self.config.WORKER_ID if self.config.WORKER_MODE else ''
+        # Cópia incremental para o Postgres do dashboard (apenas com Supabase configurado)
+        self.dashboard_sync = DashboardSync(
+            self.db_manager,
+            PostgrestSink(
+                f"{self.config.SUPABASE_URL.rstrip('/')}/rest/v1",
+                self.config.SUPABASE_SERVICE_KEY,
+                retry_attempts=self.config.RETRY_ATTEMPTS
+            ),
+            batch_size=self.config.DASHBOARD_SYNC_BATCH_SIZE,
+            max_batches=self.config.DASHBOARD_SYNC_MAX_BATCHES
+        ) if self.config.DASHBOARD_SYNC_ENABLED and self.config.SUPABASE_URL else None
+        # Eventos ao vivo para o dashboard (oportunidades, progresso do ciclo, métricas)
+        self.event_stream = EventStream(
+            self.db_manager,
+            poll_interval=self.config.STREAM_POLL_SECONDS,
+            metrics_interval=self.config.STREAM_METRICS_SECONDS,
+            replay_limit=self.config.STREAM_REPLAY_LIMIT,
+            allowed_origin=self.config.STREAM_ALLOWED_ORIGIN
+        ) if self.config.STREAM_ENABLED else None
+        
+    async def _load_registry(self):
+        """Carrega o registro canônico e as estatísticas de casas (uma vez) antes da coleta"""
+        if self._registry_loaded:
+            return
+        await self.db_manager.load_registry(self.registry)
+        if self.request_planner:
+            await self.db_manager.load_request_stats(self.request_planner)
+        if self.config.REGISTRY_ALIASES_FILE:
+            self.registry.load_aliases_file(self.config.REGISTRY_ALIASES_FILE)
+            # Nomes canônicos do arquivo recebem ids do banco antes de qualquer jogo
+            await self.db_manager.store_registry(self.registry)
+        self._registry_loaded = True
+    
+    async def _track_line_movement(self, indexes: List[GameIndex]):
+        """Atualiza o histórico de preços e registra steam moves"""
+        if not self._line_history_loaded:
+            since = time.time() - self.config.LINE_HISTORY_HOURS * 3600
+            self.line_tracker.load_snapshots(await self.db_manager.get_odds_snapshots(since))
+            self._line_history_loaded = True
+        
+        self.line_tracker.retain_games(index.game_id for index in indexes)
+        changed_rows, steam_events = self.line_tracker.update_from_indexes(indexes)
+        await self.db_manager.store_odds_snapshots(changed_rows)
+        
+        for event in steam_events:
+            direction = 'queda' if event.direction < 0 else 'alta'
+            logger.info(
+                f"Steam move ({direction}) em {event.game_id} {event.market} "
+                f"{event.side} {event.point if event.point is not None else ''}: "
+                f"{', '.join(event.bookmakers)} (movimento {event.movement:+.1%}, {event.velocity:+.3f}/h)"
+            )
+    
+    def _publish_cycle(self, state: str, **data):
+        """Progresso do ciclo para o stream de eventos (se habilitado)"""
+        if self.event_stream:
+            self.event_stream.publish('cycle', {'state': state, 'worker_id': self.worker_id, 'at': time.time(), **data})
+    
+    @contextmanager
+    def _stage(self, name: str):
+        """Mede a duração de uma etapa do ciclo"""
+        start = time.perf_counter()
+        self._publish_cycle('stage', stage=name)
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            self._stage_durations[name] = self._stage_durations.get(name, 0.0) + duration
+            metrics.observe('cycle_stage_seconds', duration, stage=name)
+            self._publish_cycle('stage_finished', stage=name, seconds=round(duration, 4))
+    
+    def _select(self, candidates: List[BettingOpportunity]) -> Dict[str, List[BettingOpportunity]]:
+        """Top-K de cada estratégia a partir das mesmas candidatas"""
+        selections = {}
+        for strategy in self.strategies:
+            in_scope = [opportunity for opportunity in candidates if strategy.covers(opportunity)]
+            selections[strategy.NAME] = self.analyzer.filter_opportunities(in_scope, strategy)
+            if len(self.strategies) > 1:
+                logger.info(f"Estratégia {strategy.NAME}: {len(selections[strategy.NAME])} sugestões")
+        return selections
+    
+    def _plan_deliveries(self, selections: Dict[str, List[BettingOpportunity]]) -> List[tuple]:
+        """Plano de envio (estratégia, chat_id, oportunidade, store), sem repetir a seleção no mesmo chat"""
+        deliveries = []
+        planned = set()
+        for strategy in self.strategies:
+            for opportunity in selections.get(strategy.NAME, []):
+                # Chat vazio: TELEGRAM_CHAT_ID; a oportunidade é armazenada uma vez por estratégia
+                for position, chat_id in enumerate(strategy.CHAT_IDS or ['']):
+                    if (chat_id, opportunity.dedupe_key) in planned:
+                        continue
+                    planned.add((chat_id, opportunity.dedupe_key))
+                    deliveries.append((strategy.NAME, chat_id, opportunity, position == 0))
+        return deliveries
+    
+    async def _send_planned(self, checkpoint: CycleCheckpoint, arbitrages: List[ArbitrageOpportunity],
+                            deliveries: List[tuple]) -> int:
+        """Envia surebets e sugestões ainda não enviadas neste ciclo"""
+        opportunities_sent = 0
+        
+        with self._stage('send_arbitrage'):
+            pending = [arbitrage for arbitrage in arbitrages if not checkpoint.was_sent(arbitrage)]
+            for position, arbitrage in enumerate(pending):
+                metrics.set_gauge('telegram_queue_depth', len(pending) - position)
+                if await self.telegram_notifier.send_arbitrage_alert(arbitrage):
+                    await checkpoint.record_sent(arbitrage)
+                await asyncio.sleep(self.config.TELEGRAM_SEND_INTERVAL)  # Evitar spam
+            metrics.set_gauge('telegram_queue_depth', 0)
+        
+        if deliveries:
+            pending = [
+                (strategy, chat_id, opportunity, store)
+                for strategy, chat_id, opportunity, store in deliveries
+                if not checkpoint.was_sent(opportunity, chat_id)
+            ]
+            skipped = len(deliveries) - len(pending)
+            if skipped:
+                logger.info(f"{skipped} sugestões já enviadas antes da interrupção")
+            
+            logger.info(f"Enviando {len(pending)} sugestões via Telegram...")
+            with self._stage('send'):
+                for position, (strategy, chat_id, opportunity, store) in enumerate(pending):
+                    metrics.set_gauge('telegram_queue_depth', len(pending) - position)
+                    if await self.telegram_notifier.send_betting_suggestion(opportunity, chat_id=chat_id or None):
+                        # Marca como enviada e armazena a oportunidade na mesma transação
+                        await checkpoint.record_sent(opportunity, store=store, chat_id=chat_id, strategy=strategy)
+                        opportunities_sent += 1
+                    await asyncio.sleep(self.config.TELEGRAM_SEND_INTERVAL)  # Evitar spam
+                metrics.set_gauge('telegram_queue_depth', 0)
+        
+        return opportunities_sent
+    
+    async def _deliver(self, checkpoint: CycleCheckpoint, arbitrages: List[ArbitrageOpportunity],
+                       selections: Dict[str, List[BettingOpportunity]]) -> int:
+        """Envia diretamente ou, em modo distribuído, enfileira para o worker notificador"""
+        deliveries = self._plan_deliveries(selections)
+        if not self.worker_id:
+            return await self._send_planned(checkpoint, arbitrages, deliveries)
+        
+        # Chave única por seleção e chat: ligas reanalisadas após takeover não geram mensagens repetidas
+        queued = await self.db_manager.enqueue_notifications(outbox_rows(arbitrages, deliveries))
+        logger.info(f"{queued} notificações novas na fila "
+                    f"({len(arbitrages) + len(deliveries) - queued} já enfileiradas)")
+        return 0
+    
+    async def drain_outbox(self) -> int:
+        """Envia as notificações enfileiradas pelos workers (somente o detentor do papel de notificador)"""
+        pending = await self.db_manager.get_pending_notifications(self.config.RETRY_ATTEMPTS)
+        sent = 0
+        
+        for position, (notification_id, kind, payload, chat_id, strategy, store) in enumerate(pending):
+            metrics.set_gauge('telegram_queue_depth', len(pending) - position)
+            if kind == ARBITRAGE:
+                item = deserialize(ArbitrageOpportunity, json.loads(payload))
+                delivered = await self.telegram_notifier.send_arbitrage_alert(item)
+            else:
+                item = deserialize(BettingOpportunity, json.loads(payload))
+                delivered = await self.telegram_notifier.send_betting_suggestion(item, chat_id=chat_id or None)
+            
+            if delivered:
+                # Marca como enviada e armazena a oportunidade na mesma transação
+                await self.db_manager.mark_notification_sent(
+                    notification_id, item if store else None, strategy
+                )
+                sent += 1
+            else:
+                await self.db_manager.mark_notification_failed(notification_id)
+            await asyncio.sleep(self.config.TELEGRAM_SEND_INTERVAL)  # Evitar spam
+        metrics.set_gauge('telegram_queue_depth', 0)
+        
+        if pending:
+            logger.info(f"{sent} de {len(pending)} notificações da fila enviadas")
+        return sent
+    
+    async def compact_history(self) -> Dict[str, Any]:
+        """Downsampling de snapshots, retenção de logs e arquivamento de temporadas (em executor)"""
+        compactor = HistoryCompactor(
+            self.db_manager.db_path,
+            full_resolution_hours=self.config.SNAPSHOT_FULL_RESOLUTION_HOURS,
+            bucket_seconds=self.config.SNAPSHOT_BUCKET_SECONDS,
+            # Histórico recente fica intacto para o detector de steam moves
+            min_age_hours=self.config.LINE_HISTORY_HOURS,
+            log_retention_days=self.config.LOG_RETENTION_DAYS,
+            season_start_month=self.config.SEASON_START_MONTH,
+            archive_grace_days=self.config.ARCHIVE_GRACE_DAYS,
+            archive_dir=self.config.ARCHIVE_DIR,
+            vacuum=self.config.ARCHIVE_VACUUM
+        )
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, compactor.run)
+    
+    async def settle_results(self) -> Dict[str, Any]:
+        """Placares finais das ligas pendentes e liquidação das oportunidades enviadas"""
+        await self._load_registry()
+        job = SettlementJob(self.db_manager, self.data_collector, days_from=self.config.SCORES_DAYS_FROM)
+        summary = await job.run()
+        # Nomes vistos pela primeira vez nos placares
+        await self.db_manager.store_registry(self.registry)
+        return summary
+    
+    async def send_daily_summary(self) -> bool:
+        """Envia o resumo do dia anterior (UTC) uma vez, a partir de DAILY_SUMMARY_HOUR"""
+        now = datetime.now(timezone.utc)
+        if now.hour < self.config.DAILY_SUMMARY_HOUR:
+            return False
+        
+        day = (now - timedelta(days=1)).date()
+        last_sent = await self.db_manager.get_maintenance_value('daily_summary_day')
+        if last_sent is not None and last_sent >= day.toordinal():
+            return False
+        
+        summary = await self.db_manager.get_daily_summary(day.isoformat())
+        sent = await self.telegram_notifier.send_daily_summary(
+            summary['opportunities_sent'], summary['games_analyzed'], summary=summary
+        )
+        if sent:
+            await self.db_manager.set_maintenance_value('daily_summary_day', day.toordinal())
+            logger.info(f"Resumo diário de {day.isoformat()} enviado")
+        return sent
+    
+    def maintenance_jobs(self) -> List[tuple]:
+        """Tarefas periódicas habilitadas: (papel exclusivo, intervalo em segundos, tarefa, descrição)"""
+        jobs = []
+        if self.config.COMPACTION_ENABLED:
+            jobs.append((COMPACTOR, self.config.COMPACTION_INTERVAL_HOURS * 3600,
+                         self.compact_history, 'compactação do histórico'))
+        if self.config.SETTLEMENT_ENABLED:
+            jobs.append((SETTLER, self.config.SETTLEMENT_INTERVAL_HOURS * 3600,
+                         self.settle_results, 'liquidação de resultados'))
+        if self.config.DAILY_SUMMARY_ENABLED:
+            # Verificação frequente; o envio acontece uma vez por dia
+            jobs.append((REPORTER, 900, self.send_daily_summary, 'envio do resumo diário'))
+        if self.dashboard_sync:
+            jobs.append((SYNCER, self.config.DASHBOARD_SYNC_INTERVAL_SECONDS,
+                         self.dashboard_sync.run, 'sincronização com o dashboard'))
+        return jobs
+    
+    async def seconds_until_next_cycle(self) -> float:
+        """Tempo até o próximo ciclo: zero se houver ciclo interrompido ou se o intervalo já passou"""
+        if await self.db_manager.get_open_cycle():
+            return 0.0
+        
+        last_cycle = await self.db_manager.get_last_finished_cycle()
+        if not last_cycle or last_cycle[1] is None:
+            return 0.0
+        
+        next_run = last_cycle[1] + self.config.CYCLE_INTERVAL_HOURS * 3600
+        return max(0.0, next_run - time.time())
+    
+    async def run_analysis_cycle(self, leagues: Optional[List[str]] = None):
+        """Executa um ciclo completo de análise (retomando um ciclo interrompido, se houver)
+
+        `leagues` limita a coleta às ligas do worker no modo distribuído.
+        """
+        self._stage_durations = {}
+        games_analyzed = 0
+        opportunities_found = 0
+        opportunities_sent = 0
+        status = 'SUCCESS'
+        checkpoint = None
         
-    async def run_analysis_cycle(self):
-        """Executa um ciclo completo de análise"""
         try:
             logger.info("Iniciando ciclo de análise...")
+            self._publish_cycle('started', leagues=leagues or [])
+            checkpoint = await CycleCheckpoint.open(
+                self.db_manager, self.config.CHECKPOINT_MAX_AGE_HOURS * 3600, self.worker_id
+            )
             
-            # 1. Coletar dados da API
+            # Análise concluída antes da interrupção: apenas terminar os envios
+            if checkpoint.analysis is not None:
+                analysis = checkpoint.analysis
+                games_analyzed = analysis['games_analyzed']
+                opportunities_found = analysis['opportunities_found']
+                # Ciclos gravados antes das estratégias têm apenas a lista da estratégia padrão
+                stored = analysis.get('strategies') or {self.strategies[0].NAME: analysis['opportunities']}
+                opportunities_sent = await self._deliver(
+                    checkpoint,
+                    [deserialize(ArbitrageOpportunity, item) for item in analysis['arbitrages']],
+                    {
+                        name: [deserialize(BettingOpportunity, item) for item in items]
+                        for name, items in stored.items()
+                    }
+                )
+                logger.info("Ciclo retomado concluído com sucesso")
+                return
+            
+            # 1. Coletar dados da API (ligas já coletadas vêm do checkpoint)
             logger.info("Coletando dados de jogos...")
-            games_data = await self.data_collector.fetch_upcoming_games()
+            with self._stage('collect'):
+                await self._load_registry()
+                games_data = await self.data_collector.fetch_upcoming_games(checkpoint=checkpoint, leagues=leagues)
             
             if not games_data:
                 logger.warning("Nenhum jogo encontrado para análise")
+                status = 'NO_GAMES'
                 return
             
             logger.info(f"Encontrados {len(games_data)} jogos para análise")
+            games_analyzed = len(games_data)
             
-            # 2. Armazenar dados no banco
-            await self.db_manager.store_games_data(games_data)
+            # 2. Armazenar dados no banco (com os ids do registro canônico)
+            with self._stage('store'):
+                await self.db_manager.store_registry(self.registry)
+                await self.db_manager.store_games_data(games_data)
+                if self.request_planner:
+                    await self.db_manager.store_request_stats(self.request_planner)
             
             # 3. Analisar jogos e identificar oportunidades
             logger.info("Analisando oportunidades de apostas...")
             betting_opportunities = []
             
-            for game in games_data:
-                opportunities = await self.analyzer.analyze_game(game)
-                betting_opportunities.extend(opportunities)
+            # Índice de odds construído uma vez por jogo e compartilhado
+            with self._stage('normalize'):
+                indexes = [GameIndex.from_game(game, self.registry) for game in games_data]
+            
+            # Movimento de linhas e steam moves
+            with self._stage('line_movement'):
+                await self._track_line_movement(indexes)
+            
+            with self._stage('analyze'):
+                for game, index in zip(games_data, indexes):
+                    opportunities = await self.analyzer.analyze_game(game, index)
+                    betting_opportunities.extend(opportunities)
+            opportunities_found = len(betting_opportunities)
+            
+            # 4. Procurar surebets nos melhores preços por resultado
+            arbitrages = []
+            if self.config.ENABLE_ARBITRAGE_SCAN:
+                with self._stage('arbitrage_scan'):
+                    arbitrages = self.arbitrage_scanner.scan(indexes)
             
-            # 4. Filtrar e ranquear oportunidades
-            filtered_opportunities = self.analyzer.filter_opportunities(betting_opportunities)
+            # 5. Filtrar e ranquear oportunidades por estratégia
+            with self._stage('filter'):
+                selections = self._select(betting_opportunities)
             
-            if not filtered_opportunities:
+            # Casas que geraram sugestões continuam nas requisições estreitadas
+            if self.request_planner:
+                self.request_planner.observe_opportunities(
+                    [opportunity for selected in selections.values() for opportunity in selected]
+                )
+                await self.db_manager.store_request_stats(self.request_planner)
+            
+            # Plano de envio gravado antes do primeiro envio
+            await checkpoint.record_analysis({
+                'games_analyzed': games_analyzed,
+                'opportunities_found': opportunities_found,
+                'arbitrages': [serialize(arbitrage) for arbitrage in arbitrages],
+                'strategies': {
+                    name: [serialize(opportunity) for opportunity in selected]
+                    for name, selected in selections.items()
+                },
+            })
+            
+            if not any(selections.values()):
                 logger.info("Nenhuma oportunidade de aposta identificada neste ciclo")
-                return
             
-            # 5. Enviar sugestões via Telegram
-            logger.info(f"Enviando {len(filtered_opportunities)} sugestões via Telegram...")
-            for opportunity in filtered_opportunities:
-                await self.telegram_notifier.send_betting_suggestion(opportunity)
-                await asyncio.sleep(1)  # Evitar spam
+            # 6. Enviar surebets e sugestões via Telegram
+            opportunities_sent = await self._deliver(checkpoint, arbitrages, selections)
             
             logger.info("Ciclo de análise concluído com sucesso")
             
         except Exception as e:
+            status = 'ERROR'
             logger.error(f"Erro durante ciclo de análise: {str(e)}")
             await self.telegram_notifier.send_error_notification(str(e))
+        
+        except BaseException:
+            # Interrupção (Ctrl+C, cancelamento): o checkpoint fica aberto para retomada
+            status = 'INTERRUPTED'
+            raise
+        
+        finally:
+            try:
+                if checkpoint and status != 'INTERRUPTED':
+                    await checkpoint.finish(status)
+                await self.db_manager.log_execution(
+                    games_analyzed,
+                    opportunities_found,
+                    opportunities_sent,
+                    status,
+                    stage_durations={k: round(v, 4) for k, v in self._stage_durations.items()}
+                )
+            except Exception as e:
+                logger.error(f"Erro ao registrar execução: {str(e)}")
+            self._publish_cycle(
+                'finished', status=status, games_analyzed=games_analyzed,
+                opportunities_found=opportunities_found, opportunities_sent=opportunities_sent
+            )
+
+async def run_worker(bot: FootballBettingBot):
+    """Modo distribuído: analisa as ligas com lease deste worker e, se for o notificador, envia a fila"""
+    config = bot.config
+    leases = LeaseManager(bot.db_manager, bot.worker_id, config.LEASE_SECONDS)
+    heartbeat = asyncio.create_task(leases.run_heartbeat(config.LEASE_SECONDS / 3))
+    logger.info(f"Worker {bot.worker_id} iniciado")
+    
+    try:
+        while True:
+            try:
+                await leases.acquire(config.TARGET_LEAGUES)
+                # Ligas cujo intervalo passou (a última análise pode ter sido de outro worker)
+                leagues = await leases.due(config.CYCLE_INTERVAL_HOURS * 3600)
+                if leagues:
+                    await bot.run_analysis_cycle(leagues=leagues)
+                    await leases.mark_run(leagues, time.time())
+                
+                if await leases.acquire_role(NOTIFIER):
+                    await bot.drain_outbox()
+                
+                # Manutenção (compactação, liquidação, resumo, dashboard) por um único worker, no intervalo de cada tarefa
+                for role, interval, job, _ in bot.maintenance_jobs():
+                    if await leases.acquire_role(role) and await leases.due(interval, [role]):
+                        await job()
+                        await leases.mark_run([role], time.time())
+            except Exception as e:
+                logger.error(f"Erro no worker {bot.worker_id}: {str(e)}")
+            
+            await asyncio.sleep(config.WORKER_TICK_SECONDS)
+    finally:
+        heartbeat.cancel()
+        # Encerramento limpo: outros workers assumem sem esperar o vencimento
+        await leases.release()
+
+async def run_periodic(job, interval: float, description: str):
+    """Tarefa de manutenção periódica em segundo plano (modo de processo único)"""
+    while True:
+        try:
+            await job()
+        except Exception as e:
+            logger.error(f"Erro na {description}: {str(e)}")
+        await asyncio.sleep(interval)
+
+async def run_bot(bot: FootballBettingBot):
+    """Loop do bot (modo único ou worker)"""
+    logger.info("Bot de Análise Pré-Live iniciado")
+    
+    if bot.config.WORKER_MODE:
+        try:
+            await run_worker(bot)
+        except KeyboardInterrupt:
+            logger.info("Worker interrompido pelo usuário")
+        return
+    
+    maintenance = [
+        asyncio.create_task(run_periodic(job, interval, description))
+        for _, interval, job, description in bot.maintenance_jobs()
+    ]
+    
+    # Agendar execuções a partir do último ciclo concluído: reinícios e deploys
+    # não disparam um ciclo novo (nem gastam cota) antes do intervalo
+    try:
+        while True:
+            try:
+                delay = await bot.seconds_until_next_cycle()
+                if delay > 0:
+                    logger.info(f"Próximo ciclo em {delay / 3600:.1f}h")
+                    await asyncio.sleep(delay)
+                await bot.run_analysis_cycle()
+            except KeyboardInterrupt:
+                logger.info("Bot interrompido pelo usuário")
+                break
+            except Exception as e:
+                logger.error(f"Erro no loop principal: {str(e)}")
+                await asyncio.sleep(60)  # Aguardar 1 minuto antes de tentar novamente
+    finally:
+        # Encerra as tarefas de manutenção antes de fechar o servidor de métricas e o loop
+        for task in maintenance:
+            task.cancel()
+        await asyncio.gather(*maintenance, return_exceptions=True)
 
 async def main():
     """Função principal"""
     bot = FootballBettingBot()
     
-    logger.info("Bot de Análise Pré-Live iniciado")
+    # Profiler sob demanda para investigar ciclos lentos sem reiniciar
+    profiler = None
+    metrics_server = None
+    if bot.config.PROFILER_ENABLED:
+        profiler = SamplingProfiler(output_dir=bot.config.PROFILE_OUTPUT_DIR)
+        profiler.install_signal_handler(bot.config.PROFILE_DURATION)
     
-    # Executar análise imediatamente
-    await bot.run_analysis_cycle()
+    # Métricas internas e endpoint /metrics; stream de eventos em /events (desabilitados por padrão)
+    if bot.config.METRICS_ENABLED or bot.event_stream:
+        metrics.enabled = bot.config.METRICS_ENABLED
+        metrics_server = MetricsServer()
+        if profiler:
+            profiler.add_routes(metrics_server.app, bot.config.PROFILE_DURATION)
+        if bot.event_stream:
+            bot.event_stream.add_routes(metrics_server.app)
+        await metrics_server.start(bot.config.METRICS_HOST, bot.config.METRICS_PORT)
     
-    # Agendar próximas execuções (a cada 12 horas)
-    while True:
-        try:
-            # Aguardar 12 horas
-            await asyncio.sleep(12 * 60 * 60)
-            await bot.run_analysis_cycle()
-        except KeyboardInterrupt:
-            logger.info("Bot interrompido pelo usuário")
-            break
-        except Exception as e:
-            logger.error(f"Erro no loop principal: {str(e)}")
-            await asyncio.sleep(60)  # Aguardar 1 minuto antes de tentar novamente
+    try:
+        await run_bot(bot)
+    finally:
+        # Cancela o stream de eventos e as janelas do profiler
+        if metrics_server:
+            await metrics_server.stop()
+        if profiler:
+            await profiler.close()
 
 if __name__ == "__main__":
     asyncio.run(main())
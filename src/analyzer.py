@@ -3,13 +3,39 @@ Módulo de análise de apostas
 """
 
 import logging
-import statistics
-from typing import List, Dict, Any, Optional
+import math
+from typing import List, Dict, Any, Optional, Tuple
 from dataclasses import dataclass
 from datetime import datetime
 
+from src.metrics import metrics
+from src.odds_index import GameIndex, kickoff_datetime
+
 logger = logging.getLogger(__name__)
 
+# Média de gols do modelo base (calibrada para Over 2.5 ≈ 55%)
+DEFAULT_EXPECTED_GOALS = 2.88
+# Limite superior da distribuição acumulada de gols
+MAX_GOALS = 10
+# Parcela dos gols esperados do mandante (calibrada para vitória do mandante ≈ 45%)
+HOME_GOALS_SHARE = 0.56
+
+# Probabilidades de ganhar, devolver (push) e perder uma aposta
+Outcome = Tuple[float, float, float]
+
+def poisson_pmf(expected_goals: float) -> List[float]:
+    """P(gols = k) para k = 0..MAX_GOALS"""
+    pmf = [math.exp(-expected_goals)]
+    for goals in range(1, MAX_GOALS + 1):
+        pmf.append(pmf[-1] * expected_goals / goals)
+    return pmf
+
+def split_line(point: float) -> List[float]:
+    """Linhas de cada metade do stake: x.25 / x.75 dividem entre as linhas vizinhas"""
+    if (point * 4) % 2 == 1:
+        return [point - 0.25, point + 0.25]
+    return [point]
+
 @dataclass
 class BettingOpportunity:
     """Representa uma oportunidade de aposta"""
@@ -27,13 +53,26 @@ class BettingOpportunity:
     value: float
     confidence: float
     justification: str
+    # Identificação estruturada da seleção (mercado da API, lado e linha)
+    market_key: str = ''
+    side: str = ''
+    point: Optional[float] = None
+    # Identidade canônica do evento (liga, mandante, visitante, início) pelos ids do registro
+    event_key: Tuple[int, ...] = ()
+    
+    @property
+    def dedupe_key(self) -> tuple:
+        """Chave da seleção, independente da fonte quando o jogo foi canonicalizado"""
+        return (self.event_key or self.game_id, self.market_key, self.point, self.side)
 
 class BettingAnalyzer:
     """Analisador de oportunidades de apostas"""
     
-    def __init__(self):
-        from src.config import Config
-        self.config = Config()
+    def __init__(self, config=None):
+        if config is None:
+            from src.config import Config
+            config = Config()
+        self.config = config
     
     def calculate_implied_probability(self, odds: float) -> float:
         """Calcula probabilidade implícita das odds"""
@@ -44,60 +83,40 @@ class BettingAnalyzer:
         implied_prob = self.calculate_implied_probability(odds)
         return (calculated_prob - implied_prob) / implied_prob if implied_prob > 0 else 0
     
-    def analyze_h2h_market(self, game: Dict[str, Any]) -> List[BettingOpportunity]:
+    def calculate_line_value(self, outcomes: List[Outcome], odds: float) -> float:
+        """Valor esperado por unidade com o stake dividido igualmente entre as linhas de `outcomes`"""
+        return sum(win * (odds - 1) - lose for win, _, lose in outcomes) / len(outcomes)
+    
+    def analyze_h2h_market(self, game: Dict[str, Any], index: Optional[GameIndex] = None) -> List[BettingOpportunity]:
         """Analisa mercado 1X2 (Head to Head)"""
         opportunities = []
         
+        if index is None:
+            index = GameIndex.from_game(game)
+        
         # Encontrar mercado h2h
-        h2h_market = None
-        for bookmaker in game.get('bookmakers', []):
-            for market in bookmaker.get('markets', []):
-                if market['key'] == 'h2h':
-                    h2h_market = market
-                    break
-            if h2h_market:
-                break
-        
-        if not h2h_market:
+        h2h_line = index.lines.get(('h2h', None))
+        if not h2h_line:
             return opportunities
         
-        # Coletar todas as odds para cada resultado
-        home_odds = []
-        draw_odds = []
-        away_odds = []
-        
-        for bookmaker in game.get('bookmakers', []):
-            for market in bookmaker.get('markets', []):
-                if market['key'] == 'h2h':
-                    for outcome in market['outcomes']:
-                        if outcome['name'] == game['home_team']:
-                            home_odds.append((outcome['price'], bookmaker['title']))
-                        elif outcome['name'] == game['away_team']:
-                            away_odds.append((outcome['price'], bookmaker['title']))
-                        elif outcome['name'] == 'Draw':
-                            draw_odds.append((outcome['price'], bookmaker['title']))
+        # Mesma distribuição de placares dos mercados de handicap
+        goal_difference = self.estimate_goal_difference(game)
         
         # Analisar cada resultado
-        results = [
-            ('home', home_odds, game['home_team']),
-            ('draw', draw_odds, 'Empate'),
-            ('away', away_odds, game['away_team'])
-        ]
-        
-        for result_type, odds_list, selection in results:
-            if not odds_list:
+        for side_idx, result_type in enumerate(h2h_line.sides):
+            if not h2h_line.prices[side_idx]:
                 continue
                 
-            # Encontrar melhor odd
-            best_odds, best_bookmaker = max(odds_list, key=lambda x: x[0])
+            # Melhor odd já calculada no índice
+            best_odds = h2h_line.best_prices[side_idx]
+            best_bookmaker = h2h_line.best_bookmakers[side_idx]
+            selection = h2h_line.selection_label(side_idx, game['home_team'], game['away_team'])
             
             # Calcular probabilidade baseada na média das odds
-            avg_odds = statistics.mean([odds for odds, _ in odds_list])
+            avg_odds = h2h_line.mean_price(side_idx)
             market_implied_prob = self.calculate_implied_probability(avg_odds)
             
-            # Análise simples: usar probabilidade de mercado como base
-            # Em implementação real, usar modelos mais sofisticados
-            calculated_prob = self.estimate_probability(game, result_type)
+            calculated_prob = self.estimate_probability(game, result_type, goal_difference)
             
             # Calcular valor
             value = self.calculate_value(calculated_prob, best_odds)
@@ -114,7 +133,7 @@ class BettingAnalyzer:
                         home_team=game['home_team'],
                         away_team=game['away_team'],
                         league=game.get('sport', 'Unknown'),
-                        commence_time=datetime.fromisoformat(game['commence_time'].replace('Z', '+00:00')),
+                        commence_time=kickoff_datetime(index.commence_ts),
                         market='1X2',
                         selection=selection,
                         best_odds=best_odds,
@@ -123,76 +142,219 @@ class BettingAnalyzer:
                         calculated_probability=calculated_prob,
                         value=value,
                         confidence=confidence,
-                        justification=f"Valor detectado: {value:.2%}. Probabilidade calculada ({calculated_prob:.2%}) vs implícita ({market_implied_prob:.2%})"
+                        justification=f"Valor detectado: {value:.2%}. Probabilidade calculada ({calculated_prob:.2%}) vs implícita ({market_implied_prob:.2%})",
+                        market_key='h2h',
+                        side=result_type,
+                        event_key=index.event_key
                     )
                     opportunities.append(opportunity)
         
         return opportunities
     
-    def analyze_totals_market(self, game: Dict[str, Any]) -> List[BettingOpportunity]:
-        """Analisa mercado Over/Under"""
+    def analyze_spreads_market(self, game: Dict[str, Any], index: Optional[GameIndex] = None) -> List[BettingOpportunity]:
+        """Analisa mercado de Handicap (spreads) em todas as linhas retornadas"""
+        opportunities = []
+        
+        if index is None:
+            index = GameIndex.from_game(game)
+        
+        spreads_lines = index.market_lines('spreads')
+        if not spreads_lines:
+            return opportunities
+        
+        # Uma única distribuição de saldo de gols por jogo, compartilhada entre as linhas
+        goal_difference = self.estimate_goal_difference(game)
+        
+        for line in spreads_lines:
+            for side_idx, side in enumerate(line.sides):
+                if not line.prices[side_idx]:
+                    continue
+                
+                best_odds = line.best_prices[side_idx]
+                
+                # Linha na perspectiva do lado analisado
+                point = line.point if side == 'home' else -line.point
+                outcomes = self.estimate_spreads_outcomes(game, side, point, goal_difference)
+                value = self.calculate_line_value(outcomes, best_odds)
+                # Probabilidade equivalente a uma aposta sem devolução com o mesmo valor esperado
+                calculated_prob = (1 + value) / best_odds
+                
+                if (self.config.MIN_ODDS <= best_odds <= self.config.MAX_ODDS and
+                    value >= self.config.MIN_VALUE_THRESHOLD):
+                    
+                    confidence = self.calculate_confidence(game, 'spreads', value)
+                    
+                    if confidence >= self.config.MIN_CONFIDENCE:
+                        selection = line.selection_label(side_idx, game['home_team'], game['away_team'])
+                        market_implied_prob = self.calculate_implied_probability(line.mean_price(side_idx))
+                        opportunity = BettingOpportunity(
+                            game_id=game['id'],
+                            home_team=game['home_team'],
+                            away_team=game['away_team'],
+                            league=game.get('sport', 'Unknown'),
+                            commence_time=kickoff_datetime(index.commence_ts),
+                            market='Handicap',
+                            selection=selection,
+                            best_odds=best_odds,
+                            bookmaker=line.best_bookmakers[side_idx],
+                            implied_probability=self.calculate_implied_probability(best_odds),
+                            calculated_probability=calculated_prob,
+                            value=value,
+                            confidence=confidence,
+                            justification=f"Handicap {selection}. Valor: {value:.2%}. Probabilidade calculada ({calculated_prob:.2%}) vs implícita ({market_implied_prob:.2%})",
+                            market_key='spreads',
+                            side=side,
+                            point=line.point,
+                            event_key=index.event_key
+                        )
+                        opportunities.append(opportunity)
+        
+        return opportunities
+    
+    def analyze_totals_market(self, game: Dict[str, Any], index: Optional[GameIndex] = None) -> List[BettingOpportunity]:
+        """Analisa mercado Over/Under em todas as linhas disponíveis"""
         opportunities = []
         
-        # Implementação similar ao h2h_market
-        # Foco em Over/Under 2.5 gols como exemplo
-        
-        for bookmaker in game.get('bookmakers', []):
-            for market in bookmaker.get('markets', []):
-                if market['key'] == 'totals':
-                    for outcome in market['outcomes']:
-                        if outcome.get('point') == 2.5:  # Over/Under 2.5
-                            odds = outcome['price']
-                            selection = f"{outcome['name']} {outcome['point']}"
-                            
-                            # Análise simplificada
-                            calculated_prob = self.estimate_totals_probability(game, outcome['name'], outcome['point'])
-                            value = self.calculate_value(calculated_prob, odds)
-                            
-                            if (self.config.MIN_ODDS <= odds <= self.config.MAX_ODDS and
-                                value >= self.config.MIN_VALUE_THRESHOLD):
-                                
-                                confidence = self.calculate_confidence(game, 'totals', value)
-                                
-                                if confidence >= self.config.MIN_CONFIDENCE:
-                                    opportunity = BettingOpportunity(
-                                        game_id=game['id'],
-                                        home_team=game['home_team'],
-                                        away_team=game['away_team'],
-                                        league=game.get('sport', 'Unknown'),
-                                        commence_time=datetime.fromisoformat(game['commence_time'].replace('Z', '+00:00')),
-                                        market='Over/Under',
-                                        selection=selection,
-                                        best_odds=odds,
-                                        bookmaker=bookmaker['title'],
-                                        implied_probability=self.calculate_implied_probability(odds),
-                                        calculated_probability=calculated_prob,
-                                        value=value,
-                                        confidence=confidence,
-                                        justification=f"Análise de gols: {selection}. Valor: {value:.2%}"
-                                    )
-                                    opportunities.append(opportunity)
+        if index is None:
+            index = GameIndex.from_game(game)
+        
+        totals_lines = index.market_lines('totals')
+        if not totals_lines:
+            return opportunities
+        
+        # Uma única distribuição de gols por jogo, compartilhada entre as linhas
+        goals_cdf = self.estimate_goals_cdf(game)
+        
+        for line in totals_lines:
+            for side_idx, side in enumerate(line.sides):
+                if not line.prices[side_idx]:
+                    continue
+                
+                # Melhor preço e consenso calculados uma vez por (linha, lado)
+                best_odds = line.best_prices[side_idx]
+                outcomes = self.estimate_totals_outcomes(game, side, line.point, goals_cdf)
+                value = self.calculate_line_value(outcomes, best_odds)
+                # Probabilidade equivalente a uma aposta sem devolução com o mesmo valor esperado
+                calculated_prob = (1 + value) / best_odds
+                
+                if (self.config.MIN_ODDS <= best_odds <= self.config.MAX_ODDS and
+                    value >= self.config.MIN_VALUE_THRESHOLD):
+                    
+                    confidence = self.calculate_confidence(game, 'totals', value)
+                    
+                    if confidence >= self.config.MIN_CONFIDENCE:
+                        selection = line.selection_label(side_idx, game['home_team'], game['away_team'])
+                        market_implied_prob = self.calculate_implied_probability(line.mean_price(side_idx))
+                        opportunity = BettingOpportunity(
+                            game_id=game['id'],
+                            home_team=game['home_team'],
+                            away_team=game['away_team'],
+                            league=game.get('sport', 'Unknown'),
+                            commence_time=kickoff_datetime(index.commence_ts),
+                            market='Over/Under',
+                            selection=selection,
+                            best_odds=best_odds,
+                            bookmaker=line.best_bookmakers[side_idx],
+                            implied_probability=self.calculate_implied_probability(best_odds),
+                            calculated_probability=calculated_prob,
+                            value=value,
+                            confidence=confidence,
+                            justification=f"Análise de gols: {selection}. Valor: {value:.2%}. Probabilidade calculada ({calculated_prob:.2%}) vs implícita ({market_implied_prob:.2%})",
+                            market_key='totals',
+                            side=side,
+                            point=line.point,
+                            event_key=index.event_key
+                        )
+                        opportunities.append(opportunity)
         
         return opportunities
     
-    def estimate_probability(self, game: Dict[str, Any], result_type: str) -> float:
-        """Estima probabilidade de um resultado (implementação básica)"""
-        # Implementação simplificada - em produção usar modelos mais sofisticados
+    def estimate_probability(self, game: Dict[str, Any], result_type: str,
+                             goal_difference: Optional[Dict[int, float]] = None) -> float:
+        """Estima probabilidade de um resultado 1X2 pela mesma distribuição de placares do handicap"""
+        if goal_difference is None:
+            goal_difference = self.estimate_goal_difference(game)
         
         if result_type == 'home':
-            return 0.45  # Vantagem casa
+            return sum(p for margin, p in goal_difference.items() if margin > 0)
         elif result_type == 'away':
-            return 0.35
+            return sum(p for margin, p in goal_difference.items() if margin < 0)
         else:  # draw
-            return 0.20
+            return goal_difference.get(0, 0.0)
+    
+    def estimate_goals_cdf(self, game: Dict[str, Any]) -> List[float]:
+        """Distribuição acumulada de gols do jogo (Poisson), P(gols <= k) para k = 0..MAX_GOALS"""
+        # Implementação simplificada: média de gols fixa para todos os jogos
+        expected_goals = DEFAULT_EXPECTED_GOALS
+        
+        cdf = []
+        total = 0.0
+        for probability in poisson_pmf(expected_goals):
+            total += probability
+            cdf.append(total)
+        return cdf
     
-    def estimate_totals_probability(self, game: Dict[str, Any], outcome_type: str, point: float) -> float:
-        """Estima probabilidade para Over/Under"""
-        # Implementação simplificada
-        if outcome_type == 'Over' and point == 2.5:
-            return 0.55  # Tendência para mais gols
-        elif outcome_type == 'Under' and point == 2.5:
-            return 0.45
-        return 0.5
+    def estimate_goal_difference(self, game: Dict[str, Any]) -> Dict[int, float]:
+        """Distribuição do saldo de gols (mandante - visitante)
+        
+        Gols de cada time em Poisson independentes, com a mesma média total do
+        modelo de Over/Under (a soma das duas é a distribuição de gols do jogo).
+        """
+        expected_goals = DEFAULT_EXPECTED_GOALS
+        home = poisson_pmf(expected_goals * HOME_GOALS_SHARE)
+        away = poisson_pmf(expected_goals * (1 - HOME_GOALS_SHARE))
+        
+        difference: Dict[int, float] = {}
+        for home_goals, home_probability in enumerate(home):
+            for away_goals, away_probability in enumerate(away):
+                margin = home_goals - away_goals
+                difference[margin] = difference.get(margin, 0.0) + home_probability * away_probability
+        return difference
+    
+    def estimate_totals_outcomes(self, game: Dict[str, Any], outcome_type: str, point: float,
+                                 goals_cdf: Optional[List[float]] = None) -> List[Outcome]:
+        """(ganha, devolve, perde) de cada metade do stake para Over/Under em qualquer linha"""
+        if goals_cdf is None:
+            goals_cdf = self.estimate_goals_cdf(game)
+        
+        def cdf(goals: int) -> float:
+            if goals < 0:
+                return 0.0
+            return goals_cdf[min(goals, MAX_GOALS)]
+        
+        outcomes = []
+        for half_point in split_line(point):
+            floor_point = math.floor(half_point)
+            under = cdf(floor_point)
+            push = 0.0
+            if half_point == floor_point:
+                # Linha inteira: exatamente `point` gols devolve a aposta
+                push = under - cdf(floor_point - 1)
+                under -= push
+            over = max(1 - under - push, 0.0)
+            outcomes.append((over, push, under) if outcome_type == 'Over' else (under, push, over))
+        return outcomes
+    
+    def estimate_spreads_outcomes(self, game: Dict[str, Any], side: str, point: float,
+                                  goal_difference: Optional[Dict[int, float]] = None) -> List[Outcome]:
+        """(ganha, devolve, perde) de cada metade do stake no handicap (linha na perspectiva de `side`)"""
+        if goal_difference is None:
+            goal_difference = self.estimate_goal_difference(game)
+        
+        outcomes = []
+        for half_point in split_line(point):
+            cover = push = lose = 0.0
+            for margin, probability in goal_difference.items():
+                adjusted = (margin if side == 'home' else -margin) + half_point
+                if adjusted > 0:
+                    cover += probability
+                elif adjusted == 0:
+                    # Linha inteira: saldo igual ao handicap devolve a aposta
+                    push += probability
+                else:
+                    lose += probability
+            outcomes.append((cover, push, lose))
+        return outcomes
     
     def calculate_confidence(self, game: Dict[str, Any], analysis_type: str, value: float) -> float:
         """Calcula nível de confiança da análise"""
@@ -206,14 +368,20 @@ class BettingAnalyzer:
         
         return min(base_confidence + value_bonus, 1.0)
     
-    async def analyze_game(self, game: Dict[str, Any]) -> List[BettingOpportunity]:
+    async def analyze_game(self, game: Dict[str, Any], index: Optional[GameIndex] = None) -> List[BettingOpportunity]:
         """Analisa um jogo completo"""
         opportunities = []
         
         try:
-            # Analisar diferentes mercados
-            opportunities.extend(self.analyze_h2h_market(game))
-            opportunities.extend(self.analyze_totals_market(game))
+            with metrics.timer('analysis_game_seconds'):
+                # Índice construído uma vez e compartilhado entre os mercados
+                if index is None:
+                    index = GameIndex.from_game(game)
+                
+                # Analisar diferentes mercados
+                opportunities.extend(self.analyze_h2h_market(game, index))
+                opportunities.extend(self.analyze_totals_market(game, index))
+                opportunities.extend(self.analyze_spreads_market(game, index))
             
             logger.info(f"Jogo {game['home_team']} vs {game['away_team']}: {len(opportunities)} oportunidades encontradas")
             
@@ -222,18 +390,30 @@ class BettingAnalyzer:
         
         return opportunities
     
-    def filter_opportunities(self, opportunities: List[BettingOpportunity]) -> List[BettingOpportunity]:
-        """Filtra e ranqueia oportunidades"""
+    def filter_opportunities(self, opportunities: List[BettingOpportunity],
+                             profile=None) -> List[BettingOpportunity]:
+        """Filtra e ranqueia oportunidades (pelos limiares e top-K do perfil, ou da Config)"""
+        profile = profile or self.config
+        
         # Filtrar por critérios mínimos
         filtered = [
             opp for opp in opportunities
-            if (opp.value >= self.config.MIN_VALUE_THRESHOLD and
-                opp.confidence >= self.config.MIN_CONFIDENCE and
-                self.config.MIN_ODDS <= opp.best_odds <= self.config.MAX_ODDS)
+            if (opp.value >= profile.MIN_VALUE_THRESHOLD and
+                opp.confidence >= profile.MIN_CONFIDENCE and
+                profile.MIN_ODDS <= opp.best_odds <= profile.MAX_ODDS)
         ]
         
         # Ordenar por valor * confiança (score combinado)
         filtered.sort(key=lambda x: x.value * x.confidence, reverse=True)
         
-        # Limitar a top 5 oportunidades por ciclo
-        return filtered[:5]
+        # Mesma seleção vinda de fontes diferentes: manter a de maior score
+        seen = set()
+        unique = []
+        for opp in filtered:
+            if opp.dedupe_key not in seen:
+                seen.add(opp.dedupe_key)
+                unique.append(opp)
+        filtered = unique
+        
+        # Limitar às top-K oportunidades por ciclo
+        return filtered[:profile.TOP_K]
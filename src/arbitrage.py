@@ -0,0 +1,103 @@
+"""
+Módulo de detecção de arbitragem (surebets) entre casas de apostas
+"""
+
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List, Optional, Iterable
+
+from src.odds_index import GameIndex, MarketLine, MARKET_LABELS, kickoff_datetime
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class ArbitrageOpportunity:
+    """Representa uma surebet: combinação dos melhores preços com soma inversa < 1"""
+    game_id: str
+    home_team: str
+    away_team: str
+    league: str
+    commence_time: datetime
+    market: str
+    point: Optional[float]
+    selections: List[str]
+    odds: List[float]
+    bookmakers: List[str]
+    stakes: List[float]
+    margin: float
+
+class ArbitrageScanner:
+    """Varre os melhores preços por resultado em busca de surebets"""
+
+    def __init__(self, min_margin: float = 0.0, total_stake: float = 100.0):
+        self.min_margin = min_margin
+        self.total_stake = total_stake
+        # Soma inversa máxima aceita, calculada uma vez
+        self._max_inverse_sum = 1.0 - min_margin
+
+    def check_line(self, line: MarketLine) -> Optional[float]:
+        """Retorna a soma inversa dos melhores preços se a linha for uma surebet"""
+        inverse_sum = 0.0
+        for price in line.best_prices:
+            if price <= 1.0:
+                return None
+            inverse_sum += 1.0 / price
+            if inverse_sum >= self._max_inverse_sum:
+                return None
+        return inverse_sum
+
+    def calculate_stakes(self, odds: List[float], inverse_sum: float) -> List[float]:
+        """Divide o stake total para que o retorno seja igual em qualquer resultado"""
+        return [round(self.total_stake / (price * inverse_sum), 2) for price in odds]
+
+    def scan_game(self, index: GameIndex) -> List[ArbitrageOpportunity]:
+        """Procura surebets em todas as linhas de um jogo"""
+        opportunities = []
+        commence_time = None
+
+        for line in index.lines.values():
+            if not line.is_complete:
+                continue
+
+            inverse_sum = self.check_line(line)
+            if inverse_sum is None:
+                continue
+
+            # Conversão de horário só quando há surebet (caso raro)
+            if commence_time is None:
+                commence_time = kickoff_datetime(index.commence_ts)
+
+            odds = list(line.best_prices)
+            opportunities.append(ArbitrageOpportunity(
+                game_id=index.game_id,
+                home_team=index.home_team,
+                away_team=index.away_team,
+                league=index.league,
+                commence_time=commence_time,
+                market=MARKET_LABELS[line.market],
+                point=line.point,
+                selections=[
+                    line.selection_label(i, index.home_team, index.away_team)
+                    for i in range(len(line.sides))
+                ],
+                odds=odds,
+                bookmakers=list(line.best_bookmakers),
+                stakes=self.calculate_stakes(odds, inverse_sum),
+                margin=1.0 - inverse_sum
+            ))
+
+        return opportunities
+
+    def scan(self, indexes: Iterable[GameIndex]) -> List[ArbitrageOpportunity]:
+        """Varre todos os jogos e ordena as surebets pela margem"""
+        opportunities = []
+        for index in indexes:
+            opportunities.extend(self.scan_game(index))
+
+        opportunities.sort(key=lambda x: x.margin, reverse=True)
+
+        if opportunities:
+            logger.info(f"Surebets encontradas: {len(opportunities)}")
+
+        return opportunities
@@ -0,0 +1,322 @@
+"""
+Motor de backtest e avaliação de CLV (closing line value)
+Uso: python -m src.backtest --min-value 0.02,0.05,0.1 --min-confidence 0.6,0.7,0.8
+"""
+
+import argparse
+import itertools
+import json
+import logging
+import os
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, asdict
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+from src.analyzer import BettingAnalyzer
+from src.config import Config
+from src.odds_index import GameIndex, MARKET_LABELS, parse_kickoff, settle_selection
+from src.retention import history_batches
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class ThresholdSet:
+    """Limiares avaliados no backtest (mesmos nomes e padrões da Config)"""
+    MIN_ODDS: float = Config.MIN_ODDS
+    MAX_ODDS: float = Config.MAX_ODDS
+    MIN_VALUE_THRESHOLD: float = Config.MIN_VALUE_THRESHOLD
+    MIN_CONFIDENCE: float = Config.MIN_CONFIDENCE
+
+# Limiares permissivos: as candidatas são geradas uma única vez e filtradas depois
+PERMISSIVE_THRESHOLDS = ThresholdSet(
+    MIN_ODDS=1.0,
+    MAX_ODDS=float('inf'),
+    MIN_VALUE_THRESHOLD=float('-inf'),
+    MIN_CONFIDENCE=float('-inf')
+)
+
+MARKET_KEYS = list(MARKET_LABELS)
+
+@dataclass
+class CandidateSet:
+    """Candidatas do replay em formato colunar, ordenadas por (seleção, horário)"""
+    selection: np.ndarray  # id da seleção (jogo, mercado, linha, lado)
+    decided_at: np.ndarray
+    league: np.ndarray  # índice em `leagues`
+    market: np.ndarray  # índice em MARKET_KEYS
+    odds: np.ndarray
+    value: np.ndarray
+    confidence: np.ndarray
+    clv: np.ndarray  # NaN quando não há preço de fechamento
+    profit: np.ndarray  # lucro por unidade; NaN quando o jogo não tem resultado
+    leagues: List[str]
+
+    def __len__(self) -> int:
+        return len(self.odds)
+
+class BacktestEngine:
+    """Reproduz snapshots pelo BettingAnalyzer e avalia grades de limiares"""
+
+    def __init__(self, db_path: str = 'football_bot.db', archive_dir: str = '', parquet_dir: str = ''):
+        self.db_path = db_path
+        # Temporadas arquivadas pela compactação entram no histórico
+        self.archive_dir = archive_dir
+        # Exportação Parquet (src.columnar) no lugar do SQLite, quando informada
+        self.parquet_dir = parquet_dir
+        self.analyzer = BettingAnalyzer(config=PERMISSIVE_THRESHOLDS)
+
+    def _analyze(self, game: Dict[str, Any], index: GameIndex):
+        """Executa os analisadores de mercado sobre um estado reconstruído"""
+        yield from self.analyzer.analyze_h2h_market(game, index)
+        yield from self.analyzer.analyze_totals_market(game, index)
+        yield from self.analyzer.analyze_spreads_market(game, index)
+
+    def load_candidates(self, since: Optional[float] = None) -> CandidateSet:
+        """Reproduz todos os snapshots e gera as candidatas em formato colunar"""
+        if self.parquet_dir:
+            from src.columnar import backtest_inputs
+            return self._replay(*backtest_inputs(self.parquet_dir, since))
+
+        conn = sqlite3.connect(self.db_path)
+        try:
+            games: Dict[str, tuple] = {}
+            results: Dict[str, tuple] = {}
+            for _ in history_batches(conn, self.db_path, self.archive_dir):
+                games.update(
+                    (row[0], row[1:])
+                    for row in conn.execute(
+                        'SELECT id, home_team, away_team, league, commence_time FROM history_games'
+                    )
+                )
+                results.update(
+                    (row[0], row[1:])
+                    for row in conn.execute('SELECT game_id, home_score, away_score FROM history_game_results')
+                )
+
+            def snapshots():
+                # Cada jogo fica em um único banco: a ordem por jogo se mantém entre os lotes
+                for _ in history_batches(conn, self.db_path, self.archive_dir):
+                    yield from conn.execute('''
+                        SELECT game_id, market, point, side, bookmaker, price, captured_at
+                        FROM history_odds_snapshots
+                        WHERE captured_at >= ?
+                        ORDER BY game_id, captured_at
+                    ''', (since or 0,))
+
+            return self._replay(games, results, snapshots())
+        finally:
+            conn.close()
+
+    def _replay(self, games: Dict[str, tuple], results: Dict[str, tuple], snapshots) -> CandidateSet:
+        """Gera as candidatas a partir de snapshots ordenados por (jogo, horário)"""
+        columns = {name: [] for name in (
+            'selection', 'decided_at', 'league', 'market',
+            'odds', 'value', 'confidence', 'clv', 'profit'
+        )}
+        leagues: Dict[str, int] = {}
+        selection_ids: Dict[tuple, int] = {}
+
+        for game_id, rows in itertools.groupby(snapshots, key=lambda row: row[0]):
+            if game_id not in games:
+                continue
+            home_team, away_team, league, commence_time = games[game_id]
+            kickoff = parse_kickoff(commence_time)
+            game = {
+                'id': game_id,
+                'home_team': home_team,
+                'away_team': away_team,
+                'sport': league,
+                'commence_time': commence_time,
+                'commence_ts': kickoff,
+            }
+            league_idx = leagues.setdefault(league, len(leagues))
+
+            # Estado atual dos preços: (market, point, side, bookmaker) -> price
+            state: Dict[tuple, float] = {}
+            game_candidates = []
+
+            for captured_at, batch in itertools.groupby(rows, key=lambda row: row[6]):
+                if captured_at >= kickoff:
+                    break
+                for _, market, point, side, bookmaker, price, _ in batch:
+                    state[(market, point, side, bookmaker)] = price
+
+                index = GameIndex.from_prices(
+                    game_id, home_team, away_team, league, commence_time,
+                    ((*key, price) for key, price in state.items()),
+                    commence_ts=kickoff
+                )
+                for opp in self._analyze(game, index):
+                    game_candidates.append((captured_at, opp))
+
+            if not game_candidates:
+                continue
+
+            # Fechamento: melhor preço por (mercado, linha, lado) no último estado pré-jogo
+            closing: Dict[tuple, float] = {}
+            for (market, point, side, _), price in state.items():
+                key = (market, point, side)
+                if price > closing.get(key, 0.0):
+                    closing[key] = price
+
+            result = results.get(game_id)
+
+            for captured_at, opp in game_candidates:
+                key = (opp.market_key, opp.point, opp.side)
+                closing_odds = closing.get(key)
+                columns['selection'].append(selection_ids.setdefault((game_id, *key), len(selection_ids)))
+                columns['decided_at'].append(captured_at)
+                columns['league'].append(league_idx)
+                columns['market'].append(MARKET_KEYS.index(opp.market_key))
+                columns['odds'].append(opp.best_odds)
+                columns['value'].append(opp.value)
+                columns['confidence'].append(opp.confidence)
+                columns['clv'].append(opp.best_odds / closing_odds - 1 if closing_odds else np.nan)
+                columns['profit'].append(
+                    settle_selection(opp.market_key, opp.side, opp.point, result[0], result[1], opp.best_odds)
+                    if result else np.nan
+                )
+
+        arrays = {
+            name: np.asarray(values, dtype=np.int64 if name in ('selection', 'league', 'market') else np.float64)
+            for name, values in columns.items()
+        }
+        order = np.lexsort((arrays['decided_at'], arrays['selection']))
+        arrays = {name: values[order] for name, values in arrays.items()}
+
+        logger.info(f"Backtest: {len(order)} candidatas em {len(selection_ids)} seleções")
+        return CandidateSet(leagues=list(leagues), **arrays)
+
+    def sweep(self, candidates: CandidateSet, grid: List[ThresholdSet],
+              workers: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Avalia uma grade de limiares, em paralelo quando a grade é grande"""
+        workers = workers or os.cpu_count() or 1
+        if workers <= 1 or len(grid) < workers * 4:
+            return [row for thresholds in grid for row in evaluate_thresholds(candidates, thresholds)]
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(candidates,)) as executor:
+            chunksize = max(1, len(grid) // (workers * 4))
+            reports = executor.map(_evaluate_in_worker, grid, chunksize=chunksize)
+            return [row for report in reports for row in report]
+
+def evaluate_thresholds(candidates: CandidateSet, thresholds: ThresholdSet) -> List[Dict[str, Any]]:
+    """Aplica um conjunto de limiares de forma vetorizada e agrega por liga e mercado"""
+    mask = (
+        (candidates.odds >= thresholds.MIN_ODDS) &
+        (candidates.odds <= thresholds.MAX_ODDS) &
+        (candidates.value >= thresholds.MIN_VALUE_THRESHOLD) &
+        (candidates.confidence >= thresholds.MIN_CONFIDENCE)
+    )
+    selected = np.flatnonzero(mask)
+    if selected.size == 0:
+        return []
+
+    # Como o bot, cada seleção é sugerida apenas na primeira vez que passa nos filtros
+    keys = candidates.selection[selected]
+    first = selected[np.r_[True, keys[1:] != keys[:-1]]]
+
+    n_markets = len(MARKET_KEYS)
+    n_groups = len(candidates.leagues) * n_markets
+    group = candidates.league[first] * n_markets + candidates.market[first]
+
+    profit = candidates.profit[first]
+    clv = candidates.clv[first]
+    settled = ~np.isnan(profit)
+    has_clv = ~np.isnan(clv)
+
+    bets = np.bincount(group, minlength=n_groups)
+    settled_bets = np.bincount(group, weights=settled, minlength=n_groups)
+    # Mesma regra de get_daily_analytics: meia vitória vale 0.5 e devoluções saem do denominador
+    odds = candidates.odds[first]
+    win_weight = np.where(profit >= odds - 1 - 1e-9, 1.0, np.where(profit > 0, 0.5, 0.0))
+    wins = np.bincount(group, weights=np.where(settled, win_weight, 0.0), minlength=n_groups)
+    pushes = np.bincount(group, weights=settled & (profit == 0), minlength=n_groups)
+    total_profit = np.bincount(group, weights=np.where(settled, profit, 0.0), minlength=n_groups)
+    clv_count = np.bincount(group, weights=has_clv, minlength=n_groups)
+    clv_sum = np.bincount(group, weights=np.where(has_clv, clv, 0.0), minlength=n_groups)
+
+    def row(league: str, market: str, n, n_settled, n_wins, n_pushes, p, n_clv, s_clv) -> Dict[str, Any]:
+        decided = n_settled - n_pushes
+        return {
+            **asdict(thresholds),
+            'league': league,
+            'market': market,
+            'bets': int(n),
+            'settled': int(n_settled),
+            'hit_rate': float(n_wins / decided) if decided else None,
+            'roi': float(p / n_settled) if n_settled else None,
+            'clv': float(s_clv / n_clv) if n_clv else None,
+        }
+
+    report = [
+        row(candidates.leagues[g // n_markets], MARKET_LABELS[MARKET_KEYS[g % n_markets]],
+            bets[g], settled_bets[g], wins[g], pushes[g], total_profit[g], clv_count[g], clv_sum[g])
+        for g in np.flatnonzero(bets)
+    ]
+    report.append(row('ALL', 'ALL', bets.sum(), settled_bets.sum(), wins.sum(), pushes.sum(),
+                      total_profit.sum(), clv_count.sum(), clv_sum.sum()))
+    return report
+
+_worker_candidates: Optional[CandidateSet] = None
+
+def _init_worker(candidates: CandidateSet):
+    global _worker_candidates
+    _worker_candidates = candidates
+
+def _evaluate_in_worker(thresholds: ThresholdSet) -> List[Dict[str, Any]]:
+    return evaluate_thresholds(_worker_candidates, thresholds)
+
+def build_grid(min_odds: List[float], max_odds: List[float],
+               min_values: List[float], min_confidences: List[float]) -> List[ThresholdSet]:
+    """Produto cartesiano dos valores de cada limiar"""
+    return [
+        ThresholdSet(MIN_ODDS=a, MAX_ODDS=b, MIN_VALUE_THRESHOLD=c, MIN_CONFIDENCE=d)
+        for a, b, c, d in itertools.product(min_odds, max_odds, min_values, min_confidences)
+    ]
+
+def _float_list(text: str) -> List[float]:
+    return [float(value) for value in text.split(',') if value.strip()]
+
+def main():
+    parser = argparse.ArgumentParser(description='Backtest de CLV/ROI sobre os snapshots armazenados')
+    parser.add_argument('--db', default='football_bot.db', help='Banco SQLite do bot')
+    parser.add_argument('--archive-dir', default='', help='Arquivos de temporada (padrão: <dir do banco>/archive)')
+    parser.add_argument('--parquet', default='', help='Histórico exportado por src.columnar (no lugar do banco)')
+    parser.add_argument('--min-odds', type=_float_list, default=[ThresholdSet.MIN_ODDS])
+    parser.add_argument('--max-odds', type=_float_list, default=[ThresholdSet.MAX_ODDS])
+    parser.add_argument('--min-value', type=_float_list, default=[ThresholdSet.MIN_VALUE_THRESHOLD])
+    parser.add_argument('--min-confidence', type=_float_list, default=[ThresholdSet.MIN_CONFIDENCE])
+    parser.add_argument('--workers', type=int, default=None, help='Processos para a varredura')
+    parser.add_argument('--output', help='Arquivo JSON para salvar o relatório')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    engine = BacktestEngine(args.db, archive_dir=args.archive_dir, parquet_dir=args.parquet)
+    candidates = engine.load_candidates()
+    grid = build_grid(args.min_odds, args.max_odds, args.min_value, args.min_confidence)
+    report = engine.sweep(candidates, grid, workers=args.workers)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Relatório salvo em {args.output}")
+        return
+
+    def fmt(value):
+        return f"{value:8.2%}" if value is not None else f"{'-':>8}"
+
+    for row in report:
+        print(
+            f"odds {row['MIN_ODDS']:.2f}-{row['MAX_ODDS']:.2f} "
+            f"valor>={row['MIN_VALUE_THRESHOLD']:.2f} conf>={row['MIN_CONFIDENCE']:.2f} | "
+            f"{row['league']:<35} {row['market']:<10} apostas={row['bets']:<5} "
+            f"acerto={fmt(row['hit_rate'])} roi={fmt(row['roi'])} clv={fmt(row['clv'])}"
+        )
+
+if __name__ == '__main__':
+    main()
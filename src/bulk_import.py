@@ -0,0 +1,384 @@
+"""
+Importação em lote de resultados e odds históricas (CSV do football-data.co.uk)
+Uso: python -m src.bulk_import data/E0_*.csv
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import logging
+import sqlite3
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Dict, Optional, Set, Tuple
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+
+from src.database import DatabaseManager
+from src.registry import NameRegistry, TEAM, LEAGUE, BOOKMAKER
+
+logger = logging.getLogger(__name__)
+
+# Tamanho dos blocos lidos do CSV
+BLOCK_BYTES = 4 << 20
+
+# Snapshot dos preços pré-fechamento (horas antes do início)
+OPENING_HOURS = 48
+# Snapshot dos preços de fechamento (segundos antes do início)
+CLOSING_SECONDS = 60
+
+# Horários do arquivo (hora do Reino Unido) lidos como UTC; sem coluna Time, início às 15:00
+DEFAULT_KICKOFF_SECONDS = 15 * 3600
+
+# Código da divisão (coluna Div) ou do arquivo de ligas extras -> liga do bot
+LEAGUE_CODES = {
+    'E0': 'soccer_england_premier_league',
+    'E1': 'soccer_efl_champ',
+    'SP1': 'soccer_spain_la_liga',
+    'SP2': 'soccer_spain_segunda_division',
+    'I1': 'soccer_italy_serie_a',
+    'I2': 'soccer_italy_serie_b',
+    'D1': 'soccer_germany_bundesliga',
+    'D2': 'soccer_germany_bundesliga2',
+    'F1': 'soccer_france_ligue_one',
+    'F2': 'soccer_france_ligue_two',
+    'N1': 'soccer_netherlands_eredivisie',
+    'P1': 'soccer_portugal_primeira_liga',
+    'B1': 'soccer_belgium_first_div',
+    'T1': 'soccer_turkey_super_league',
+    'SC0': 'soccer_spl',
+    'BRA': 'soccer_brazil_serie_a',
+    'ARG': 'soccer_argentina_primera_division',
+    'MEX': 'soccer_mexico_ligamx',
+    'USA': 'soccer_usa_mls',
+    'JPN': 'soccer_japan_j_league',
+}
+
+# Colunas equivalentes entre os formatos (principal e ligas extras)
+HOME_COLUMNS = ('HomeTeam', 'HT', 'Home')
+AWAY_COLUMNS = ('AwayTeam', 'AT', 'Away')
+HOME_GOALS_COLUMNS = ('FTHG', 'HG')
+AWAY_GOALS_COLUMNS = ('FTAG', 'AG')
+
+# Prefixo da casa -> título (resolvido pelo registro; aliases ajustam a grafia)
+H2H_BOOKMAKERS = {
+    'B365': 'Bet365', 'BW': 'Bwin', 'IW': 'Interwetten', 'PS': 'Pinnacle',
+    'WH': 'William Hill', 'VC': 'BetVictor', '1XB': '1xBet', 'BF': 'Betfair',
+}
+# Over/under 2.5 e handicap asiático usam 'P' para a Pinnacle
+LINE_BOOKMAKERS = {'B365': 'Bet365', 'P': 'Pinnacle', 'BFE': 'Betfair'}
+
+@dataclass
+class PriceColumn:
+    """Coluna de preço do CSV e o snapshot que ela gera"""
+    column: str
+    bookmaker: str
+    market: str
+    side: str
+    point: Optional[float] = None
+    point_column: Optional[str] = None
+    closing: bool = False
+
+def price_columns() -> List[PriceColumn]:
+    """Todas as colunas de preço reconhecidas (pré-fechamento e fechamento)"""
+    columns = []
+    for closing, tag in ((False, ''), (True, 'C')):
+        for prefix, title in H2H_BOOKMAKERS.items():
+            for suffix, side in (('H', 'home'), ('D', 'draw'), ('A', 'away')):
+                columns.append(PriceColumn(f'{prefix}{tag}{suffix}', title, 'h2h', side, closing=closing))
+        line = 'AHCh' if closing else 'AHh'
+        for prefix, title in LINE_BOOKMAKERS.items():
+            columns.append(PriceColumn(f'{prefix}{tag}>2.5', title, 'totals', 'Over', point=2.5, closing=closing))
+            columns.append(PriceColumn(f'{prefix}{tag}<2.5', title, 'totals', 'Under', point=2.5, closing=closing))
+            # Linha do handicap na perspectiva do mandante, como nos snapshots
+            columns.append(PriceColumn(f'{prefix}{tag}AHH', title, 'spreads', 'home', point_column=line, closing=closing))
+            columns.append(PriceColumn(f'{prefix}{tag}AHA', title, 'spreads', 'away', point_column=line, closing=closing))
+    return columns
+
+PRICE_COLUMNS = price_columns()
+
+def _first(names: List[str], candidates: Tuple[str, ...]) -> Optional[str]:
+    return next((name for name in candidates if name in names), None)
+
+class HistoryImporter:
+    """Importa arquivos CSV de resultados e odds para o banco do bot"""
+
+    def __init__(self, db_path: str, aliases_file: str = '', encoding: str = 'utf8'):
+        self.db_path = db_path
+        self.aliases_file = aliases_file
+        self.encoding = encoding
+        self.db_manager = DatabaseManager(db_path)
+        self.registry = NameRegistry()
+        # (liga, mandante, visitante, dia) -> id de jogo já existente no banco
+        self.known_events: Dict[Tuple[int, int, int, int], str] = {}
+        # Jogos já gravados (só eles podem ter snapshots a substituir)
+        self.stored_games: Set[str] = set()
+
+    async def _load(self, conn: sqlite3.Connection):
+        self.registry.load(
+            conn.execute('SELECT id, kind, name FROM entities').fetchall(),
+            conn.execute('SELECT kind, alias, entity_id FROM entity_aliases').fetchall()
+        )
+        if self.aliases_file:
+            self.registry.load_aliases_file(self.aliases_file)
+            await self.db_manager.store_registry(self.registry)
+        for game_id, league_id, home_id, away_id, commence_ts in conn.execute('''
+            SELECT id, league_id, home_id, away_id, commence_ts FROM games
+            WHERE home_id IS NOT NULL AND commence_ts IS NOT NULL
+        '''):
+            self.known_events[(league_id, home_id, away_id, commence_ts // 86400)] = game_id
+        self.stored_games.update(game_id for (game_id,) in conn.execute('SELECT id FROM games'))
+
+    async def _allocate(self, names: List[Tuple[str, str]]):
+        """Aloca no banco os nomes ainda sem id (o bot pode estar gravando ao mesmo tempo)"""
+        missing = self.registry.missing(names)
+        if missing:
+            self.registry.merge(missing, await self.db_manager.allocate_entities(missing))
+
+    def _ids(self, kind: str, names: pa.Array) -> pa.Array:
+        """Ids canônicos de uma coluna de nomes (resolução por nome distinto)"""
+        distinct = pc.unique(names)
+        ids = pa.array([self.registry.resolve(kind, name) for name in distinct.to_pylist()], type=pa.int64())
+        return pc.take(ids, pc.index_in(names, value_set=distinct))
+
+    def _kickoffs(self, block: pa.Table) -> pa.Array:
+        """Início em epoch (s) a partir de Date (dd/mm/aa ou dd/mm/aaaa) e Time"""
+        dates = block.column('Date')
+        parsed = pc.coalesce(
+            pc.strptime(dates, format='%d/%m/%y', unit='s', error_is_null=True),
+            pc.strptime(dates, format='%d/%m/%Y', unit='s', error_is_null=True)
+        )
+        seconds = pc.cast(pc.cast(parsed, pa.timestamp('s')), pa.int64())
+        if 'Time' in block.column_names:
+            times = pc.strptime(block.column('Time'), format='%H:%M', unit='s', error_is_null=True)
+            of_day = pc.add(pc.multiply(pc.cast(pc.hour(times), pa.int64()), 3600),
+                            pc.multiply(pc.cast(pc.minute(times), pa.int64()), 60))
+            return pc.add(seconds, pc.fill_null(of_day, DEFAULT_KICKOFF_SECONDS))
+        return pc.add(seconds, DEFAULT_KICKOFF_SECONDS)
+
+    def _read(self, path: Path):
+        """Blocos do arquivo já com as colunas normalizadas (league, home, away, ...)"""
+        with open(path, newline='', encoding=self.encoding, errors='replace') as f:
+            header = [name.strip().lstrip('\ufeff') for name in next(csv.reader(f), [])]
+
+        columns = {
+            'home': _first(header, HOME_COLUMNS),
+            'away': _first(header, AWAY_COLUMNS),
+            'home_goals': _first(header, HOME_GOALS_COLUMNS),
+            'away_goals': _first(header, AWAY_GOALS_COLUMNS),
+        }
+        if 'Date' not in header or not all(columns.values()):
+            raise ValueError(f"{path}: colunas de data, times ou placar ausentes")
+
+        prices = [item for item in PRICE_COLUMNS if item.column in header]
+        lines = {item.point_column for item in prices if item.point_column and item.point_column in header}
+        types = {name: pa.string() for name in ('Div', 'Date', 'Time', columns['home'], columns['away'])}
+        types.update({columns['home_goals']: pa.int16(), columns['away_goals']: pa.int16()})
+        types.update({item.column: pa.float64() for item in prices})
+        types.update({line: pa.float64() for line in lines})
+
+        reader = pacsv.open_csv(
+            path,
+            read_options=pacsv.ReadOptions(block_size=BLOCK_BYTES, encoding=self.encoding),
+            convert_options=pacsv.ConvertOptions(
+                column_types=types,
+                include_columns=[name for name in types if name in header],
+                strings_can_be_null=True
+            )
+        )
+        for batch in reader:
+            block = pa.Table.from_batches([batch])
+            for name, source in columns.items():
+                block = block.append_column(name, block.column(source))
+            yield block, prices
+
+    async def import_file(self, conn: sqlite3.Connection, path: Path, league: str = '') -> Dict[str, int]:
+        """Importa um arquivo; retorna quantos jogos, resultados e snapshots foram gravados"""
+        counts = {'games': 0, 'results': 0, 'snapshots': 0}
+        for block, prices in self._read(path):
+            # Linhas vazias no fim dos arquivos (e linhas sem um dos times)
+            block = block.filter(pc.and_(
+                pc.is_valid(block.column('Date')),
+                pc.and_(pc.is_valid(block.column('home')), pc.is_valid(block.column('away')))
+            ))
+            if block.num_rows == 0:
+                continue
+
+            if league:
+                leagues = pa.array([league] * block.num_rows)
+            elif 'Div' in block.column_names:
+                codes = block.column('Div')
+                leagues = pc.fill_null(
+                    pc.take(pa.array([LEAGUE_CODES.get(code, code) for code in pc.unique(codes).to_pylist()]),
+                            pc.index_in(codes, value_set=pc.unique(codes))),
+                    path.stem
+                )
+            else:
+                leagues = pa.array([LEAGUE_CODES.get(path.stem, path.stem)] * block.num_rows)
+
+            kickoffs = self._kickoffs(block)
+            valid = pc.is_valid(kickoffs)
+            block, leagues, kickoffs = block.filter(valid), pc.filter(leagues, valid), pc.filter(kickoffs, valid)
+
+            await self._allocate(
+                [(LEAGUE, name) for name in pc.unique(leagues).to_pylist()] +
+                [(TEAM, name) for column in ('home', 'away') for name in pc.unique(block.column(column)).to_pylist()] +
+                [(BOOKMAKER, item.bookmaker) for item in prices]
+            )
+            league_ids = self._ids(LEAGUE, leagues)
+            home_ids = self._ids(TEAM, block.column('home'))
+            away_ids = self._ids(TEAM, block.column('away'))
+            commence_times = pc.strftime(pc.cast(kickoffs, pa.timestamp('s')), format='%Y-%m-%dT%H:%M:%SZ')
+
+            rows = zip(leagues.to_pylist(), block.column('home').to_pylist(), block.column('away').to_pylist(),
+                       league_ids.to_pylist(), home_ids.to_pylist(), away_ids.to_pylist(),
+                       kickoffs.to_pylist(), commence_times.to_pylist())
+            games, game_ids = [], []
+            for league_key, home, away, league_id, home_id, away_id, kickoff, commence_time in rows:
+                day = kickoff // 86400
+                game_id = self.known_events.get((league_id, home_id, away_id, day))
+                if game_id is None:
+                    game_id = f'csv:{league_id}:{home_id}:{away_id}:{day}'
+                    self.known_events[(league_id, home_id, away_id, day)] = game_id
+                game_ids.append(game_id)
+                games.append((
+                    game_id, home, away, league_key, commence_time, kickoff, home_id, away_id, league_id,
+                    json.dumps({'id': game_id, 'sport_key': league_key, 'home_team': home, 'away_team': away,
+                                'commence_time': commence_time, 'bookmakers': [], 'source': 'csv'})
+                ))
+            game_ids = pa.array(game_ids)
+
+            # Resultados: só jogos com placar
+            scored = pc.and_(pc.is_valid(block.column('home_goals')), pc.is_valid(block.column('away_goals')))
+            results = list(zip(
+                pc.filter(game_ids, scored).to_pylist(),
+                pc.filter(block.column('home_goals'), scored).to_pylist(),
+                pc.filter(block.column('away_goals'), scored).to_pylist()
+            ))
+
+            snapshots = self._snapshots(block, prices, game_ids, kickoffs)
+            replaced = [
+                (game[0], game[5]) for game in games if game[0] in self.stored_games
+            ]
+            self._write(conn, games, results, snapshots, replaced)
+            self.stored_games.update(game[0] for game in games)
+            counts['games'] += len(games)
+            counts['results'] += len(results)
+            counts['snapshots'] += len(snapshots)
+        return counts
+
+    def _snapshots(self, block: pa.Table, prices: List[PriceColumn],
+                   game_ids: pa.Array, kickoffs: pa.Array) -> List[tuple]:
+        """Snapshots (jogo, mercado, linha, lado, casa, id da casa, preço, horário) das colunas de preço"""
+        opening = pc.subtract(kickoffs, OPENING_HOURS * 3600)
+        closing = pc.subtract(kickoffs, CLOSING_SECONDS)
+        rows = []
+        for item in prices:
+            prices_column = block.column(item.column)
+            present = pc.and_(pc.is_valid(prices_column), pc.greater(prices_column, 1.0))
+            if item.point_column:
+                if item.point_column not in block.column_names:
+                    continue
+                points = block.column(item.point_column)
+                present = pc.and_(present, pc.is_valid(points))
+                points = pc.filter(points, present).to_pylist()
+            else:
+                points = [item.point] * pc.sum(pc.cast(present, pa.int64())).as_py()
+            if not points:
+                continue
+
+            bookmaker_id = self.registry.resolve(BOOKMAKER, item.bookmaker)
+            bookmaker = self.registry.name(bookmaker_id)
+            captured = pc.filter(closing if item.closing else opening, present).to_pylist()
+            rows.extend(zip(
+                pc.filter(game_ids, present).to_pylist(),
+                [item.market] * len(points), points, [item.side] * len(points), [bookmaker] * len(points),
+                [bookmaker_id] * len(points),
+                pc.filter(prices_column, present).to_pylist(), captured
+            ))
+
+        # Ordem do índice por jogo/seleção: inserções locais na árvore
+        rows.sort(key=lambda row: (row[0], row[1], row[3], row[4], row[7]))
+        return rows
+
+    def _write(self, conn: sqlite3.Connection, games: List[tuple], results: List[tuple],
+               snapshots: List[tuple], replaced: List[Tuple[str, int]]):
+        """Grava um bloco em uma única transação
+
+        `replaced` são os jogos (id, início) já existentes: seus snapshots nos
+        horários da importação são substituídos, o que torna a reimportação idempotente.
+        """
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.executemany('''
+                INSERT OR IGNORE INTO games
+                (id, home_team, away_team, league, commence_time, commence_ts,
+                 home_id, away_id, league_id, data_json)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', games)
+            conn.executemany('''
+                INSERT OR REPLACE INTO game_results (game_id, home_score, away_score) VALUES (?, ?, ?)
+            ''', results)
+
+            if replaced:
+                conn.executemany('''
+                    DELETE FROM odds_snapshots WHERE game_id = ? AND captured_at IN (? - ?, ? - ?)
+                ''', [
+                    (game_id, kickoff, OPENING_HOURS * 3600, kickoff, CLOSING_SECONDS)
+                    for game_id, kickoff in replaced
+                ])
+            conn.executemany('''
+                INSERT INTO odds_snapshots
+                (game_id, market, point, side, bookmaker, bookmaker_id, price, captured_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', snapshots)
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+
+    def run(self, paths: List[str], league: str = '') -> Dict[str, int]:
+        """Importa os arquivos em ordem; retorna os totais"""
+        return asyncio.run(self._run(paths, league))
+
+    async def _run(self, paths: List[str], league: str) -> Dict[str, int]:
+        """Importação inteira em um único event loop (registro alocado pelo DatabaseManager)"""
+        # Esquema e migrações do bot
+        await self.db_manager.init_database()
+
+        conn = sqlite3.connect(self.db_path, isolation_level=None)
+        totals = {'games': 0, 'results': 0, 'snapshots': 0}
+        try:
+            await self._load(conn)
+            for path in paths:
+                start = time.perf_counter()
+                counts = await self.import_file(conn, Path(path), league)
+                for key, value in counts.items():
+                    totals[key] += value
+                logger.info(f"{path}: {counts} em {time.perf_counter() - start:.2f}s")
+        finally:
+            conn.close()
+        return totals
+
+def main():
+    parser = argparse.ArgumentParser(description='Importa resultados e odds históricas (CSV football-data)')
+    parser.add_argument('files', nargs='+', help='Arquivos CSV')
+    parser.add_argument('--db', default='football_bot.db', help='Banco SQLite do bot')
+    parser.add_argument('--league', default='', help='Liga de todos os arquivos (padrão: coluna Div ou nome do arquivo)')
+    parser.add_argument('--aliases', default='', help='JSON de aliases do registro canônico')
+    parser.add_argument('--encoding', default='utf8', help='Codificação dos arquivos (ex.: latin-1)')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    start = time.perf_counter()
+    totals = HistoryImporter(args.db, aliases_file=args.aliases, encoding=args.encoding).run(args.files, args.league)
+    print(f"{totals['games']} jogos, {totals['results']} resultados e {totals['snapshots']} snapshots "
+          f"em {time.perf_counter() - start:.1f}s")
+
+if __name__ == '__main__':
+    main()
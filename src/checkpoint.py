@@ -0,0 +1,117 @@
+"""
+Checkpoints do ciclo de análise para retomada rápida após falhas
+"""
+
+import json
+import logging
+import time
+from dataclasses import asdict, fields
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Set, Type
+
+logger = logging.getLogger(__name__)
+
+# Tipos de progresso registrados em cycle_progress
+LEAGUE = 'league'
+ANALYSIS = 'analysis'
+MESSAGE = 'message'
+
+def serialize(item) -> Dict[str, Any]:
+    """Converte uma oportunidade (dataclass) em dicionário JSON"""
+    data = asdict(item)
+    for key, value in data.items():
+        if isinstance(value, datetime):
+            data[key] = value.isoformat()
+    return data
+
+def deserialize(cls: Type, data: Dict[str, Any]):
+    """Reconstrói uma oportunidade a partir de serialize()"""
+    values = {}
+    for field in fields(cls):
+        if field.name not in data:
+            continue
+        value = data[field.name]
+        if field.type is datetime and isinstance(value, str):
+            value = datetime.fromisoformat(value)
+        elif field.name == 'event_key':
+            value = tuple(value)
+        values[field.name] = value
+    return cls(**values)
+
+def message_key(item, chat_id: str = '') -> str:
+    """Chave estável de uma mensagem (sugestão ou surebet) dentro do ciclo, por chat de destino"""
+    if hasattr(item, 'dedupe_key'):
+        key = 'bet:' + json.dumps(item.dedupe_key, default=str)
+    else:
+        key = 'arb:' + json.dumps([item.game_id, item.market, item.point], default=str)
+    # Chat padrão sem prefixo: chaves compatíveis com ciclos gravados antes das estratégias
+    return f"{chat_id}|{key}" if chat_id else key
+
+class CycleCheckpoint:
+    """Progresso persistido de um ciclo de análise"""
+
+    def __init__(self, db_manager, cycle_id: int, started_at: float, resumed: bool = False):
+        self.db_manager = db_manager
+        self.cycle_id = cycle_id
+        self.started_at = started_at
+        self.resumed = resumed
+        # Jogos coletados por chave "fonte:liga"
+        self.leagues: Dict[str, List[Dict[str, Any]]] = {}
+        # Resultado da análise (seleções, surebets e contadores)
+        self.analysis: Optional[Dict[str, Any]] = None
+        self.sent: Set[str] = set()
+
+    @classmethod
+    async def open(cls, db_manager, max_age_seconds: float, worker_id: str = '') -> 'CycleCheckpoint':
+        """Retoma o ciclo aberto mais recente do worker ou inicia um novo"""
+        now = time.time()
+        open_cycle = await db_manager.get_open_cycle(worker_id)
+
+        if open_cycle:
+            cycle_id, started_at = open_cycle
+            if now - started_at <= max_age_seconds:
+                checkpoint = cls(db_manager, cycle_id, started_at, resumed=True)
+                for kind, item_key, data in await db_manager.get_cycle_progress(cycle_id):
+                    if kind == LEAGUE:
+                        checkpoint.leagues[item_key] = json.loads(data)
+                    elif kind == ANALYSIS:
+                        checkpoint.analysis = json.loads(data)
+                    elif kind == MESSAGE:
+                        checkpoint.sent.add(item_key)
+                logger.info(
+                    f"Retomando ciclo {cycle_id}: {len(checkpoint.leagues)} ligas coletadas, "
+                    f"análise {'concluída' if checkpoint.analysis else 'pendente'}, "
+                    f"{len(checkpoint.sent)} mensagens já enviadas"
+                )
+                return checkpoint
+
+            # Dados antigos demais para reaproveitar
+            logger.info(f"Ciclo {cycle_id} interrompido há muito tempo; descartando checkpoint")
+            await db_manager.finish_cycle(cycle_id, 'ABANDONED')
+
+        cycle_id = await db_manager.create_cycle(now, worker_id)
+        return cls(db_manager, cycle_id, now)
+
+    def league_games(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        """Jogos já coletados para a liga neste ciclo (None se ainda não coletada)"""
+        return self.leagues.get(key)
+
+    async def record_league(self, key: str, games: List[Dict[str, Any]]):
+        self.leagues[key] = games
+        await self.db_manager.record_cycle_progress(self.cycle_id, LEAGUE, key, json.dumps(games))
+
+    async def record_analysis(self, analysis: Dict[str, Any]):
+        self.analysis = analysis
+        await self.db_manager.record_cycle_progress(self.cycle_id, ANALYSIS, '', json.dumps(analysis))
+
+    def was_sent(self, item, chat_id: str = '') -> bool:
+        return message_key(item, chat_id) in self.sent
+
+    async def record_sent(self, item, store: bool = False, chat_id: str = '', strategy: Optional[str] = None):
+        """Marca a mensagem como enviada (e grava a oportunidade na mesma transação)"""
+        key = message_key(item, chat_id)
+        self.sent.add(key)
+        await self.db_manager.record_sent_message(self.cycle_id, key, item if store else None, strategy)
+
+    async def finish(self, status: str):
+        await self.db_manager.finish_cycle(self.cycle_id, status)
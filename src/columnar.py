@@ -0,0 +1,234 @@
+"""
+Exportação colunar do histórico (Parquet) e carregamento com memory-map
+Uso: python -m src.columnar --db football_bot.db --out history
+"""
+
+import argparse
+import logging
+import sqlite3
+import time
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Iterator, Tuple
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.fs as pafs
+
+from src.retention import history_batches
+
+logger = logging.getLogger(__name__)
+
+# Linhas por lote lido do SQLite (e por row group no Parquet)
+CHUNK_ROWS = 100_000
+
+_TEXT = pa.dictionary(pa.int32(), pa.string())
+
+PARTITIONING = ds.partitioning(
+    pa.schema([('season', pa.int16()), ('league', pa.string())]),
+    flavor='hive'
+)
+
+# Ano de início da temporada do jogo `g` (mesma regra de retention.season_of)
+_SEASON = '''
+    CAST(strftime('%Y', g.commence_ts, 'unixepoch') AS INTEGER)
+    - (CAST(strftime('%m', g.commence_ts, 'unixepoch') AS INTEGER) < :start_month)
+'''
+
+# tabela -> (consulta, esquema); as duas últimas colunas são as partições
+EXPORTS: Dict[str, Tuple[str, pa.Schema]] = {
+    'games': (
+        '''
+        SELECT g.id, g.home_team, g.away_team, g.commence_time, g.commence_ts,
+               g.home_id, g.away_id, g.league_id, {season} AS season, g.league
+        FROM history_games g
+        ''',
+        pa.schema([
+            ('id', pa.string()), ('home_team', _TEXT), ('away_team', _TEXT),
+            ('commence_time', pa.string()), ('commence_ts', pa.int64()),
+            ('home_id', pa.int32()), ('away_id', pa.int32()), ('league_id', pa.int32()),
+            ('season', pa.int16()), ('league', pa.string()),
+        ])
+    ),
+    'odds_snapshots': (
+        '''
+        SELECT s.game_id, s.market, s.point, s.side, s.bookmaker, s.bookmaker_id, s.price, s.captured_at,
+               {season} AS season, g.league
+        FROM history_odds_snapshots s
+        JOIN history_games g ON g.id = s.game_id
+        ''',
+        pa.schema([
+            ('game_id', pa.string()), ('market', _TEXT), ('point', pa.float64()),
+            ('side', _TEXT), ('bookmaker', _TEXT), ('bookmaker_id', pa.int32()),
+            ('price', pa.float64()), ('captured_at', pa.float64()),
+            ('season', pa.int16()), ('league', pa.string()),
+        ])
+    ),
+    'opportunities': (
+        '''
+        SELECT o.id, o.game_id, o.market, o.selection, o.odds, o.bookmaker,
+               o.value_detected, o.confidence, o.sent_at, o.strategy,
+               o.market_key, o.side, o.point, o.outcome, o.profit, o.settled_at,
+               o.league_id, o.home_id, o.away_id, o.bookmaker_id,
+               {season} AS season, g.league
+        FROM history_opportunities o
+        JOIN history_games g ON g.id = o.game_id
+        ''',
+        pa.schema([
+            ('id', pa.int64()), ('game_id', pa.string()), ('market', _TEXT),
+            ('selection', pa.string()), ('odds', pa.float64()), ('bookmaker', _TEXT),
+            ('value_detected', pa.float64()), ('confidence', pa.float64()),
+            ('sent_at', pa.string()), ('strategy', _TEXT),
+            ('market_key', _TEXT), ('side', _TEXT), ('point', pa.float64()),
+            ('outcome', _TEXT), ('profit', pa.float64()), ('settled_at', pa.float64()),
+            ('league_id', pa.int32()), ('home_id', pa.int32()), ('away_id', pa.int32()),
+            ('bookmaker_id', pa.int32()),
+            ('season', pa.int16()), ('league', pa.string()),
+        ])
+    ),
+    'game_results': (
+        '''
+        SELECT r.game_id, r.home_score, r.away_score, r.completed_at,
+               {season} AS season, g.league
+        FROM history_game_results r
+        JOIN history_games g ON g.id = r.game_id
+        ''',
+        pa.schema([
+            ('game_id', pa.string()), ('home_score', pa.int16()), ('away_score', pa.int16()),
+            ('completed_at', pa.string()),
+            ('season', pa.int16()), ('league', pa.string()),
+        ])
+    ),
+}
+
+# Ordem das linhas em cada arquivo (agrupa jogos e dá row groups seletivos no tempo)
+_ORDER = {
+    'games': 'g.commence_ts',
+    'odds_snapshots': 's.game_id, s.captured_at, s.id',
+    'opportunities': 'o.id',
+    'game_results': 'r.game_id',
+}
+
+def _batches(cursor: sqlite3.Cursor, schema: pa.Schema, counter: List[int]) -> Iterator[pa.RecordBatch]:
+    while True:
+        rows = cursor.fetchmany(CHUNK_ROWS)
+        if not rows:
+            return
+        counter[0] += len(rows)
+        yield pa.RecordBatch.from_arrays(
+            [pa.array(values, type=item.type) for values, item in zip(zip(*rows), schema)],
+            schema=schema
+        )
+
+def export_history(db_path: str, out_dir: str, archive_dir: str = '',
+                   seasons: Optional[List[int]] = None, season_start_month: int = 7) -> Dict[str, int]:
+    """Exporta as tabelas do histórico; partições das temporadas exportadas são substituídas"""
+    # write_dataset consome os lotes em uma thread própria (acesso sequencial)
+    conn = sqlite3.connect(db_path, check_same_thread=False)
+    counts = {}
+    try:
+        season_filter = ''
+        params: Dict[str, Any] = {'start_month': season_start_month}
+        if seasons:
+            season_filter = f"AND ({_SEASON}) IN ({', '.join(f':season{i}' for i in range(len(seasons)))})"
+            params.update({f'season{i}': season for i, season in enumerate(seasons)})
+
+        write_options = ds.ParquetFileFormat().make_write_options(compression='zstd')
+        for table, (query, schema) in EXPORTS.items():
+            start = time.perf_counter()
+            counter = [0]
+            sql = f'''
+                {query.format(season=_SEASON)}
+                WHERE g.commence_ts IS NOT NULL {season_filter}
+                ORDER BY season, g.league, {_ORDER[table]}
+            '''
+
+            def table_batches():
+                # Uma temporada fica inteira em um banco: cada lote de arquivos traz partições completas
+                for _ in history_batches(conn, db_path, archive_dir):
+                    yield from _batches(conn.execute(sql, params), schema, counter)
+
+            ds.write_dataset(
+                table_batches(), str(Path(out_dir) / table),
+                schema=schema, format='parquet', partitioning=PARTITIONING,
+                file_options=write_options, basename_template='part-{i}.parquet',
+                existing_data_behavior='delete_matching',
+                max_rows_per_group=CHUNK_ROWS, min_rows_per_group=min(CHUNK_ROWS, 10_000)
+            )
+            counts[table] = counter[0]
+            logger.info(f"{table}: {counter[0]} linhas exportadas em {time.perf_counter() - start:.2f}s")
+    finally:
+        conn.close()
+    return counts
+
+def open_history(directory: str, table: str) -> ds.Dataset:
+    """Dataset de uma tabela exportada, lido por memory-map
+
+    O esquema é o da exportação atual: partições exportadas antes de uma
+    coluna existir a leem como nula.
+    """
+    return ds.dataset(
+        str(Path(directory) / table), format='parquet', partitioning=PARTITIONING,
+        schema=EXPORTS[table][1], filesystem=pafs.LocalFileSystem(use_mmap=True)
+    )
+
+def load_history(directory: str, table: str, columns: Optional[List[str]] = None,
+                 seasons: Optional[List[int]] = None, leagues: Optional[List[str]] = None,
+                 where: Optional[ds.Expression] = None) -> pa.Table:
+    """Carrega colunas de uma tabela exportada, filtrando partições e row groups"""
+    conditions = []
+    if seasons:
+        conditions.append(ds.field('season').isin(seasons))
+    if leagues:
+        conditions.append(ds.field('league').isin(leagues))
+    if where is not None:
+        conditions.append(where)
+
+    expression = None
+    for condition in conditions:
+        expression = condition if expression is None else expression & condition
+    return open_history(directory, table).to_table(columns=columns, filter=expression)
+
+def _rows(table: pa.Table, columns: List[str]) -> Iterator[tuple]:
+    """Linhas como tuplas, convertidas lote a lote"""
+    for batch in table.select(columns).to_batches(CHUNK_ROWS):
+        yield from zip(*(batch.column(name).to_pylist() for name in columns))
+
+def backtest_inputs(directory: str, since: Optional[float] = None):
+    """Jogos, resultados e snapshots (por jogo e horário) no formato do BacktestEngine"""
+    games = {
+        row[0]: row[1:]
+        for row in _rows(load_history(directory, 'games'),
+                         ['id', 'home_team', 'away_team', 'league', 'commence_time'])
+    }
+    results = {
+        row[0]: row[1:]
+        for row in _rows(load_history(directory, 'game_results'), ['game_id', 'home_score', 'away_score'])
+    }
+    columns = ['game_id', 'market', 'point', 'side', 'bookmaker', 'price', 'captured_at']
+    snapshots = load_history(
+        directory, 'odds_snapshots', columns=columns, where=ds.field('captured_at') >= (since or 0)
+    ).sort_by([('game_id', 'ascending'), ('captured_at', 'ascending')])
+    return games, results, _rows(snapshots, columns)
+
+def _int_list(text: str) -> List[int]:
+    return [int(value) for value in text.split(',') if value.strip()]
+
+def main():
+    parser = argparse.ArgumentParser(description='Exporta o histórico do bot em Parquet particionado')
+    parser.add_argument('--db', default='football_bot.db', help='Banco SQLite do bot')
+    parser.add_argument('--archive-dir', default='', help='Arquivos de temporada (padrão: <dir do banco>/archive)')
+    parser.add_argument('--out', default='history', help='Diretório dos datasets Parquet')
+    parser.add_argument('--seasons', type=_int_list, default=None,
+                        help='Anos de início das temporadas a (re)exportar; padrão: todas')
+    parser.add_argument('--season-start-month', type=int, default=7)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    counts = export_history(args.db, args.out, archive_dir=args.archive_dir,
+                            seasons=args.seasons, season_start_month=args.season_start_month)
+    for table, count in counts.items():
+        print(f"{table:<16} {count:>10} linhas")
+
+if __name__ == '__main__':
+    main()
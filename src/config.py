@@ -5,15 +5,16 @@ Configurações seguras do sistema
 import os
 import json
 import logging
+import socket
 from dataclasses import dataclass, field
 from typing import List, Optional, Dict, Any
 from pathlib import Path
 import base64
-from cryptography.fernet import Fernet
-import keyring
 
 logger = logging.getLogger(__name__)
 
+REQUIRED_CREDENTIALS = ('ODDS_API_KEY', 'TELEGRAM_BOT_TOKEN', 'TELEGRAM_CHAT_ID')
+
 class SecureConfig:
     """Gerenciador seguro de configurações"""
     
@@ -43,6 +44,9 @@ class SecureConfig:
             if not encrypted_file.exists() or not key_file.exists():
                 return {}
             
+            # cryptography só é importado quando há arquivo criptografado
+            from cryptography.fernet import Fernet
+            
             # Ler chave de criptografia
             with open(key_file, 'rb') as f:
                 key = f.read()
@@ -65,6 +69,8 @@ class SecureConfig:
     def _load_from_keyring(self) -> Dict[str, str]:
         """Carrega configurações do keyring do sistema"""
         try:
+            import keyring
+            
             service_name = "football-betting-bot"
             return {
                 'ODDS_API_KEY': keyring.get_password(service_name, 'odds_api_key'),
@@ -90,7 +96,7 @@ class SecureConfig:
         return {}
     
     def load_credentials(self) -> Dict[str, str]:
-        """Carrega credenciais usando múltiplos métodos"""
+        """Carrega credenciais usando múltiplos métodos (para no primeiro que completar o conjunto)"""
         credentials = {}
         
         for method in self.config_methods:
@@ -103,15 +109,17 @@ class SecureConfig:
                         
             except Exception as e:
                 logger.warning(f"Erro no método de configuração {method.__name__}: {e}")
+            
+            # Credenciais completas (ex.: via variáveis de ambiente): evita sondar keyring e arquivos
+            if all(credentials.get(key) for key in REQUIRED_CREDENTIALS):
+                break
         
         return credentials
     
     def validate_credentials(self, credentials: Dict[str, str]) -> bool:
         """Valida se todas as credenciais necessárias estão presentes"""
-        required_keys = ['ODDS_API_KEY', 'TELEGRAM_BOT_TOKEN', 'TELEGRAM_CHAT_ID']
-        
         missing_keys = []
-        for key in required_keys:
+        for key in REQUIRED_CREDENTIALS:
             if not credentials.get(key):
                 missing_keys.append(key)
         
@@ -166,7 +174,22 @@ class Config:
     TELEGRAM_CHAT_ID: str = field(default="")
     
     # Configurações da API
-    ODDS_API_BASE_URL: str = 'https://api.the-odds-api.com/v4'
+    ODDS_API_BASE_URL: str = field(default_factory=lambda: os.getenv('ODDS_API_BASE_URL', 'https://api.the-odds-api.com/v4'))
+    TELEGRAM_API_BASE_URL: str = field(default_factory=lambda: os.getenv('TELEGRAM_API_BASE_URL', 'https://api.telegram.org'))
+    
+    # Gravação/reprodução de respostas da API (execução offline e testes de carga)
+    ODDS_RECORD_DIR: str = field(default_factory=lambda: os.getenv('ODDS_RECORD_DIR', ''))
+    ODDS_REPLAY_DIR: str = field(default_factory=lambda: os.getenv('ODDS_REPLAY_DIR', ''))
+    
+    # Fontes de odds consultadas em paralelo, em ordem de prioridade (the-odds-api, file)
+    ODDS_PROVIDERS: List[str] = field(default_factory=lambda: [
+        name.strip() for name in os.getenv('ODDS_PROVIDERS', 'the-odds-api').split(',') if name.strip()
+    ])
+    ODDS_FILE_PROVIDER_PATH: str = field(default_factory=lambda: os.getenv('ODDS_FILE_PROVIDER_PATH', ''))
+    PROVIDER_TIMEOUT: float = 60.0  # Tempo máximo por liga de cada fonte (s); ligas já coletadas são mantidas
+    
+    # Aliases de times/ligas/casas para o registro canônico (JSON opcional)
+    REGISTRY_ALIASES_FILE: str = field(default_factory=lambda: os.getenv('REGISTRY_ALIASES_FILE', ''))
     
     # Ligas de interesse
     TARGET_LEAGUES: List[str] = field(default_factory=lambda: [
@@ -185,6 +208,25 @@ class Config:
     MAX_ODDS: float = 5.0
     MIN_VALUE_THRESHOLD: float = 0.05  # 5% de valor mínimo
     MIN_CONFIDENCE: float = 0.7  # 70% de confiança mínima
+    TOP_K: int = 5  # Sugestões enviadas por ciclo
+    
+    # Perfis de estratégia (JSON) avaliados sobre a mesma coleta; vazio = apenas os limiares acima
+    # Ex.: [{"NAME": "conservadora", "MAX_ODDS": 3.0, "MARKETS": ["h2h"], "CHAT_IDS": ["-100..."]}]; campos omitidos herdam daqui
+    STRATEGIES_FILE: str = field(default_factory=lambda: os.getenv('STRATEGIES_FILE', ''))
+    
+    # Configurações de arbitragem (surebets)
+    ENABLE_ARBITRAGE_SCAN: bool = True
+    MIN_ARBITRAGE_MARGIN: float = 0.0  # Margem mínima sobre o stake total
+    ARBITRAGE_TOTAL_STAKE: float = 100.0  # Stake de referência para a divisão
+    
+    # Configurações de movimento de linhas (steam moves)
+    LINE_HISTORY_SIZE: int = 32  # Preços mantidos em memória por bookmaker
+    LINE_HISTORY_HOURS: int = 48  # Janela de snapshots carregada na inicialização
+    # Janela mínima do steam; com coletas mais espaçadas (ciclos de CYCLE_INTERVAL_HOURS)
+    # a janela é o intervalo entre as coletas de cada preço
+    STEAM_WINDOW_SECONDS: int = 600
+    STEAM_THRESHOLD: float = 0.03  # Variação mínima por casa (3%)
+    STEAM_MIN_BOOKMAKERS: int = 3
     
     # Mercados de interesse
     TARGET_MARKETS: List[str] = field(default_factory=lambda: [
@@ -197,6 +239,74 @@ class Config:
     MAX_API_REQUESTS_PER_HOUR: int = 500
     REQUEST_TIMEOUT: int = 30
     RETRY_ATTEMPTS: int = 3
+    LEAGUE_REQUEST_INTERVAL: float = 0.5  # Pausa entre ligas na coleta (s)
+    TELEGRAM_SEND_INTERVAL: float = 1.0  # Pausa entre mensagens (s)
+    STREAM_JSON: bool = True  # Decodificar respostas da Odds API em streaming
+    
+    # Estreitamento adaptativo: pedir só as casas/mercados que dão melhor preço em cada liga
+    ADAPTIVE_REQUESTS: bool = field(default_factory=lambda: os.getenv('ADAPTIVE_REQUESTS', '1').lower() in ('1', 'true', 'yes'))
+    FULL_SWEEP_HOURS: float = 24.0  # Intervalo entre varreduras completas por liga
+    NARROW_COVERAGE: float = 0.95  # Fração dos melhores preços coberta pelas casas pedidas
+    NARROW_MIN_BOOKMAKERS: int = 4  # Mínimo de casas (consenso de preços e steam moves)
+    NARROW_MAX_BOOKMAKERS: int = 10  # Até 10 casas custam o mesmo que uma região
+    
+    # Agendamento e retomada de ciclos
+    CYCLE_INTERVAL_HOURS: float = 12.0  # Intervalo entre ciclos de análise
+    CHECKPOINT_MAX_AGE_HOURS: float = 6.0  # Idade máxima de um ciclo interrompido para retomada
+    
+    # Modo distribuído: ligas divididas entre workers por leases no SQLite (DATABASE_PATH compartilhado)
+    WORKER_MODE: bool = field(default_factory=lambda: os.getenv('WORKER_MODE', '').lower() in ('1', 'true', 'yes'))
+    # Id estável permite retomar o ciclo do worker após reinício
+    WORKER_ID: str = field(default_factory=lambda: os.getenv('WORKER_ID') or f"{socket.gethostname()}-{os.getpid()}")
+    # Validade de um lease sem heartbeat (relógio de cada máquina: manter bem acima da diferença entre elas)
+    LEASE_SECONDS: float = 90.0
+    WORKER_TICK_SECONDS: float = 30.0  # Intervalo entre verificações de leases e da fila de notificações
+    
+    # Retenção e arquivamento do histórico (compactação em segundo plano)
+    COMPACTION_ENABLED: bool = field(default_factory=lambda: os.getenv('COMPACTION_ENABLED', '1').lower() in ('1', 'true', 'yes'))
+    COMPACTION_INTERVAL_HOURS: float = 24.0
+    SNAPSHOT_FULL_RESOLUTION_HOURS: float = 6.0  # Preços em resolução total antes do início
+    SNAPSHOT_BUCKET_SECONDS: int = 3600  # Resolução dos snapshots mais antigos
+    LOG_RETENTION_DAYS: float = 90.0  # Logs de execução, ciclos e notificações enviadas
+    SEASON_START_MONTH: int = 7  # Temporadas de julho a junho
+    ARCHIVE_GRACE_DAYS: float = 30.0  # Carência após o fim da temporada (resultados tardios)
+    ARCHIVE_DIR: str = field(default_factory=lambda: os.getenv('ARCHIVE_DIR', ''))  # Padrão: <dir do banco>/archive
+    # VACUUM completo após arquivar (bloqueia o banco durante a cópia; bancos novos usam o incremental)
+    ARCHIVE_VACUUM: bool = field(default_factory=lambda: os.getenv('ARCHIVE_VACUUM', '').lower() in ('1', 'true', 'yes'))
+    
+    # Liquidação das oportunidades enviadas (placares finais e P&L)
+    SETTLEMENT_ENABLED: bool = field(default_factory=lambda: os.getenv('SETTLEMENT_ENABLED', '').lower() in ('1', 'true', 'yes'))
+    SETTLEMENT_INTERVAL_HOURS: float = 6.0
+    SCORES_DAYS_FROM: int = 3  # Janela do endpoint /scores (máximo da API: 3 dias)
+    
+    # Resumo diário pelo Telegram (dia anterior, em UTC, lido dos agregados diários); opcional
+    DAILY_SUMMARY_ENABLED: bool = field(default_factory=lambda: os.getenv('DAILY_SUMMARY_ENABLED', '').lower() in ('1', 'true', 'yes'))
+    DAILY_SUMMARY_HOUR: int = 9  # Hora UTC a partir da qual o resumo do dia anterior é enviado
+    
+    # Sincronização com o Postgres do dashboard (Supabase/PostgREST); desligada sem URL
+    SUPABASE_URL: str = field(default_factory=lambda: os.getenv('SUPABASE_URL') or os.getenv('NEXT_PUBLIC_SUPABASE_URL', ''))
+    SUPABASE_SERVICE_KEY: str = field(default_factory=lambda: os.getenv('SUPABASE_SERVICE_KEY', ''))  # Escrita (ignora RLS)
+    DASHBOARD_SYNC_ENABLED: bool = field(default_factory=lambda: os.getenv('DASHBOARD_SYNC_ENABLED', '1').lower() in ('1', 'true', 'yes'))
+    DASHBOARD_SYNC_INTERVAL_SECONDS: float = 60.0
+    DASHBOARD_SYNC_BATCH_SIZE: int = 500  # Linhas por upsert
+    DASHBOARD_SYNC_MAX_BATCHES: int = 20  # Lotes por tabela em cada rodada (backlog segue na próxima)
+    
+    # Métricas internas (endpoint /metrics no formato Prometheus)
+    METRICS_ENABLED: bool = field(default_factory=lambda: os.getenv('METRICS_ENABLED', '').lower() in ('1', 'true', 'yes'))
+    METRICS_HOST: str = field(default_factory=lambda: os.getenv('METRICS_HOST', '127.0.0.1'))
+    METRICS_PORT: int = field(default_factory=lambda: int(os.getenv('METRICS_PORT', '9100')))
+    
+    # Stream de eventos para o dashboard (GET /events no servidor de métricas, SSE)
+    STREAM_ENABLED: bool = field(default_factory=lambda: os.getenv('STREAM_ENABLED', '').lower() in ('1', 'true', 'yes'))
+    STREAM_ALLOWED_ORIGIN: str = field(default_factory=lambda: os.getenv('STREAM_ALLOWED_ORIGIN', 'http://localhost:3000'))
+    STREAM_POLL_SECONDS: float = 1.0  # Leitura de oportunidades novas no banco (uma para todos os clientes)
+    STREAM_METRICS_SECONDS: float = 5.0
+    STREAM_REPLAY_LIMIT: int = 50  # Oportunidades enviadas a um cliente sem cursor
+    
+    # Profiler sob demanda (SIGUSR1 ou GET /profile no servidor de métricas; desabilitado por padrão)
+    PROFILER_ENABLED: bool = field(default_factory=lambda: os.getenv('PROFILER_ENABLED', '').lower() in ('1', 'true', 'yes'))
+    PROFILE_DURATION: float = 30.0  # Janela padrão de amostragem (s)
+    PROFILE_OUTPUT_DIR: str = 'profiles'
     
     def __post_init__(self):
         """Carrega credenciais de forma segura após inicialização"""
@@ -208,7 +318,16 @@ class Config:
         credentials = secure_config.load_credentials()
         
         if not secure_config.validate_credentials(credentials):
-            raise ValueError("Credenciais inválidas ou ausentes. Verifique a configuração.")
+            if not self.ODDS_REPLAY_DIR:
+                raise ValueError("Credenciais inválidas ou ausentes. Verifique a configuração.")
+            
+            # Em modo replay nenhuma chamada real é feita; usar valores fictícios
+            logger.warning("Modo replay: usando credenciais fictícias")
+            credentials = {
+                'ODDS_API_KEY': credentials.get('ODDS_API_KEY') or 'replay',
+                'TELEGRAM_BOT_TOKEN': credentials.get('TELEGRAM_BOT_TOKEN') or '0:replay',
+                'TELEGRAM_CHAT_ID': credentials.get('TELEGRAM_CHAT_ID') or '0'
+            }
         
         self.ODDS_API_KEY = credentials['ODDS_API_KEY']
         self.TELEGRAM_BOT_TOKEN = credentials['TELEGRAM_BOT_TOKEN']
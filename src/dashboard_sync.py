@@ -0,0 +1,223 @@
+"""
+Sincronização incremental do SQLite com o Postgres do dashboard
+"""
+
+import asyncio
+import json
+import logging
+import time
+import uuid
+from typing import Callable, Dict, Any, List, Optional, Tuple
+
+from src.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Namespace dos UUIDs das linhas sincronizadas (estáveis entre execuções)
+SYNC_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, 'football-betting-bot')
+
+# Status da oportunidade no dashboard por resultado da liquidação
+STATUS_BY_OUTCOME = {'WIN': 'won', 'HALF_WIN': 'won', 'PUSH': 'void', 'HALF_LOSS': 'lost', 'LOSS': 'lost'}
+
+# Tipo e mensagem do activity_logs por status do ciclo
+LOG_ENTRIES = {
+    'SUCCESS': ('success', 'Análise concluída: {games_analyzed} jogos, {opportunities_found} oportunidades, '
+                           '{opportunities_sent} enviadas'),
+    'NO_GAMES': ('warning', 'Nenhum jogo encontrado para análise'),
+    'ERROR': ('error', 'Erro durante ciclo de análise'),
+    'INTERRUPTED': ('warning', 'Ciclo de análise interrompido'),
+}
+
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+# Respostas que pedem lotes menores (corpo grande demais, tempo esgotado)
+SHRINK_STATUS = {408, 413}
+
+def row_uuid(table: str, row_id: int) -> str:
+    return str(uuid.uuid5(SYNC_NAMESPACE, f'{table}:{row_id}'))
+
+def _timestamp(value: Optional[str]) -> Optional[str]:
+    """TIMESTAMP do SQLite (UTC, 'AAAA-MM-DD HH:MM:SS') em ISO 8601 para colunas TIMESTAMPTZ"""
+    return f"{value.replace(' ', 'T')}Z" if value and ' ' in value else value
+
+def opportunity_row(change: Dict[str, Any]) -> Dict[str, Any]:
+    """Linha de public.opportunities para uma oportunidade local"""
+    return {
+        'id': row_uuid('opportunities', change['id']),
+        'game_id': change['game_id'],
+        'home_team': change['home_team'] or '',
+        'away_team': change['away_team'] or '',
+        'league': change['league'],
+        'market': change['market'],
+        'selection': change['selection'],
+        'odds': round(change['odds'], 2),
+        'value': round(change['value_detected'], 4),
+        'confidence': round(change['confidence'], 4),
+        'bookmaker': change['bookmaker'],
+        # Jogo já arquivado: horário do envio no lugar do início
+        'commence_time': change['commence_time'] or _timestamp(change['sent_at']),
+        'status': STATUS_BY_OUTCOME.get(change['outcome'], 'pending'),
+        'created_at': _timestamp(change['sent_at']),
+    }
+
+def activity_row(log: Dict[str, Any]) -> Dict[str, Any]:
+    """Linha de public.activity_logs para um log de execução"""
+    kind, message = LOG_ENTRIES.get(log['status'], ('info', 'Ciclo de análise: {status}'))
+    details = {
+        key: log[key] for key in ('status', 'games_analyzed', 'opportunities_found', 'opportunities_sent')
+    }
+    if log['stage_durations']:
+        details['stage_durations'] = json.loads(log['stage_durations'])
+    return {
+        'id': row_uuid('execution_logs', log['id']),
+        'type': kind,
+        'message': message.format(**log),
+        'details': details,
+        'created_at': _timestamp(log['execution_time']),
+    }
+
+class PostgrestSink:
+    """Upserts em lote no Postgres pelo PostgREST (no Supabase: <projeto>/rest/v1)"""
+
+    def __init__(self, base_url: str, api_key: str, retry_attempts: int = 3,
+                 timeout: float = 30.0, backoff: float = 1.0):
+        self.base_url = base_url.rstrip('/')
+        self.api_key = api_key
+        self.retry_attempts = max(1, retry_attempts)
+        self.timeout = timeout
+        self.backoff = backoff
+        self.session = None
+
+    def _ensure_session(self):
+        """Cria a sessão HTTP sob demanda (aiohttp só é importado no primeiro envio)"""
+        import aiohttp
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers={
+                    'apikey': self.api_key,
+                    'Authorization': f'Bearer {self.api_key}',
+                    'Content-Type': 'application/json',
+                    # Upsert idempotente sem devolver as linhas
+                    'Prefer': 'resolution=merge-duplicates,return=minimal',
+                }
+            )
+
+    async def close(self):
+        if self.session and not self.session.closed:
+            await self.session.close()
+
+    async def upsert(self, table: str, rows: List[Dict[str, Any]], on_conflict: str = 'id') -> int:
+        """Envia um lote; retorna o status HTTP final (2xx = confirmado, 0 = falha de rede)"""
+        import aiohttp
+        self._ensure_session()
+        url = f"{self.base_url}/{table}"
+        body = json.dumps(rows)
+        status = 0
+
+        for attempt in range(self.retry_attempts):
+            retry_after = None
+            try:
+                with metrics.timer('dashboard_sync_seconds', table=table):
+                    async with self.session.post(url, params={'on_conflict': on_conflict}, data=body) as response:
+                        status = response.status
+                        if 200 <= status < 300:
+                            return status
+                        error_text = await response.text()
+                        retry_after = response.headers.get('Retry-After')
+            except asyncio.TimeoutError:
+                status, error_text = 408, 'tempo esgotado'
+            except aiohttp.ClientError as e:
+                status, error_text = 0, str(e)
+
+            if (status and status not in RETRYABLE_STATUS) or attempt == self.retry_attempts - 1:
+                logger.error(f"Erro no upsert de {len(rows)} linhas em {table}: {status} - {error_text}")
+                return status
+
+            delay = float(retry_after) if retry_after else self.backoff * 2 ** attempt
+            logger.warning(f"Upsert em {table} falhou ({status}), nova tentativa em {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+        return status
+
+class DashboardSync:
+    """Envio incremental das oportunidades, logs e analytics diários para o dashboard"""
+
+    def __init__(self, db_manager, sink: PostgrestSink, batch_size: int = 500, max_batches: int = 20):
+        self.db_manager = db_manager
+        self.sink = sink
+        self.max_batch_size = batch_size
+        self.batch_size = batch_size
+        self.max_batches = max_batches
+
+    async def _drain(self, stream: str, fetch: Callable, convert: Callable[[Dict], Dict],
+                     position: Callable[[Dict], Tuple[int, int]], day_of: Callable[[Dict], str]) -> Optional[int]:
+        """Envia os lotes pendentes de uma tabela; None se a rodada parou por erro
+
+        Os dias tocados por cada lote ficam pendentes no banco junto com o
+        cursor e só saem de lá quando o daily_analytics deles é confirmado.
+        """
+        after = await self.db_manager.get_sync_cursor(stream)
+        synced = 0
+        for _ in range(self.max_batches):
+            limit = self.batch_size
+            changes = await fetch(after, limit)
+            if not changes:
+                break
+
+            status = await self.sink.upsert(stream, [convert(change) for change in changes])
+            if status in SHRINK_STATUS and self.batch_size > 1:
+                self.batch_size = max(1, self.batch_size // 2)
+                if status == 413:
+                    # Limite de tamanho do servidor: o lote não volta a crescer acima dele
+                    self.max_batch_size = self.batch_size
+                metrics.set_gauge('dashboard_sync_batch_rows', self.batch_size)
+                logger.warning(f"Lotes da sincronização reduzidos para {self.batch_size} linhas")
+                continue
+            if not 200 <= status < 300:
+                return None
+
+            after = position(changes[-1])
+            await self.db_manager.set_sync_cursor(stream, *after, days=[day_of(change) for change in changes])
+            synced += len(changes)
+            # Servidor voltou a aceitar: recupera o tamanho do lote aos poucos
+            self.batch_size = min(self.max_batch_size, self.batch_size * 2)
+            metrics.set_gauge('dashboard_sync_batch_rows', self.batch_size)
+            if len(changes) < limit:
+                break
+        return synced
+
+    async def run(self) -> Dict[str, Any]:
+        """Uma rodada de sincronização; retorna as linhas enviadas por tabela"""
+        start = time.perf_counter()
+
+        opportunities = await self._drain(
+            'opportunities', self.db_manager.get_opportunity_changes, opportunity_row,
+            lambda change: (change['change_seq'], change['id']), lambda change: change['sent_at'][:10]
+        )
+        logs = None
+        if opportunities is not None:
+            logs = await self._drain(
+                'activity_logs', self.db_manager.get_execution_logs_after, activity_row,
+                lambda log: (log['id'], 0), lambda log: log['execution_time'][:10]
+            )
+        summary: Dict[str, Any] = {'opportunities': opportunities, 'activity_logs': logs}
+
+        # Dias tocados (desta rodada ou de rodadas interrompidas): recalculados a partir dos agregados
+        days = await self.db_manager.get_pending_sync_days()
+        if days:
+            analytics = await self.db_manager.get_daily_analytics(dates=days)
+            status = await self.sink.upsert('daily_analytics', analytics, on_conflict='date') if analytics else 200
+            if 200 <= status < 300:
+                await self.db_manager.clear_pending_sync_days(days)
+                summary['daily_analytics'] = len(analytics)
+            else:
+                summary['daily_analytics'] = None
+
+        complete = None not in summary.values()
+        summary['seconds'] = round(time.perf_counter() - start, 3)
+        if not complete:
+            logger.warning(f"Sincronização com o dashboard interrompida (a próxima rodada retoma do cursor): {summary}")
+        elif opportunities or logs:
+            logger.info(f"Dashboard sincronizado: {summary}")
+        return summary
@@ -2,97 +2,350 @@
 Módulo de coleta de dados da The Odds API
 """
 
-import aiohttp
 import asyncio
+import hashlib
+import json
 import logging
-from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import AsyncIterator, Awaitable, Callable, List, Dict, Any, Optional
+
+from src.metrics import metrics
+from src.odds_index import parse_kickoff
 
 logger = logging.getLogger(__name__)
 
-class OddsDataCollector:
+STREAM_CHUNK_SIZE = 64 * 1024
+FULL_REGIONS = 'us,uk,eu'
+
+def recording_key(endpoint: str, params: Dict[str, Any]) -> str:
+    """Nome de arquivo determinístico para uma requisição (ignora a chave da API)"""
+    items = sorted((key, str(value)) for key, value in params.items() if key != 'apiKey')
+    digest = hashlib.sha1(json.dumps([endpoint, items]).encode()).hexdigest()[:12]
+    return f"{endpoint.replace('/', '_')}__{digest}.json"
+
+class OddsProvider(ABC):
+    """Interface de uma fonte de odds (jogos no formato normalizado da The Odds API)"""
+    
+    name = 'provider'
+    
+    @abstractmethod
+    async def fetch_upcoming_games(self, hours_ahead: int = 24, checkpoint=None,
+                                   leagues: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Jogos com início nas próximas `hours_ahead` horas, com 'sport' e 'commence_ts'
+
+        Fontes que fazem várias requisições podem usar o CycleCheckpoint para
+        não repetir as já concluídas ao retomar um ciclo interrompido. `leagues`
+        restringe a coleta às ligas do worker (padrão: TARGET_LEAGUES).
+        """
+    
+    async def iter_upcoming_games(self, hours_ahead: int = 24, checkpoint=None,
+                                  leagues: Optional[List[str]] = None) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Os mesmos jogos, em lotes entregues à medida que cada liga é coletada
+
+        Quem consome pode parar entre lotes (timeout) e manter os já recebidos.
+        Fontes com uma única leitura entregam tudo em um lote.
+        """
+        yield await self.fetch_upcoming_games(hours_ahead, checkpoint, leagues)
+    
+    async def fetch_scores(self, leagues: List[str], days_from: int = 3) -> List[Dict[str, Any]]:
+        """Eventos das ligas iniciados nos últimos `days_from` dias, no formato do endpoint /scores
+
+        Eventos concluídos têm 'completed' verdadeiro e 'scores' [{name, score}].
+        Fontes sem placares não precisam implementar.
+        """
+        return []
+    
+    async def close(self):
+        """Libera conexões e arquivos abertos"""
+
+class OddsDataCollector(OddsProvider):
     """Coletor de dados da The Odds API"""
     
-    def __init__(self, api_key: str):
+    name = 'the-odds-api'
+    
+    def __init__(self, api_key: str, base_url: Optional[str] = None, config=None,
+                 record_dir: Optional[str] = None, replay_dir: Optional[str] = None):
         self.api_key = api_key
-        self.base_url = 'https://api.the-odds-api.com/v4'
+        self.base_url = (base_url or 'https://api.the-odds-api.com/v4').rstrip('/')
         self.session = None
+        self.config = config
+        # RequestPlanner opcional: pede só as casas/mercados relevantes por liga
+        self.planner = None
         
+        # Gravação/reprodução de respostas brutas para execução offline
+        self.record_dir = Path(record_dir) if record_dir else None
+        self.replay_dir = Path(replay_dir) if replay_dir else None
+        self._replay_now: Optional[datetime] = None
+        
+    def _get_config(self):
+        if self.config is None:
+            from src.config import Config
+            self.config = Config()
+        return self.config
+    
+    def _now(self) -> datetime:
+        """Horário de referência (o da gravação em modo replay)"""
+        if self.replay_dir and self._replay_now:
+            return self._replay_now
+        return datetime.now(timezone.utc)
+    
+    def _save_recording(self, endpoint: str, params: Dict[str, Any], data: Any):
+        """Salva a resposta bruta em disco"""
+        self.record_dir.mkdir(parents=True, exist_ok=True)
+        path = self.record_dir / recording_key(endpoint, params)
+        with open(path, 'w') as f:
+            json.dump({
+                'endpoint': endpoint,
+                'params': {key: value for key, value in params.items() if key != 'apiKey'},
+                'recorded_at': time.time(),
+                'data': data
+            }, f)
+    
+    def _load_recording(self, endpoint: str, params: Dict[str, Any]) -> Optional[Any]:
+        """Carrega uma resposta gravada anteriormente"""
+        path = self.replay_dir / recording_key(endpoint, params)
+        if not path.exists():
+            logger.warning(f"Gravação não encontrada para {endpoint}: {path.name}")
+            return None
+        
+        with open(path) as f:
+            recording = json.load(f)
+        
+        self._replay_now = datetime.fromtimestamp(recording['recorded_at'], tz=timezone.utc)
+        logger.info(f"Resposta reproduzida de {path.name}")
+        return recording['data']
+        
+    def _ensure_session(self):
+        """Cria a sessão HTTP sob demanda (aiohttp só é importado na primeira requisição)"""
+        if not self.session:
+            import aiohttp
+            self.session = aiohttp.ClientSession()
+        return self.session
+    
     async def __aenter__(self):
-        self.session = aiohttp.ClientSession()
+        self._ensure_session()
         return self
         
     async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+    
+    async def close(self):
         if self.session:
             await self.session.close()
+            self.session = None
     
-    async def _make_request(self, endpoint: str, params: Dict[str, Any]) -> Optional[Dict]:
-        """Faz requisição para a API"""
-        if not self.session:
-            self.session = aiohttp.ClientSession()
-            
-        params['apiKey'] = self.api_key
+    def _track_quota(self, params: Dict[str, Any], headers):
+        """Registra o custo da requisição e a cota restante informados pela API"""
+        cost = headers.get('x-requests-last')
+        remaining = headers.get('x-requests-remaining')
+        league = params.get('sport', '')
+        if cost is not None:
+            metrics.set_gauge('odds_api_request_cost', float(cost), league=league)
+        if remaining is not None:
+            metrics.set_gauge('odds_api_requests_remaining', float(remaining))
+            logger.info(f"Custo da requisição de {league}: {cost}; cota restante: {remaining}")
+    
+    async def _request(self, endpoint: str, params: Dict[str, Any],
+                       read_body: Callable[[Any], Awaitable[Any]]) -> Optional[Any]:
+        """GET na API com novas tentativas em 429; `read_body` lê a resposta bem-sucedida"""
+        self._ensure_session()
+        
+        # Chave da API só nos parâmetros enviados (sem alterar os do chamador)
+        request_params = {**params, 'apiKey': self.api_key}
         url = f"{self.base_url}/{endpoint}"
+        retry_attempts = self._get_config().RETRY_ATTEMPTS
         
         try:
-            async with self.session.get(url, params=params) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    logger.info(f"Requisição bem-sucedida para {endpoint}")
-                    return data
-                else:
-                    logger.error(f"Erro na API: {response.status} - {await response.text()}")
-                    return None
+            for attempt in range(retry_attempts):
+                async with self.session.get(url, params=request_params) as response:
+                    if response.status == 200:
+                        self._track_quota(params, response.headers)
+                        return await read_body(response)
+                    elif response.status == 429 and attempt < retry_attempts - 1:
+                        retry_after = float(response.headers.get('Retry-After', 2 ** attempt))
+                        logger.warning(f"Limite de requisições atingido, nova tentativa em {retry_after:.0f}s")
+                        await asyncio.sleep(retry_after)
+                    else:
+                        logger.error(f"Erro na API: {response.status} - {await response.text()}")
+                        return None
                     
         except Exception as e:
             logger.error(f"Erro na requisição: {str(e)}")
             return None
     
-    async def fetch_upcoming_games(self, hours_ahead: int = 24) -> List[Dict[str, Any]]:
-        """Busca jogos futuros nas próximas horas"""
-        from src.config import Config
-        config = Config()
+    async def _make_request(self, endpoint: str, params: Dict[str, Any]) -> Optional[Dict]:
+        """Faz requisição para a API"""
+        if self.replay_dir:
+            return self._load_recording(endpoint, params)
         
+        async def read_json(response):
+            data = await response.json()
+            logger.info(f"Requisição bem-sucedida para {endpoint}")
+            if self.record_dir:
+                self._save_recording(endpoint, params, data)
+            return data
+        
+        return await self._request(endpoint, params, read_json)
+    
+    async def _stream_games(self, endpoint: str, params: Dict[str, Any],
+                            now_ts: int, cutoff_ts: int) -> Optional[List[Dict]]:
+        """Lê a resposta em chunks e decodifica apenas os jogos dentro da janela"""
+        from src.json_stream import JsonArrayStreamer, json_loads, peek_commence_time
+        
+        async def read_games(response):
+            streamer = JsonArrayStreamer()
+            games = []
+            skipped = 0
+            async for chunk in response.content.iter_chunked(STREAM_CHUNK_SIZE):
+                for element in streamer.feed(chunk):
+                    # Descarta jogos fora da janela sem decodificar as odds
+                    commence_time = peek_commence_time(element)
+                    commence_ts = parse_kickoff(commence_time) if commence_time else None
+                    if commence_ts is not None and not now_ts < commence_ts < cutoff_ts:
+                        skipped += 1
+                        continue
+                    game = json_loads(element)
+                    game['commence_ts'] = (
+                        parse_kickoff(game['commence_time']) if commence_ts is None else commence_ts
+                    )
+                    if now_ts < game['commence_ts'] < cutoff_ts:
+                        games.append(game)
+            logger.info(f"Requisição bem-sucedida para {endpoint} "
+                        f"({len(games)} jogos na janela, {skipped} ignorados)")
+            return games
+        
+        return await self._request(endpoint, params, read_games)
+    
+    async def fetch_upcoming_games(self, hours_ahead: int = 24, checkpoint=None,
+                                   leagues: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Busca jogos futuros nas próximas horas"""
         all_games = []
+        async for league_games in self.iter_upcoming_games(hours_ahead, checkpoint, leagues):
+            all_games.extend(league_games)
         
-        for sport in config.TARGET_LEAGUES:
+        # Jogos mais próximos primeiro
+        all_games.sort(key=lambda game: game['commence_ts'])
+        
+        logger.info(f"Total de jogos coletados: {len(all_games)}")
+        return all_games
+    
+    async def iter_upcoming_games(self, hours_ahead: int = 24, checkpoint=None,
+                                  leagues: Optional[List[str]] = None) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Jogos liga a liga (um lote por requisição ou por liga recuperada do checkpoint)"""
+        config = self._get_config()
+        
+        # Gravação/replay precisam do payload completo e de parâmetros estáveis
+        stream = config.STREAM_JSON and not (self.record_dir or self.replay_dir)
+        planner = self.planner if not (self.record_dir or self.replay_dir) else None
+        
+        for sport in (config.TARGET_LEAGUES if leagues is None else leagues):
+            checkpoint_key = f"{self.name}:{sport}"
+            now_ts = int(self._now().timestamp())
+            cutoff_ts = now_ts + hours_ahead * 3600
+            
+            # Liga já coletada no ciclo interrompido: sem nova requisição
+            cached = checkpoint.league_games(checkpoint_key) if checkpoint else None
+            if cached is not None:
+                logger.info(f"Jogos de {sport} recuperados do checkpoint")
+                yield [game for game in cached if now_ts < game['commence_ts'] < cutoff_ts]
+                continue
+            
             logger.info(f"Buscando jogos para {sport}")
             
+            # Casas e mercados estreitados pelo histórico (varredura completa periódica)
+            if planner:
+                request = planner.plan(sport, config.TARGET_MARKETS, FULL_REGIONS)
+            else:
+                request = {'regions': FULL_REGIONS, 'markets': ','.join(config.TARGET_MARKETS)}
+            full_sweep = 'bookmakers' not in request
+            if not full_sweep:
+                logger.info(f"Requisição estreitada para {sport}: {request['bookmakers']} ({request['markets']})")
+            
             params = {
                 'sport': sport,
-                'regions': 'us,uk,eu',
-                'markets': ','.join(config.TARGET_MARKETS),
+                **request,
                 'oddsFormat': 'decimal',
                 'dateFormat': 'iso'
             }
             
-            data = await self._make_request('sports/{}/odds'.format(sport), params)
+            endpoint = 'sports/{}/odds'.format(sport)
+            league_games = []
             
-            if data:
-                # Filtrar jogos nas próximas horas
-                now = datetime.now()
-                cutoff_time = now + timedelta(hours=hours_ahead)
+            if stream:
+                with metrics.timer('odds_api_request_seconds', league=sport):
+                    data = await self._stream_games(endpoint, params, now_ts, cutoff_ts)
+                
+                for game in data or []:
+                    game['sport'] = sport
+                    league_games.append(game)
+            else:
+                with metrics.timer('odds_api_request_seconds', league=sport):
+                    data = await self._make_request(endpoint, params)
                 
-                for game in data:
-                    game_time = datetime.fromisoformat(game['commence_time'].replace('Z', '+00:00'))
+                if data:
+                    # Filtrar jogos nas próximas horas (epoch UTC calculado uma vez por jogo);
+                    # em modo replay o horário de referência é o da gravação recém-carregada
+                    now_ts = int(self._now().timestamp())
+                    cutoff_ts = now_ts + hours_ahead * 3600
                     
-                    if now < game_time < cutoff_time:
-                        game['sport'] = sport
-                        all_games.append(game)
+                    for game in data:
+                        game['commence_ts'] = parse_kickoff(game['commence_time'])
+                        
+                        if now_ts < game['commence_ts'] < cutoff_ts:
+                            game['sport'] = sport
+                            league_games.append(game)
+            
+            # Horário real da coleta da liga (em replay, o da gravação) para o movimento de linhas
+            fetched_at = self._now().timestamp()
+            for game in league_games:
+                game['fetched_at'] = fetched_at
+            if planner and data is not None:
+                if full_sweep:
+                    planner.observe_sweep(sport, league_games)
+                else:
+                    planner.learn_keys(league_games)
+            if checkpoint and data is not None:
+                await checkpoint.record_league(checkpoint_key, league_games)
+            yield league_games
                         
-            await asyncio.sleep(0.5)  # Rate limiting
+            if not self.replay_dir:
+                await asyncio.sleep(config.LEAGUE_REQUEST_INTERVAL)  # Rate limiting
+    
+    async def fetch_scores(self, leagues: List[str], days_from: int = 3) -> List[Dict[str, Any]]:
+        """Placares recentes, uma requisição por liga (custo 2 na cota com daysFrom)"""
+        config = self._get_config()
+        events = []
         
-        logger.info(f"Total de jogos coletados: {len(all_games)}")
-        return all_games
+        for sport in leagues:
+            params = {
+                'sport': sport,
+                'daysFrom': days_from,
+                'dateFormat': 'iso'
+            }
+            
+            with metrics.timer('odds_api_request_seconds', league=sport):
+                data = await self._make_request(f'sports/{sport}/scores', params)
+            
+            for event in data or []:
+                event['sport'] = sport
+                events.append(event)
+            
+            if not self.replay_dir:
+                await asyncio.sleep(config.LEAGUE_REQUEST_INTERVAL)  # Rate limiting
+        
+        logger.info(f"Placares coletados: {len(events)} eventos de {len(leagues)} ligas")
+        return events
     
     async def fetch_game_odds(self, game_id: str, sport: str) -> Optional[Dict]:
         """Busca odds específicas de um jogo"""
-        from src.config import Config
-        config = Config()
+        config = self._get_config()
         
         params = {
             'sport': sport,
-            'regions': 'us,uk,eu',
+            'regions': FULL_REGIONS,
             'markets': ','.join(config.TARGET_MARKETS),
             'oddsFormat': 'decimal',
             'dateFormat': 'iso'
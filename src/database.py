@@ -6,20 +6,83 @@ import sqlite3
 import aiosqlite
 import logging
 import json
-from typing import List, Dict, Any
+import math
+import os
+import time
+from typing import Iterable, List, Dict, Any, Optional, Tuple
 from datetime import datetime
 
+from src.metrics import metrics
+from src.odds_index import kickoff_timestamp, parse_kickoff, SETTLEMENT_MARGIN_SQL
+from src.registry import normalize_name
+
 logger = logging.getLogger(__name__)
 
+# UPDATE ... FROM (3.33) na liquidação e UPDATE ... RETURNING (3.35) nas sequências de mudança
+MIN_SQLITE_VERSION = (3, 35, 0)
+
+def _unit_profit(margin: str) -> str:
+    """Lucro por unidade dada a margem da seleção: ganha, devolve ou perde"""
+    return f'CASE WHEN {margin} > 0 THEN odds - 1 WHEN {margin} = 0 THEN 0.0 ELSE -1.0 END'
+
+# Liquidação de um mercado em uma passada; linhas asiáticas (x.25/x.75) dividem o stake
+# (UPDATE ... FROM exige SQLite 3.33+; ver MIN_SQLITE_VERSION)
+SETTLE_MARKET_SQL = {
+    market: f'''
+        WITH pending AS (
+            SELECT o.id, o.odds, o.side, o.point, r.home_score AS home, r.away_score AS away
+            FROM opportunities o
+            JOIN game_results r ON r.game_id = o.game_id
+            WHERE o.settled_at IS NULL AND o.market_key = ?
+        ), margins AS (
+            SELECT id, odds, {margin} AS margin, abs(CAST(point * 4 AS INTEGER)) % 2 = 1 AS quarter
+            FROM pending
+        ), settled AS (
+            SELECT id, odds, CASE WHEN quarter
+                THEN ({_unit_profit('(margin - 0.25)')} + {_unit_profit('(margin + 0.25)')}) / 2
+                ELSE {_unit_profit('margin')} END AS profit
+            FROM margins
+        )
+        UPDATE opportunities SET
+            profit = settled.profit,
+            outcome = CASE
+                WHEN settled.profit >= settled.odds - 1 THEN 'WIN'
+                WHEN settled.profit > 0 THEN 'HALF_WIN'
+                WHEN settled.profit = 0 THEN 'PUSH'
+                WHEN settled.profit > -1 THEN 'HALF_LOSS'
+                ELSE 'LOSS' END,
+            settled_at = ?
+        FROM settled
+        WHERE opportunities.id = settled.id
+    '''
+    for market, margin in SETTLEMENT_MARGIN_SQL.items()
+}
+
+# Id canônico de uma casa pela chave normalizada do registro (NULL se desconhecida)
+BOOKMAKER_ID_SQL = "(SELECT entity_id FROM entity_aliases WHERE kind = 'bookmaker' AND alias = ?)"
+
+def _bookmaker_keys(names: Iterable[str]) -> Dict[str, str]:
+    """Chave normalizada de cada casa, calculada uma vez por nome distinto"""
+    return {name: normalize_name(name) for name in set(names)}
+
 class DatabaseManager:
     """Gerenciador de banco de dados"""
     
-    def __init__(self, db_path: str = 'football_bot.db'):
-        self.db_path = db_path
+    def __init__(self, db_path: Optional[str] = None):
+        # DATABASE_PATH permite apontar vários workers para o mesmo arquivo (volume compartilhado)
+        self.db_path = db_path or os.getenv('DATABASE_PATH', 'football_bot.db')
         
     async def init_database(self):
         """Inicializa o banco de dados"""
+        if sqlite3.sqlite_version_info < MIN_SQLITE_VERSION:
+            raise RuntimeError(
+                f"SQLite {sqlite3.sqlite_version} não suportado; "
+                f"é necessário {'.'.join(map(str, MIN_SQLITE_VERSION))} ou superior"
+            )
         async with aiosqlite.connect(self.db_path) as db:
+            # Bancos novos devolvem páginas livres sem VACUUM completo (sem efeito em bancos existentes)
+            await db.execute('PRAGMA auto_vacuum = INCREMENTAL')
+
             # Tabela de jogos
             await db.execute('''
                 CREATE TABLE IF NOT EXISTS games (
@@ -28,11 +91,58 @@ class DatabaseManager:
                     away_team TEXT NOT NULL,
                     league TEXT NOT NULL,
                     commence_time TIMESTAMP NOT NULL,
+                    commence_ts INTEGER,
+                    home_id INTEGER,
+                    away_id INTEGER,
+                    league_id INTEGER,
                     data_json TEXT NOT NULL,
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                 )
             ''')
             
+            # Migração: epoch do início em bancos criados antes da coluna existir
+            cursor = await db.execute('PRAGMA table_info(games)')
+            columns = [row[1] for row in await cursor.fetchall()]
+            if 'commence_ts' not in columns:
+                await db.execute('ALTER TABLE games ADD COLUMN commence_ts INTEGER')
+                cursor = await db.execute('SELECT id, commence_time FROM games')
+                await db.executemany(
+                    'UPDATE games SET commence_ts = ? WHERE id = ?',
+                    [(parse_kickoff(commence_time), game_id) for game_id, commence_time in await cursor.fetchall()]
+                )
+            # Migração: ids do registro canônico
+            for column in ('home_id', 'away_id', 'league_id'):
+                if column not in columns:
+                    await db.execute(f'ALTER TABLE games ADD COLUMN {column} INTEGER')
+            await db.execute('''
+                CREATE INDEX IF NOT EXISTS idx_games_commence_ts
+                ON games (commence_ts)
+            ''')
+            
+            # Registro canônico de nomes (times, ligas, casas) e seus aliases
+            await db.execute('''
+                CREATE TABLE IF NOT EXISTS entities (
+                    id INTEGER PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    name TEXT NOT NULL,
+                    UNIQUE (kind, name)
+                )
+            ''')
+            await db.execute('''
+                CREATE TABLE IF NOT EXISTS entity_aliases (
+                    kind TEXT NOT NULL,
+                    alias TEXT NOT NULL,
+                    entity_id INTEGER NOT NULL,
+                    PRIMARY KEY (kind, alias),
+                    FOREIGN KEY (entity_id) REFERENCES entities (id)
+                )
+            ''')
+            # Migração: chave normalizada de cada entidade como alias (a alocação busca por ela)
+            cursor = await db.execute('SELECT id, kind, name FROM entities')
+            await db.executemany('''
+                INSERT OR IGNORE INTO entity_aliases (kind, alias, entity_id) VALUES (?, ?, ?)
+            ''', [(kind, normalize_name(name), entity_id) for entity_id, kind, name in await cursor.fetchall()])
+            
             # Tabela de oportunidades enviadas
             await db.execute('''
                 CREATE TABLE IF NOT EXISTS opportunities (
@@ -45,10 +155,57 @@ class DatabaseManager:
                     value_detected REAL NOT NULL,
                     confidence REAL NOT NULL,
                     sent_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    strategy TEXT,
                     FOREIGN KEY (game_id) REFERENCES games (id)
                 )
             ''')
             
+            # Migração: estratégia que selecionou a oportunidade
+            cursor = await db.execute('PRAGMA table_info(opportunities)')
+            columns = [row[1] for row in await cursor.fetchall()]
+            if 'strategy' not in columns:
+                await db.execute('ALTER TABLE opportunities ADD COLUMN strategy TEXT')
+            
+            # Migração: seleção estruturada, liquidação (resultado e lucro por unidade)
+            # e ids canônicos do evento e da casa
+            for column, definition in (('market_key', 'TEXT'), ('side', 'TEXT'), ('point', 'REAL'),
+                                       ('outcome', 'TEXT'), ('profit', 'REAL'), ('settled_at', 'REAL'),
+                                       ('league_id', 'INTEGER'), ('home_id', 'INTEGER'),
+                                       ('away_id', 'INTEGER'), ('bookmaker_id', 'INTEGER')):
+                if column not in columns:
+                    await db.execute(f'ALTER TABLE opportunities ADD COLUMN {column} {definition}')
+            # Migração: sequência de alterações (cursor da sincronização com o dashboard);
+            # linhas existentes entram na primeira sincronização
+            if 'change_seq' not in columns:
+                await db.execute('ALTER TABLE opportunities ADD COLUMN change_seq INTEGER')
+                await db.execute('UPDATE opportunities SET change_seq = 0')
+            await db.execute('''
+                CREATE INDEX IF NOT EXISTS idx_opportunities_change_seq
+                ON opportunities (change_seq, id)
+            ''')
+            # Pendentes (settled_at nulo) e recém-liquidadas sem varrer a tabela;
+            # oportunidades antigas sem seleção estruturada ficam fora da faixa pendente
+            await db.execute('''
+                CREATE INDEX IF NOT EXISTS idx_opportunities_settlement
+                ON opportunities (settled_at, market_key)
+            ''')
+            
+            # P&L acumulado por estratégia, liga e mercado (atualizado a cada liquidação)
+            await db.execute('''
+                CREATE TABLE IF NOT EXISTS pnl_totals (
+                    strategy TEXT NOT NULL,
+                    league TEXT NOT NULL,
+                    market_key TEXT NOT NULL,
+                    bets INTEGER NOT NULL DEFAULT 0,
+                    wins REAL NOT NULL DEFAULT 0,
+                    pushes INTEGER NOT NULL DEFAULT 0,
+                    staked REAL NOT NULL DEFAULT 0,
+                    profit REAL NOT NULL DEFAULT 0,
+                    updated_at REAL,
+                    PRIMARY KEY (strategy, league, market_key)
+                )
+            ''')
+            
             # Tabela de logs de execução
             await db.execute('''
                 CREATE TABLE IF NOT EXISTS execution_logs (
@@ -57,63 +214,976 @@ class DatabaseManager:
                     games_analyzed INTEGER NOT NULL,
                     opportunities_found INTEGER NOT NULL,
                     opportunities_sent INTEGER NOT NULL,
-                    status TEXT NOT NULL
+                    status TEXT NOT NULL,
+                    stage_durations TEXT
+                )
+            ''')
+            
+            # Migração: duração por etapa em bancos criados antes da coluna existir
+            cursor = await db.execute('PRAGMA table_info(execution_logs)')
+            columns = [row[1] for row in await cursor.fetchall()]
+            if 'stage_durations' not in columns:
+                await db.execute('ALTER TABLE execution_logs ADD COLUMN stage_durations TEXT')
+            
+            # Agregados diários (UTC) mantidos na mesma transação de cada escrita: resumo
+            # diário e dashboard são consultas por chave, sem varrer oportunidades e logs
+            cursor = await db.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'daily_stats'")
+            backfill = await cursor.fetchone() is None
+            await db.execute('''
+                CREATE TABLE IF NOT EXISTS daily_stats (
+                    day TEXT NOT NULL,
+                    league TEXT NOT NULL,
+                    market TEXT NOT NULL,
+                    opportunities INTEGER NOT NULL DEFAULT 0,
+                    value_sum REAL NOT NULL DEFAULT 0,
+                    confidence_sum REAL NOT NULL DEFAULT 0,
+                    settled INTEGER NOT NULL DEFAULT 0,
+                    wins REAL NOT NULL DEFAULT 0,
+                    pushes INTEGER NOT NULL DEFAULT 0,
+                    profit REAL NOT NULL DEFAULT 0,
+                    PRIMARY KEY (day, league, market)
+                )
+            ''')
+            await db.execute('''
+                CREATE TABLE IF NOT EXISTS daily_activity (
+                    day TEXT PRIMARY KEY,
+                    cycles INTEGER NOT NULL DEFAULT 0,
+                    failed_cycles INTEGER NOT NULL DEFAULT 0,
+                    games_analyzed INTEGER NOT NULL DEFAULT 0,
+                    opportunities_found INTEGER NOT NULL DEFAULT 0,
+                    opportunities_sent INTEGER NOT NULL DEFAULT 0
+                )
+            ''')
+            
+            # Migração: agregados de bancos existentes calculados uma única vez
+            if backfill:
+                await db.execute('''
+                    INSERT INTO daily_stats
+                    (day, league, market, opportunities, value_sum, confidence_sum, settled, wins, pushes, profit)
+                    SELECT date(o.sent_at), COALESCE(g.league, ''), COALESCE(o.market_key, o.market), COUNT(*),
+                           SUM(o.value_detected), SUM(o.confidence), SUM(o.settled_at IS NOT NULL),
+                           SUM(CASE o.outcome WHEN 'WIN' THEN 1 WHEN 'HALF_WIN' THEN 0.5 ELSE 0 END),
+                           COALESCE(SUM(o.outcome = 'PUSH'), 0), COALESCE(SUM(o.profit), 0)
+                    FROM opportunities o
+                    LEFT JOIN games g ON g.id = o.game_id
+                    GROUP BY 1, 2, 3
+                ''')
+                await db.execute('''
+                    INSERT INTO daily_activity
+                    (day, cycles, failed_cycles, games_analyzed, opportunities_found, opportunities_sent)
+                    SELECT date(execution_time), COUNT(*), SUM(status = 'ERROR'), SUM(games_analyzed),
+                           SUM(opportunities_found), SUM(opportunities_sent)
+                    FROM execution_logs
+                    GROUP BY 1
+                ''')
+            
+            # Tabela de snapshots de preços (apenas mudanças)
+            await db.execute('''
+                CREATE TABLE IF NOT EXISTS odds_snapshots (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    game_id TEXT NOT NULL,
+                    market TEXT NOT NULL,
+                    point REAL,
+                    side TEXT NOT NULL,
+                    bookmaker TEXT NOT NULL,
+                    bookmaker_id INTEGER,
+                    price REAL NOT NULL,
+                    captured_at REAL NOT NULL
+                )
+            ''')
+            # Migração: id canônico da casa
+            cursor = await db.execute('PRAGMA table_info(odds_snapshots)')
+            if 'bookmaker_id' not in [row[1] for row in await cursor.fetchall()]:
+                await db.execute('ALTER TABLE odds_snapshots ADD COLUMN bookmaker_id INTEGER')
+            await db.execute('''
+                CREATE INDEX IF NOT EXISTS idx_odds_snapshots_captured_at
+                ON odds_snapshots (captured_at)
+            ''')
+            await db.execute('''
+                CREATE INDEX IF NOT EXISTS idx_odds_snapshots_game
+                ON odds_snapshots (game_id, market, point, side, bookmaker, captured_at)
+            ''')
+            
+            # Tabela de resultados finais dos jogos
+            await db.execute('''
+                CREATE TABLE IF NOT EXISTS game_results (
+                    game_id TEXT PRIMARY KEY,
+                    home_score INTEGER NOT NULL,
+                    away_score INTEGER NOT NULL,
+                    completed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            
+            # Checkpoints do ciclo de análise (retomada após falhas)
+            await db.execute('''
+                CREATE TABLE IF NOT EXISTS cycle_checkpoints (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    started_at REAL NOT NULL,
+                    finished_at REAL,
+                    status TEXT NOT NULL DEFAULT 'RUNNING',
+                    worker_id TEXT NOT NULL DEFAULT ''
+                )
+            ''')
+            
+            # Migração: ciclos por worker (modo distribuído)
+            cursor = await db.execute('PRAGMA table_info(cycle_checkpoints)')
+            columns = [row[1] for row in await cursor.fetchall()]
+            if 'worker_id' not in columns:
+                await db.execute("ALTER TABLE cycle_checkpoints ADD COLUMN worker_id TEXT NOT NULL DEFAULT ''")
+            await db.execute('''
+                CREATE TABLE IF NOT EXISTS cycle_progress (
+                    cycle_id INTEGER NOT NULL,
+                    kind TEXT NOT NULL,
+                    item_key TEXT NOT NULL,
+                    data TEXT,
+                    recorded_at REAL NOT NULL,
+                    PRIMARY KEY (cycle_id, kind, item_key),
+                    FOREIGN KEY (cycle_id) REFERENCES cycle_checkpoints (id)
+                )
+            ''')
+            
+            # Marcas d'água das rotinas de manutenção (compactação do histórico, resumo diário)
+            # e contador da sequência de alterações
+            await db.execute('''
+                CREATE TABLE IF NOT EXISTS maintenance_state (
+                    key TEXT PRIMARY KEY,
+                    value REAL
+                )
+            ''')
+            await db.execute("INSERT OR IGNORE INTO maintenance_state (key, value) VALUES ('change_seq', 0)")
+            
+            # Cursores da sincronização com o Postgres do dashboard: (sequência, id) por tabela
+            await db.execute('''
+                CREATE TABLE IF NOT EXISTS sync_cursors (
+                    stream TEXT PRIMARY KEY,
+                    seq INTEGER NOT NULL DEFAULT 0,
+                    row_id INTEGER NOT NULL DEFAULT 0,
+                    synced_at REAL
+                )
+            ''')
+            
+            # Migração: cursor dos logs era (0, id); a posição passou a ser (id, 0)
+            await db.execute('''
+                UPDATE sync_cursors SET seq = row_id, row_id = 0 WHERE stream = 'activity_logs' AND seq = 0
+            ''')
+            
+            # Dias com linhas já sincronizadas cujo daily_analytics ainda não foi confirmado
+            await db.execute('''
+                CREATE TABLE IF NOT EXISTS sync_pending_days (
+                    day TEXT PRIMARY KEY
+                )
+            ''')
+            
+            # Estatísticas de melhor preço por liga/mercado/casa (estreitamento das requisições)
+            await db.execute('''
+                CREATE TABLE IF NOT EXISTS bookmaker_stats (
+                    league TEXT NOT NULL,
+                    market TEXT NOT NULL,
+                    bookmaker TEXT NOT NULL,
+                    best_count REAL NOT NULL,
+                    seen_count REAL NOT NULL,
+                    opportunity_count REAL NOT NULL,
+                    PRIMARY KEY (league, market, bookmaker)
+                )
+            ''')
+            await db.execute('''
+                CREATE TABLE IF NOT EXISTS request_sweeps (
+                    league TEXT PRIMARY KEY,
+                    swept_at REAL NOT NULL
+                )
+            ''')
+            
+            # Modo distribuído: workers vivos, leases de ligas/papéis e fila única de notificações
+            await db.execute('''
+                CREATE TABLE IF NOT EXISTS workers (
+                    worker_id TEXT PRIMARY KEY,
+                    heartbeat_at REAL NOT NULL
                 )
             ''')
+            await db.execute('''
+                CREATE TABLE IF NOT EXISTS leases (
+                    name TEXT PRIMARY KEY,
+                    worker_id TEXT,
+                    expires_at REAL NOT NULL DEFAULT 0,
+                    last_run_at REAL
+                )
+            ''')
+            await db.execute('''
+                CREATE TABLE IF NOT EXISTS notification_outbox (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    dedupe_key TEXT NOT NULL UNIQUE,
+                    kind TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    sent_at REAL,
+                    chat_id TEXT NOT NULL DEFAULT '',
+                    strategy TEXT,
+                    store INTEGER NOT NULL DEFAULT 0
+                )
+            ''')
+            
+            # Migração: destino e estratégia das notificações
+            cursor = await db.execute('PRAGMA table_info(notification_outbox)')
+            columns = [row[1] for row in await cursor.fetchall()]
+            for column, definition in (('chat_id', "TEXT NOT NULL DEFAULT ''"), ('strategy', 'TEXT'),
+                                       ('store', 'INTEGER NOT NULL DEFAULT 0')):
+                if column not in columns:
+                    await db.execute(f'ALTER TABLE notification_outbox ADD COLUMN {column} {definition}')
+            await db.execute('''
+                CREATE INDEX IF NOT EXISTS idx_notification_outbox_pending
+                ON notification_outbox (sent_at, id)
+            ''')
             
             await db.commit()
             logger.info("Banco de dados inicializado")
     
     async def store_games_data(self, games: List[Dict[str, Any]]):
         """Armazena dados dos jogos"""
+        with metrics.timer('db_write_seconds', operation='store_games_data'):
+            async with aiosqlite.connect(self.db_path) as db:
+                for game in games:
+                    await db.execute('''
+                        INSERT OR REPLACE INTO games 
+                        (id, home_team, away_team, league, commence_time, commence_ts,
+                         home_id, away_id, league_id, data_json)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ''', (
+                        game['id'],
+                        game['home_team'],
+                        game['away_team'],
+                        game.get('sport', 'Unknown'),
+                        game['commence_time'],
+                        kickoff_timestamp(game),
+                        game.get('home_id'),
+                        game.get('away_id'),
+                        game.get('league_id'),
+                        json.dumps(game)
+                    ))
+            
+                await db.commit()
+                logger.info(f"Armazenados {len(games)} jogos no banco de dados")
+    
+    async def get_games_by_kickoff(self, start_ts: int, end_ts: int) -> List[Dict]:
+        """Busca jogos com início (epoch UTC) no intervalo [start_ts, end_ts), em ordem de início"""
         async with aiosqlite.connect(self.db_path) as db:
-            for game in games:
-                await db.execute('''
-                    INSERT OR REPLACE INTO games 
-                    (id, home_team, away_team, league, commence_time, data_json)
+            cursor = await db.execute('''
+                SELECT id, home_team, away_team, league, commence_time, commence_ts
+                FROM games
+                WHERE commence_ts >= ? AND commence_ts < ?
+                ORDER BY commence_ts
+            ''', (start_ts, end_ts))
+            
+            rows = await cursor.fetchall()
+            columns = [description[0] for description in cursor.description]
+            
+            return [dict(zip(columns, row)) for row in rows]
+    
+    async def load_registry(self, registry):
+        """Carrega entidades e aliases persistidos em um NameRegistry"""
+        async with aiosqlite.connect(self.db_path) as db:
+            cursor = await db.execute('SELECT id, kind, name FROM entities')
+            entities = await cursor.fetchall()
+            cursor = await db.execute('SELECT kind, alias, entity_id FROM entity_aliases')
+            aliases = await cursor.fetchall()
+        
+        registry.load(entities, aliases)
+        logger.info(f"Registro canônico carregado: {len(entities)} entidades, {len(aliases)} aliases")
+    
+    async def allocate_entities(self, names: List[Tuple[str, str]]) -> List[Tuple[int, str]]:
+        """Ids (id, nome canônico) dos nomes (tipo, nome), criando as entidades que faltam
+        
+        Tudo em uma transação IMMEDIATE e pela chave normalizada: workers que
+        compartilham o banco recebem o mesmo id para o mesmo nome e nunca o
+        mesmo id para nomes diferentes.
+        """
+        if not names:
+            return []
+        
+        allocated = []
+        with metrics.timer('db_write_seconds', operation='allocate_entities'):
+            async with aiosqlite.connect(self.db_path, timeout=30.0) as db:
+                await db.execute('BEGIN IMMEDIATE')
+                for kind, name in names:
+                    key = normalize_name(name)
+                    cursor = await db.execute('''
+                        SELECT e.id, e.name FROM entity_aliases a JOIN entities e ON e.id = a.entity_id
+                        WHERE a.kind = ? AND a.alias = ?
+                    ''', (kind, key))
+                    row = await cursor.fetchone()
+                    if row is None:
+                        await db.execute('''
+                            INSERT INTO entities (kind, name) VALUES (?, ?) ON CONFLICT (kind, name) DO NOTHING
+                        ''', (kind, name))
+                        cursor = await db.execute('SELECT id, name FROM entities WHERE kind = ? AND name = ?', (kind, name))
+                        row = await cursor.fetchone()
+                        await db.execute('''
+                            INSERT INTO entity_aliases (kind, alias, entity_id) VALUES (?, ?, ?)
+                            ON CONFLICT (kind, alias) DO UPDATE SET entity_id = excluded.entity_id
+                        ''', (kind, key, row[0]))
+                    allocated.append((row[0], row[1]))
+                await db.commit()
+        return allocated
+    
+    async def store_registry(self, registry):
+        """Persiste as entidades e aliases novos do NameRegistry
+        
+        Entidades criadas localmente (resolve) recebem o id alocado no banco, que
+        substitui o local no registro e nos aliases pendentes.
+        """
+        entities, aliases = registry.take_pending()
+        if not entities and not aliases:
+            return
+        
+        if entities:
+            names = [(kind, name) for _, kind, name in entities]
+            allocated = await self.allocate_entities(names)
+            remap = {local: entity_id for (local, _, _), (entity_id, _) in zip(entities, allocated)}
+            registry.merge(names, allocated)
+            aliases = [(kind, alias, remap.get(entity_id, entity_id)) for kind, alias, entity_id in aliases]
+        
+        with metrics.timer('db_write_seconds', operation='store_registry'):
+            async with aiosqlite.connect(self.db_path) as db:
+                await db.executemany('''
+                    INSERT OR REPLACE INTO entity_aliases (kind, alias, entity_id) VALUES (?, ?, ?)
+                ''', aliases)
+            
+                await db.commit()
+                logger.info(f"Registro canônico: {len(entities)} entidades e {len(aliases)} aliases novos")
+    
+    async def load_request_stats(self, planner):
+        """Carrega no RequestPlanner as estatísticas de casas e as últimas varreduras completas"""
+        async with aiosqlite.connect(self.db_path) as db:
+            cursor = await db.execute('''
+                SELECT league, market, bookmaker, best_count, seen_count, opportunity_count
+                FROM bookmaker_stats
+            ''')
+            stats = await cursor.fetchall()
+            cursor = await db.execute('SELECT league, swept_at FROM request_sweeps')
+            sweeps = await cursor.fetchall()
+        
+        planner.load(stats, sweeps)
+    
+    async def store_request_stats(self, planner):
+        """Persiste as estatísticas das ligas alteradas no RequestPlanner"""
+        stats, sweeps = planner.take_pending()
+        if not stats and not sweeps:
+            return
+        
+        with metrics.timer('db_write_seconds', operation='store_request_stats'):
+            async with aiosqlite.connect(self.db_path) as db:
+                await db.executemany('''
+                    INSERT OR REPLACE INTO bookmaker_stats
+                    (league, market, bookmaker, best_count, seen_count, opportunity_count)
                     VALUES (?, ?, ?, ?, ?, ?)
-                ''', (
-                    game['id'],
-                    game['home_team'],
-                    game['away_team'],
-                    game.get('sport', 'Unknown'),
-                    game['commence_time'],
-                    json.dumps(game)
-                ))
+                ''', stats)
+                await db.executemany('''
+                    INSERT OR REPLACE INTO request_sweeps (league, swept_at) VALUES (?, ?)
+                ''', sweeps)
+                await db.commit()
+    
+    async def store_odds_snapshots(self, rows: List[tuple]):
+        """Armazena preços alterados (game_id, market, point, side, bookmaker, price, captured_at)"""
+        if not rows:
+            return
+        
+        keys = _bookmaker_keys(row[4] for row in rows)
+        with metrics.timer('db_write_seconds', operation='store_odds_snapshots'):
+            async with aiosqlite.connect(self.db_path) as db:
+                await db.executemany(f'''
+                    INSERT INTO odds_snapshots 
+                    (game_id, market, point, side, bookmaker, bookmaker_id, price, captured_at)
+                    VALUES (?, ?, ?, ?, ?, {BOOKMAKER_ID_SQL}, ?, ?)
+                ''', [(*row[:5], keys[row[4]], *row[5:]) for row in rows])
             
-            await db.commit()
-            logger.info(f"Armazenados {len(games)} jogos no banco de dados")
+                await db.commit()
+                logger.info(f"Armazenados {len(rows)} snapshots de odds")
     
-    async def store_opportunity(self, opportunity) -> int:
-        """Armazena oportunidade enviada"""
+    async def get_odds_snapshots(self, since: float) -> List[tuple]:
+        """Busca snapshots de preços a partir de um horário (epoch), em ordem cronológica"""
         async with aiosqlite.connect(self.db_path) as db:
             cursor = await db.execute('''
-                INSERT INTO opportunities 
-                (game_id, market, selection, odds, bookmaker, value_detected, confidence)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                opportunity.game_id,
-                opportunity.market,
-                opportunity.selection,
-                opportunity.best_odds,
-                opportunity.bookmaker,
-                opportunity.value,
-                opportunity.confidence
-            ))
+                SELECT game_id, market, point, side, bookmaker, price, captured_at
+                FROM odds_snapshots
+                WHERE captured_at >= ?
+                ORDER BY captured_at
+            ''', (since,))
             
+            return await cursor.fetchall()
+    
+    async def _next_change_seq(self, db) -> int:
+        """Próximo valor da sequência de alterações
+        
+        Tomado dentro da transação de escrita: como o SQLite serializa os escritores,
+        a ordem da sequência é a ordem de commit e o cursor da sincronização não pula linhas.
+        """
+        cursor = await db.execute('''
+            UPDATE maintenance_state SET value = value + 1 WHERE key = 'change_seq' RETURNING value
+        ''')
+        return int((await cursor.fetchone())[0])
+    
+    async def _insert_opportunity(self, db, opportunity, strategy: Optional[str] = None) -> int:
+        change_seq = await self._next_change_seq(db)
+        league_id, home_id, away_id = (opportunity.event_key or (None, None, None))[:3]
+        cursor = await db.execute(f'''
+            INSERT INTO opportunities 
+            (game_id, market, selection, odds, bookmaker, value_detected, confidence, strategy,
+             market_key, side, point, change_seq, league_id, home_id, away_id, bookmaker_id)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, {BOOKMAKER_ID_SQL})
+        ''', (
+            opportunity.game_id,
+            opportunity.market,
+            opportunity.selection,
+            opportunity.best_odds,
+            opportunity.bookmaker,
+            opportunity.value,
+            opportunity.confidence,
+            strategy,
+            opportunity.market_key or None,
+            opportunity.side or None,
+            opportunity.point,
+            change_seq,
+            league_id,
+            home_id,
+            away_id,
+            normalize_name(opportunity.bookmaker)
+        ))
+        # Agregado do dia de envio (mesma transação da oportunidade)
+        await db.execute('''
+            INSERT INTO daily_stats (day, league, market, opportunities, value_sum, confidence_sum)
+            SELECT date(sent_at), ?, COALESCE(market_key, market), 1, value_detected, confidence
+            FROM opportunities WHERE id = ?
+            ON CONFLICT (day, league, market) DO UPDATE SET
+                opportunities = opportunities + 1,
+                value_sum = value_sum + excluded.value_sum,
+                confidence_sum = confidence_sum + excluded.confidence_sum
+        ''', (opportunity.league or '', cursor.lastrowid))
+        return cursor.lastrowid
+    
+    async def store_opportunity(self, opportunity, strategy: Optional[str] = None) -> int:
+        """Armazena oportunidade enviada"""
+        with metrics.timer('db_write_seconds', operation='store_opportunity'):
+            async with aiosqlite.connect(self.db_path) as db:
+                opportunity_id = await self._insert_opportunity(db, opportunity, strategy)
+                await db.commit()
+                return opportunity_id
+    
+    async def get_open_cycle(self, worker_id: str = '') -> Optional[tuple]:
+        """Ciclo interrompido mais recente do worker (id, started_at), se houver"""
+        async with aiosqlite.connect(self.db_path) as db:
+            cursor = await db.execute('''
+                SELECT id, started_at FROM cycle_checkpoints
+                WHERE status = 'RUNNING' AND worker_id = ?
+                ORDER BY id DESC LIMIT 1
+            ''', (worker_id,))
+            return await cursor.fetchone()
+    
+    async def get_last_finished_cycle(self, worker_id: str = '') -> Optional[tuple]:
+        """Último ciclo concluído do worker (id, finished_at, status), se houver"""
+        async with aiosqlite.connect(self.db_path) as db:
+            cursor = await db.execute('''
+                SELECT id, finished_at, status FROM cycle_checkpoints
+                WHERE status != 'RUNNING' AND status != 'ABANDONED' AND worker_id = ?
+                ORDER BY id DESC LIMIT 1
+            ''', (worker_id,))
+            return await cursor.fetchone()
+    
+    async def create_cycle(self, started_at: float, worker_id: str = '') -> int:
+        """Abre um novo ciclo; ciclos abertos anteriores do worker são abandonados (com o progresso)"""
+        async with aiosqlite.connect(self.db_path) as db:
+            cursor = await db.execute('''
+                UPDATE cycle_checkpoints SET status = 'ABANDONED', finished_at = ?
+                WHERE status = 'RUNNING' AND worker_id = ?
+                RETURNING id
+            ''', (started_at, worker_id))
+            abandoned = await cursor.fetchall()
+            await db.executemany('DELETE FROM cycle_progress WHERE cycle_id = ?', abandoned)
+            cursor = await db.execute(
+                'INSERT INTO cycle_checkpoints (started_at, worker_id) VALUES (?, ?)', (started_at, worker_id)
+            )
             await db.commit()
             return cursor.lastrowid
     
-    async def log_execution(self, games_analyzed: int, opportunities_found: int, 
-                          opportunities_sent: int, status: str = 'SUCCESS'):
-        """Registra log de execução"""
+    async def get_cycle_progress(self, cycle_id: int) -> List[tuple]:
+        """Progresso gravado de um ciclo: (kind, item_key, data)"""
+        async with aiosqlite.connect(self.db_path) as db:
+            cursor = await db.execute('''
+                SELECT kind, item_key, data FROM cycle_progress
+                WHERE cycle_id = ?
+                ORDER BY recorded_at
+            ''', (cycle_id,))
+            return await cursor.fetchall()
+    
+    async def record_cycle_progress(self, cycle_id: int, kind: str, item_key: str, data: Optional[str] = None):
+        """Grava um passo concluído do ciclo"""
+        with metrics.timer('db_write_seconds', operation='record_cycle_progress'):
+            async with aiosqlite.connect(self.db_path) as db:
+                await db.execute('''
+                    INSERT OR REPLACE INTO cycle_progress (cycle_id, kind, item_key, data, recorded_at)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', (cycle_id, kind, item_key, data, time.time()))
+                await db.commit()
+    
+    async def record_sent_message(self, cycle_id: int, item_key: str, opportunity=None,
+                                  strategy: Optional[str] = None):
+        """Marca uma mensagem como enviada e, opcionalmente, armazena a oportunidade (uma transação)"""
+        with metrics.timer('db_write_seconds', operation='record_sent_message'):
+            async with aiosqlite.connect(self.db_path) as db:
+                if opportunity is not None:
+                    await self._insert_opportunity(db, opportunity, strategy)
+                await db.execute('''
+                    INSERT OR REPLACE INTO cycle_progress (cycle_id, kind, item_key, data, recorded_at)
+                    VALUES (?, 'message', ?, NULL, ?)
+                ''', (cycle_id, item_key, time.time()))
+                await db.commit()
+    
+    async def finish_cycle(self, cycle_id: int, status: str):
+        """Fecha o ciclo e descarta o progresso intermediário"""
+        async with aiosqlite.connect(self.db_path) as db:
+            await db.execute('''
+                UPDATE cycle_checkpoints SET status = ?, finished_at = ? WHERE id = ?
+            ''', (status, time.time(), cycle_id))
+            await db.execute('DELETE FROM cycle_progress WHERE cycle_id = ?', (cycle_id,))
+            await db.commit()
+    
+    async def acquire_leases(self, worker_id: str, names: List[str], now: float,
+                             ttl: float, limit: Optional[int] = None) -> List[str]:
+        """Renova e toma leases até a cota do worker; devolve os nomes que ele detém
+        
+        A cota padrão é a divisão das ligas entre os workers vivos; leases acima
+        da cota são liberados (com last_run_at preservado) para rebalancear
+        quando um worker novo entra. Tudo em uma transação IMMEDIATE, para que
+        dois workers não tomem o mesmo lease.
+        """
+        if not names:
+            return []
+        
+        with metrics.timer('db_write_seconds', operation='acquire_leases'):
+            async with aiosqlite.connect(self.db_path, timeout=30.0) as db:
+                await db.execute('BEGIN IMMEDIATE')
+                await db.execute('''
+                    INSERT OR REPLACE INTO workers (worker_id, heartbeat_at) VALUES (?, ?)
+                ''', (worker_id, now))
+                await db.execute('DELETE FROM workers WHERE heartbeat_at < ?', (now - 10 * ttl,))
+                
+                if limit is None:
+                    cursor = await db.execute(
+                        'SELECT COUNT(*) FROM workers WHERE heartbeat_at > ?', (now - ttl,)
+                    )
+                    live_workers = (await cursor.fetchone())[0]
+                    limit = math.ceil(len(names) / max(live_workers, 1))
+                
+                placeholders = ','.join('?' * len(names))
+                cursor = await db.execute(f'''
+                    SELECT name, worker_id, expires_at FROM leases WHERE name IN ({placeholders})
+                ''', names)
+                current = {name: (owner, expires_at) for name, owner, expires_at in await cursor.fetchall()}
+                
+                owned = [name for name in names if current.get(name, (None, 0))[0] == worker_id]
+                surplus = owned[limit:]
+                owned = owned[:limit]
+                # Livres: sem linha, liberados ou com lease vencido (worker morto)
+                free = [
+                    name for name in names
+                    if name not in current or current[name][0] is None or
+                    (current[name][0] != worker_id and current[name][1] <= now)
+                ]
+                owned.extend(free[:max(limit - len(owned), 0)])
+                
+                await db.executemany('''
+                    UPDATE leases SET worker_id = NULL, expires_at = 0 WHERE name = ? AND worker_id = ?
+                ''', [(name, worker_id) for name in surplus])
+                await db.executemany('''
+                    INSERT INTO leases (name, worker_id, expires_at) VALUES (?, ?, ?)
+                    ON CONFLICT (name) DO UPDATE SET
+                        worker_id = excluded.worker_id, expires_at = excluded.expires_at
+                ''', [(name, worker_id, now + ttl) for name in owned])
+                await db.commit()
+        
+        return owned
+    
+    async def renew_leases(self, worker_id: str, now: float, ttl: float) -> List[str]:
+        """Heartbeat: estende os leases ainda detidos pelo worker e devolve seus nomes"""
+        async with aiosqlite.connect(self.db_path, timeout=30.0) as db:
+            await db.execute('''
+                INSERT OR REPLACE INTO workers (worker_id, heartbeat_at) VALUES (?, ?)
+            ''', (worker_id, now))
+            await db.execute('''
+                UPDATE leases SET expires_at = ? WHERE worker_id = ?
+            ''', (now + ttl, worker_id))
+            cursor = await db.execute('SELECT name FROM leases WHERE worker_id = ?', (worker_id,))
+            names = [row[0] for row in await cursor.fetchall()]
+            await db.commit()
+            return names
+    
+    async def release_leases(self, worker_id: str):
+        """Libera imediatamente os leases do worker (encerramento limpo)"""
+        async with aiosqlite.connect(self.db_path, timeout=30.0) as db:
+            await db.execute('''
+                UPDATE leases SET worker_id = NULL, expires_at = 0 WHERE worker_id = ?
+            ''', (worker_id,))
+            await db.execute('DELETE FROM workers WHERE worker_id = ?', (worker_id,))
+            await db.commit()
+    
+    async def get_lease_runs(self, names: List[str]) -> Dict[str, Optional[float]]:
+        """Horário da última execução (epoch) de cada lease"""
+        if not names:
+            return {}
+        async with aiosqlite.connect(self.db_path) as db:
+            placeholders = ','.join('?' * len(names))
+            cursor = await db.execute(f'''
+                SELECT name, last_run_at FROM leases WHERE name IN ({placeholders})
+            ''', names)
+            runs = dict(await cursor.fetchall())
+        return {name: runs.get(name) for name in names}
+    
+    async def mark_leases_run(self, worker_id: str, names: List[str], ran_at: float):
+        """Registra a execução das ligas (o próximo dono respeita o intervalo)"""
+        async with aiosqlite.connect(self.db_path, timeout=30.0) as db:
+            await db.executemany('''
+                UPDATE leases SET last_run_at = ? WHERE name = ? AND worker_id = ?
+            ''', [(ran_at, name, worker_id) for name in names])
+            await db.commit()
+    
+    async def enqueue_notifications(self, rows: List[tuple]) -> int:
+        """Enfileira notificações (dedupe_key, kind, payload, chat_id, strategy, store)
+
+        Chaves repetidas são ignoradas.
+        """
+        if not rows:
+            return 0
+        
+        with metrics.timer('db_write_seconds', operation='enqueue_notifications'):
+            async with aiosqlite.connect(self.db_path, timeout=30.0) as db:
+                before = db.total_changes
+                now = time.time()
+                await db.executemany('''
+                    INSERT OR IGNORE INTO notification_outbox
+                    (dedupe_key, kind, payload, chat_id, strategy, store, created_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', [row + (now,) for row in rows])
+                await db.commit()
+                return db.total_changes - before
+    
+    async def get_pending_notifications(self, max_attempts: int, limit: int = 100) -> List[tuple]:
+        """Notificações ainda não enviadas (id, kind, payload, chat_id, strategy, store), em ordem de chegada"""
         async with aiosqlite.connect(self.db_path) as db:
+            cursor = await db.execute('''
+                SELECT id, kind, payload, chat_id, strategy, store FROM notification_outbox
+                WHERE sent_at IS NULL AND attempts < ?
+                ORDER BY id LIMIT ?
+            ''', (max_attempts, limit))
+            return await cursor.fetchall()
+    
+    async def mark_notification_sent(self, notification_id: int, opportunity=None,
+                                     strategy: Optional[str] = None):
+        """Marca a notificação como enviada e, opcionalmente, armazena a oportunidade (uma transação)"""
+        with metrics.timer('db_write_seconds', operation='mark_notification_sent'):
+            async with aiosqlite.connect(self.db_path, timeout=30.0) as db:
+                if opportunity is not None:
+                    await self._insert_opportunity(db, opportunity, strategy)
+                await db.execute('''
+                    UPDATE notification_outbox SET sent_at = ?, attempts = attempts + 1 WHERE id = ?
+                ''', (time.time(), notification_id))
+                await db.commit()
+    
+    async def mark_notification_failed(self, notification_id: int):
+        async with aiosqlite.connect(self.db_path, timeout=30.0) as db:
             await db.execute('''
-                INSERT INTO execution_logs 
-                (games_analyzed, opportunities_found, opportunities_sent, status)
-                VALUES (?, ?, ?, ?)
-            ''', (games_analyzed, opportunities_found, opportunities_sent, status))
+                UPDATE notification_outbox SET attempts = attempts + 1 WHERE id = ?
+            ''', (notification_id,))
+            await db.commit()
+    
+    async def get_unsettled_leagues(self, started_after: float, started_before: float) -> List[str]:
+        """Ligas com oportunidades pendentes de jogos iniciados no intervalo e ainda sem resultado"""
+        async with aiosqlite.connect(self.db_path) as db:
+            cursor = await db.execute('''
+                SELECT DISTINCT g.league
+                FROM opportunities o
+                JOIN games g ON g.id = o.game_id
+                LEFT JOIN game_results r ON r.game_id = o.game_id
+                WHERE o.settled_at IS NULL AND o.market_key IS NOT NULL
+                  AND r.game_id IS NULL
+                  AND g.commence_ts BETWEEN ? AND ?
+            ''', (started_after, started_before))
+            return [row[0] for row in await cursor.fetchall()]
+    
+    async def store_game_results(self, rows: List[tuple]) -> int:
+        """Grava placares finais (id, liga, mandante, visitante, início, gols mandante, gols visitante)
+
+        O jogo é encontrado pelo id da fonte ou pela identidade canônica do evento
+        (fontes com ids próprios). Retorna quantos jogos do banco receberam resultado.
+        """
+        if not rows:
+            return 0
+        
+        with metrics.timer('db_write_seconds', operation='store_game_results'):
+            async with aiosqlite.connect(self.db_path, timeout=30.0) as db:
+                await db.execute('''
+                    CREATE TEMP TABLE scores (
+                        game_id TEXT, league_id INTEGER, home_id INTEGER, away_id INTEGER,
+                        commence_ts INTEGER, home_score INTEGER, away_score INTEGER
+                    )
+                ''')
+                await db.executemany('INSERT INTO temp.scores VALUES (?, ?, ?, ?, ?, ?, ?)', rows)
+                cursor = await db.execute('''
+                    INSERT OR REPLACE INTO game_results (game_id, home_score, away_score)
+                    SELECT g.id, s.home_score, s.away_score
+                    FROM temp.scores s JOIN games g ON g.id = s.game_id
+                    UNION
+                    SELECT g.id, s.home_score, s.away_score
+                    FROM temp.scores s JOIN games g
+                      ON g.commence_ts = s.commence_ts AND g.league_id = s.league_id
+                     AND g.home_id = s.home_id AND g.away_id = s.away_id
+                ''')
+                await db.commit()
+                return cursor.rowcount
+    
+    async def settle_opportunities(self, settled_at: float) -> Dict[str, Any]:
+        """Liquida as oportunidades pendentes que já têm resultado (uma passada por mercado)
+
+        O P&L acumulado (pnl_totals) é atualizado na mesma transação somando apenas
+        as oportunidades liquidadas agora, identificadas por `settled_at`.
+        """
+        with metrics.timer('db_write_seconds', operation='settle_opportunities'):
+            async with aiosqlite.connect(self.db_path, timeout=30.0) as db:
+                settled = {}
+                for market, statement in SETTLE_MARKET_SQL.items():
+                    # rowcount não é informado para comandos iniciados por WITH
+                    before = db.total_changes
+                    await db.execute(statement, (market, settled_at))
+                    settled[market] = db.total_changes - before
+                
+                if any(settled.values()):
+                    await db.execute('''
+                        UPDATE opportunities SET change_seq = ? WHERE settled_at = ?
+                    ''', (await self._next_change_seq(db), settled_at))
+                
+                await db.execute('''
+                    INSERT INTO pnl_totals
+                    (strategy, league, market_key, bets, wins, pushes, staked, profit, updated_at)
+                    SELECT COALESCE(o.strategy, ''), COALESCE(g.league, ''), o.market_key, COUNT(*),
+                           SUM(CASE o.outcome WHEN 'WIN' THEN 1 WHEN 'HALF_WIN' THEN 0.5 ELSE 0 END),
+                           SUM(o.outcome = 'PUSH'), COUNT(*), SUM(o.profit), ?
+                    FROM opportunities o
+                    LEFT JOIN games g ON g.id = o.game_id
+                    WHERE o.settled_at = ?
+                    GROUP BY 1, 2, 3
+                    ON CONFLICT (strategy, league, market_key) DO UPDATE SET
+                        bets = bets + excluded.bets,
+                        wins = wins + excluded.wins,
+                        pushes = pushes + excluded.pushes,
+                        staked = staked + excluded.staked,
+                        profit = profit + excluded.profit,
+                        updated_at = excluded.updated_at
+                ''', (settled_at, settled_at))
+                # Resultados contam no dia de envio da oportunidade
+                await db.execute('''
+                    INSERT INTO daily_stats (day, league, market, settled, wins, pushes, profit)
+                    SELECT date(o.sent_at), COALESCE(g.league, ''), o.market_key, COUNT(*),
+                           SUM(CASE o.outcome WHEN 'WIN' THEN 1 WHEN 'HALF_WIN' THEN 0.5 ELSE 0 END),
+                           SUM(o.outcome = 'PUSH'), SUM(o.profit)
+                    FROM opportunities o
+                    LEFT JOIN games g ON g.id = o.game_id
+                    WHERE o.settled_at = ?
+                    GROUP BY 1, 2, 3
+                    ON CONFLICT (day, league, market) DO UPDATE SET
+                        settled = settled + excluded.settled,
+                        wins = wins + excluded.wins,
+                        pushes = pushes + excluded.pushes,
+                        profit = profit + excluded.profit
+                ''', (settled_at,))
+                
+                cursor = await db.execute('''
+                    SELECT COALESCE(SUM(profit), 0) FROM opportunities WHERE settled_at = ?
+                ''', (settled_at,))
+                profit = (await cursor.fetchone())[0]
+                await db.commit()
+                return {'settled': settled, 'profit': profit}
+    
+    async def get_pnl_totals(self) -> List[Dict]:
+        """P&L acumulado por estratégia, liga e mercado"""
+        async with aiosqlite.connect(self.db_path) as db:
+            cursor = await db.execute('''
+                SELECT strategy, league, market_key, bets, wins, pushes, staked, profit
+                FROM pnl_totals ORDER BY strategy, league, market_key
+            ''')
+            rows = await cursor.fetchall()
+            columns = [description[0] for description in cursor.description]
+            return [dict(zip(columns, row)) for row in rows]
+    
+    async def log_execution(self, games_analyzed: int, opportunities_found: int, 
+                          opportunities_sent: int, status: str = 'SUCCESS',
+                          stage_durations: Optional[Dict[str, float]] = None):
+        """Registra log de execução (com a duração de cada etapa, em segundos)"""
+        with metrics.timer('db_write_seconds', operation='log_execution'):
+            async with aiosqlite.connect(self.db_path) as db:
+                cursor = await db.execute('''
+                    INSERT INTO execution_logs 
+                    (games_analyzed, opportunities_found, opportunities_sent, status, stage_durations)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', (
+                    games_analyzed,
+                    opportunities_found,
+                    opportunities_sent,
+                    status,
+                    json.dumps(stage_durations) if stage_durations is not None else None
+                ))
+                await db.execute('''
+                    INSERT INTO daily_activity
+                    (day, cycles, failed_cycles, games_analyzed, opportunities_found, opportunities_sent)
+                    SELECT date(execution_time), 1, status = 'ERROR', games_analyzed,
+                           opportunities_found, opportunities_sent
+                    FROM execution_logs WHERE id = ?
+                    ON CONFLICT (day) DO UPDATE SET
+                        cycles = cycles + 1,
+                        failed_cycles = failed_cycles + excluded.failed_cycles,
+                        games_analyzed = games_analyzed + excluded.games_analyzed,
+                        opportunities_found = opportunities_found + excluded.opportunities_found,
+                        opportunities_sent = opportunities_sent + excluded.opportunities_sent
+                ''', (cursor.lastrowid,))
+            
+                await db.commit()
+    
+    async def get_daily_summary(self, day: str) -> Dict[str, Any]:
+        """Resumo de um dia UTC ('AAAA-MM-DD') lido dos agregados: ciclos, envios e resultados por liga e mercado"""
+        async with aiosqlite.connect(self.db_path) as db:
+            cursor = await db.execute('''
+                SELECT cycles, failed_cycles, games_analyzed, opportunities_found, opportunities_sent
+                FROM daily_activity WHERE day = ?
+            ''', (day,))
+            row = await cursor.fetchone() or (0, 0, 0, 0, 0)
+            summary: Dict[str, Any] = dict(zip(
+                ('cycles', 'failed_cycles', 'games_analyzed', 'opportunities_found', 'opportunities_sent'), row
+            ))
+            summary['day'] = day
             
+            cursor = await db.execute('''
+                SELECT league, market, opportunities, value_sum, settled, wins, pushes, profit
+                FROM daily_stats WHERE day = ?
+                ORDER BY league, market
+            ''', (day,))
+            rows = await cursor.fetchall()
+            columns = [description[0] for description in cursor.description]
+            summary['breakdown'] = [dict(zip(columns, row)) for row in rows]
+            for key in ('opportunities', 'settled', 'wins', 'pushes', 'profit'):
+                summary[key] = sum(item[key] for item in summary['breakdown'])
+            return summary
+    
+    async def get_daily_analytics(self, days: int = 7, dates: Optional[List[str]] = None) -> List[Dict]:
+        """Últimos dias (ou os dias em `dates`) no formato da tabela daily_analytics do dashboard
+
+        success_rate é a taxa de acerto das apostas liquidadas (meia vitória conta
+        metade, devoluções ficam fora) e total_value o lucro em unidades.
+        """
+        if dates:
+            condition = f"day IN ({', '.join('?' * len(dates))})"
+            params = list(dates)
+        else:
+            condition = "day >= date('now', ?)"
+            params = [f'-{days - 1} days']
+        
+        async with aiosqlite.connect(self.db_path) as db:
+            cursor = await db.execute(f'''
+                SELECT a.day AS date, a.games_analyzed, a.opportunities_found,
+                       ROUND(COALESCE(100.0 * s.wins / NULLIF(s.settled - s.pushes, 0), 0), 2) AS success_rate,
+                       ROUND(COALESCE(s.profit, 0), 2) AS total_value
+                FROM daily_activity a
+                LEFT JOIN (
+                    SELECT day, SUM(settled) AS settled, SUM(wins) AS wins,
+                           SUM(pushes) AS pushes, SUM(profit) AS profit
+                    FROM daily_stats WHERE {condition}
+                    GROUP BY day
+                ) s ON s.day = a.day
+                WHERE a.{condition}
+                ORDER BY a.day DESC
+            ''', params * 2)
+            rows = await cursor.fetchall()
+            columns = [description[0] for description in cursor.description]
+            return [dict(zip(columns, row)) for row in rows]
+    
+    async def get_sync_cursor(self, stream: str) -> Tuple[int, int]:
+        """Posição (sequência, id) da última linha sincronizada de um stream"""
+        async with aiosqlite.connect(self.db_path) as db:
+            cursor = await db.execute('SELECT seq, row_id FROM sync_cursors WHERE stream = ?', (stream,))
+            row = await cursor.fetchone()
+            return (row[0], row[1]) if row else (0, 0)
+    
+    async def set_sync_cursor(self, stream: str, seq: int, row_id: int, days: Iterable[str] = ()):
+        """Avança o cursor e marca os dias tocados pelo lote na mesma transação"""
+        async with aiosqlite.connect(self.db_path, timeout=30.0) as db:
+            await db.execute('''
+                INSERT OR REPLACE INTO sync_cursors (stream, seq, row_id, synced_at) VALUES (?, ?, ?, ?)
+            ''', (stream, seq, row_id, time.time()))
+            await db.executemany('''
+                INSERT OR IGNORE INTO sync_pending_days (day) VALUES (?)
+            ''', [(day,) for day in set(days)])
+            await db.commit()
+    
+    async def get_pending_sync_days(self) -> List[str]:
+        """Dias cujo daily_analytics ainda precisa ser enviado ao dashboard"""
+        async with aiosqlite.connect(self.db_path) as db:
+            cursor = await db.execute('SELECT day FROM sync_pending_days ORDER BY day')
+            return [day for (day,) in await cursor.fetchall()]
+    
+    async def clear_pending_sync_days(self, days: List[str]):
+        async with aiosqlite.connect(self.db_path, timeout=30.0) as db:
+            await db.executemany('DELETE FROM sync_pending_days WHERE day = ?', [(day,) for day in days])
+            await db.commit()
+    
+    async def _opportunity_changes(self, condition: str, params: tuple, descending: bool, limit: int) -> List[Dict]:
+        direction = 'DESC' if descending else 'ASC'
+        async with aiosqlite.connect(self.db_path) as db:
+            cursor = await db.execute(f'''
+                SELECT o.change_seq, o.id, o.game_id, g.home_team, g.away_team,
+                       COALESCE(g.league, '') AS league, g.commence_time, o.market, o.selection,
+                       o.odds, o.value_detected, o.confidence, o.bookmaker, o.outcome, o.sent_at
+                FROM opportunities o
+                LEFT JOIN games g ON g.id = o.game_id
+                WHERE {condition}
+                ORDER BY o.change_seq {direction}, o.id {direction}
+                LIMIT ?
+            ''', (*params, limit))
+            rows = await cursor.fetchall()
+            columns = [description[0] for description in cursor.description]
+            return [dict(zip(columns, row)) for row in rows]
+    
+    async def get_opportunity_changes(self, after: Tuple[int, int], limit: int) -> List[Dict]:
+        """Oportunidades inseridas ou liquidadas depois da posição (sequência, id), em ordem"""
+        return await self._opportunity_changes('(o.change_seq, o.id) > (?, ?)', after, False, limit)
+    
+    async def get_recent_opportunity_changes(self, limit: int) -> List[Dict]:
+        """Últimas `limit` alterações de oportunidades, em ordem"""
+        changes = await self._opportunity_changes('o.change_seq IS NOT NULL', (), True, limit)
+        return changes[::-1]
+    
+    async def get_execution_logs_after(self, after: Tuple[int, int], limit: int) -> List[Dict]:
+        """Logs de execução depois da posição (id, 0), em ordem
+
+        Logs só são inseridos: o id é a sequência e não há desempate.
+        """
+        async with aiosqlite.connect(self.db_path) as db:
+            cursor = await db.execute('''
+                SELECT id, execution_time, games_analyzed, opportunities_found, opportunities_sent,
+                       status, stage_durations
+                FROM execution_logs
+                WHERE (id, 0) > (?, ?)
+                ORDER BY id
+                LIMIT ?
+            ''', (*after, limit))
+            rows = await cursor.fetchall()
+            columns = [description[0] for description in cursor.description]
+            return [dict(zip(columns, row)) for row in rows]
+    
+    async def get_maintenance_value(self, key: str) -> Optional[float]:
+        async with aiosqlite.connect(self.db_path) as db:
+            cursor = await db.execute('SELECT value FROM maintenance_state WHERE key = ?', (key,))
+            row = await cursor.fetchone()
+            return row[0] if row else None
+    
+    async def set_maintenance_value(self, key: str, value: float):
+        async with aiosqlite.connect(self.db_path) as db:
+            await db.execute('INSERT OR REPLACE INTO maintenance_state (key, value) VALUES (?, ?)', (key, value))
             await db.commit()
     
     async def get_recent_opportunities(self, hours: int = 24) -> List[Dict]:
@@ -0,0 +1,206 @@
+"""
+Stream de eventos (Server-Sent Events) para o dashboard
+"""
+
+import asyncio
+import json
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Dict, Any, Optional, Set, Tuple
+
+from src.dashboard_sync import opportunity_row
+from src.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Oportunidades lidas do banco por consulta
+READ_BATCH = 500
+
+Position = Tuple[int, int]
+
+def event_message(event: str, data: Dict[str, Any], event_id: Optional[str] = None) -> bytes:
+    """Evento no formato text/event-stream"""
+    lines = [f'event: {event}']
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append(f'data: {json.dumps(data, separators=(",", ":"))}')
+    return ('\n'.join(lines) + '\n\n').encode()
+
+def parse_position(value: Optional[str]) -> Optional[Position]:
+    """Cursor "<change_seq>.<id>" de Last-Event-ID (ou ?since=); None se ausente ou inválido"""
+    try:
+        seq, row_id = (value or '').split('.')
+        return int(seq), int(row_id)
+    except ValueError:
+        return None
+
+class EventStream:
+    """Publicação de eventos do bot para clientes SSE"""
+
+    def __init__(self, db_manager, poll_interval: float = 1.0, metrics_interval: float = 5.0,
+                 replay_limit: int = 50, allowed_origin: str = '', queue_size: int = 1000,
+                 heartbeat: float = 15.0):
+        self.db_manager = db_manager
+        self.poll_interval = poll_interval
+        self.metrics_interval = metrics_interval
+        self.replay_limit = replay_limit
+        self.allowed_origin = allowed_origin
+        self.queue_size = queue_size
+        self.heartbeat = heartbeat
+
+        # Filas dos clientes conectados: (posição, mensagem); None encerra a conexão
+        self._subscribers: Set[asyncio.Queue] = set()
+        # Última oportunidade lida do banco (None sem clientes conectados)
+        self._position: Optional[Position] = None
+        # Estado atual reenviado a cada conexão
+        self.cycle: Optional[Dict[str, Any]] = None
+        self.metrics: Optional[Dict[str, Any]] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def publish(self, event: str, data: Dict[str, Any], position: Optional[Position] = None):
+        """Entrega um evento aos clientes conectados sem bloquear"""
+        if event == 'cycle':
+            self.cycle = data
+        elif event == 'metrics':
+            self.metrics = data
+        if not self._subscribers:
+            return
+
+        event_id = f'{position[0]}.{position[1]}' if position else None
+        message = event_message(event, data, event_id)
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait((position, message))
+            except asyncio.QueueFull:
+                self._drop(queue)
+
+    def _drop(self, queue: asyncio.Queue):
+        """Desconecta um cliente lento; ele reconecta e retoma do banco pelo cursor"""
+        self._subscribers.discard(queue)
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(None)
+        logger.warning("Cliente do stream de eventos desconectado (fila cheia)")
+
+    async def _poll_opportunities(self):
+        if self._position is None:
+            # Clientes novos leem o histórico por conta própria; o stream segue do ponto atual
+            latest = await self.db_manager.get_recent_opportunity_changes(1)
+            self._position = (latest[0]['change_seq'], latest[0]['id']) if latest else (0, 0)
+
+        while True:
+            changes = await self.db_manager.get_opportunity_changes(self._position, READ_BATCH)
+            for change in changes:
+                self._position = (change['change_seq'], change['id'])
+                self.publish('opportunity', opportunity_row(change), self._position)
+            if len(changes) < READ_BATCH:
+                return
+
+    async def _collect_metrics(self):
+        """Contadores do dia e métricas internas; publicados apenas quando mudam"""
+        today = datetime.now(timezone.utc).date().isoformat()
+        summary = await self.db_manager.get_daily_summary(today)
+        data = {
+            'today': {key: value for key, value in summary.items() if key != 'breakdown'},
+            'metrics': metrics.snapshot(),
+        }
+        if data != self.metrics:
+            self.publish('metrics', data)
+
+    async def run(self):
+        """Leitura compartilhada do banco enquanto houver clientes conectados"""
+        next_metrics = 0.0
+        while self._subscribers:
+            try:
+                await self._poll_opportunities()
+                if time.monotonic() >= next_metrics:
+                    await self._collect_metrics()
+                    next_metrics = time.monotonic() + self.metrics_interval
+            except Exception as e:
+                logger.error(f"Erro no stream de eventos: {str(e)}")
+            await asyncio.sleep(self.poll_interval)
+        self._position = None
+
+    def _ensure_task(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+
+    async def close(self, app=None):
+        """Encerra as conexões abertas e a leitura do banco (sinais de shutdown do aiohttp)"""
+        for queue in list(self._subscribers):
+            self._subscribers.discard(queue)
+            queue.put_nowait(None)
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    async def _replay(self, response, position: Optional[Position]) -> Optional[Position]:
+        """Oportunidades posteriores ao cursor do cliente (ou as mais recentes, sem cursor)"""
+        if position is None:
+            changes = await self.db_manager.get_recent_opportunity_changes(self.replay_limit)
+        else:
+            changes = await self.db_manager.get_opportunity_changes(position, READ_BATCH)
+
+        while changes:
+            for change in changes:
+                position = (change['change_seq'], change['id'])
+                await response.write(event_message('opportunity', opportunity_row(change), f'{position[0]}.{position[1]}'))
+            if len(changes) < READ_BATCH:
+                break
+            changes = await self.db_manager.get_opportunity_changes(position, READ_BATCH)
+        return position
+
+    async def handle_events(self, request):
+        """GET /events (Last-Event-ID ou ?since=<change_seq>.<id> retomam do cursor)"""
+        from aiohttp import web
+
+        headers = {'Content-Type': 'text/event-stream', 'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+        if self.allowed_origin:
+            headers['Access-Control-Allow-Origin'] = self.allowed_origin
+        response = web.StreamResponse(headers=headers)
+        await response.prepare(request)
+
+        # A fila é registrada antes do replay: o que for publicado durante a leitura
+        # do banco fica na fila e as repetições são descartadas pela posição
+        queue: asyncio.Queue = asyncio.Queue(self.queue_size)
+        self._subscribers.add(queue)
+        self._ensure_task()
+        try:
+            await response.write(b'retry: 3000\n\n')
+            position = parse_position(request.headers.get('Last-Event-ID') or request.query.get('since'))
+            position = await self._replay(response, position)
+            if self.cycle:
+                await response.write(event_message('cycle', self.cycle))
+            if self.metrics:
+                await response.write(event_message('metrics', self.metrics))
+
+            while True:
+                try:
+                    item = await asyncio.wait_for(queue.get(), self.heartbeat)
+                except asyncio.TimeoutError:
+                    # Comentário SSE: mantém a conexão aberta em proxies
+                    await response.write(b': keep-alive\n\n')
+                    continue
+                if item is None:
+                    break
+                item_position, message = item
+                if item_position is not None:
+                    if position is not None and item_position <= position:
+                        continue
+                    position = item_position
+                await response.write(message)
+        except ConnectionResetError:
+            pass
+        finally:
+            self._subscribers.discard(queue)
+        return response
+
+    def add_routes(self, app):
+        """Registra GET /events em uma aplicação aiohttp (encerrada junto com ela)"""
+        app.router.add_get('/events', self.handle_events)
+        app.on_shutdown.append(self.close)
@@ -0,0 +1,99 @@
+"""
+Decodificação incremental de arrays JSON grandes (respostas da Odds API)
+"""
+
+import json
+import re
+from typing import List, Optional
+
+import numpy as np
+
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:  # Backend rápido opcional
+    json_loads = json.loads
+
+_COMMENCE_TIME = re.compile(rb'"commence_time"\s*:\s*"([^"]+)"')
+
+_QUOTE = ord('"')
+_BACKSLASH = ord('\\')
+_OPENERS = (ord('{'), ord('['))
+_CLOSERS = (ord('}'), ord(']'))
+
+class JsonArrayStreamer:
+    """Separa os elementos de um array JSON de nível superior recebido em pedaços"""
+
+    def __init__(self):
+        # Bytes do elemento ainda incompleto
+        self.pending = bytearray()
+        # Estado carregado entre chunks
+        self.depth = 0
+        self.in_string = False
+        self.escape_next = False
+
+    def feed(self, chunk: bytes) -> List[bytes]:
+        """Adiciona um chunk e retorna os elementos completos encontrados"""
+        if not chunk:
+            return []
+
+        data = np.frombuffer(chunk, dtype=np.uint8)
+        quotes = data == _QUOTE
+
+        # Aspas escapadas não abrem nem fecham strings (barras invertidas são raras)
+        backslashes = np.flatnonzero(data == _BACKSLASH)
+        skip_until = 0
+        if self.escape_next:
+            quotes[0] = False
+            skip_until = 1
+        self.escape_next = False
+        for position in backslashes:
+            if position < skip_until:
+                continue
+            if position + 1 < len(data):
+                quotes[position + 1] = False
+            else:
+                self.escape_next = True
+            skip_until = position + 2
+
+        # Paridade de aspas indica quais bytes estão dentro de strings
+        in_string = (np.cumsum(quotes) + self.in_string) % 2 == 1
+
+        delta = np.zeros(len(data), dtype=np.int32)
+        delta[(data == _OPENERS[0]) | (data == _OPENERS[1])] = 1
+        delta[(data == _CLOSERS[0]) | (data == _CLOSERS[1])] = -1
+        delta[in_string] = 0
+        depth = np.cumsum(delta) + self.depth
+
+        starts = np.flatnonzero((delta == 1) & (depth == 2))
+        ends = np.flatnonzero((delta == -1) & (depth == 1))
+
+        elements = []
+        start_iter = iter(starts.tolist())
+        open_start = 0 if self.pending else None
+        for end in ends.tolist():
+            if open_start is None:
+                open_start = next(start_iter)
+            if self.pending:
+                self.pending += chunk[:end + 1]
+                elements.append(bytes(self.pending))
+                self.pending = bytearray()
+            else:
+                elements.append(chunk[open_start:end + 1])
+            open_start = None
+
+        # Elemento iniciado neste chunk (ou em anteriores) que ainda não terminou
+        remaining = list(start_iter)
+        if remaining:
+            self.pending = bytearray(chunk[remaining[0]:])
+        elif self.pending:
+            self.pending += chunk
+
+        self.depth = int(depth[-1])
+        self.in_string = bool(in_string[-1])
+        return elements
+
+def peek_commence_time(element: bytes) -> Optional[str]:
+    """Lê o commence_time de um evento sem decodificá-lo por inteiro"""
+    match = _COMMENCE_TIME.search(element)
+    return match.group(1).decode() if match else None
@@ -0,0 +1,218 @@
+"""
+Módulo de acompanhamento de movimento de linhas e detecção de steam moves
+"""
+
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import List, Dict, Tuple, Optional, Iterable
+
+from src.odds_index import GameIndex
+
+logger = logging.getLogger(__name__)
+
+# Chave de um preço: (jogo, mercado, linha, lado, bookmaker)
+PriceKey = Tuple[str, str, Optional[float], str, str]
+# Chave de um resultado (sem bookmaker): (jogo, mercado, linha, lado)
+OutcomeKey = Tuple[str, str, Optional[float], str]
+
+@dataclass
+class SteamEvent:
+    """Movimento coordenado de preço em várias casas dentro da janela (ou entre duas coletas)"""
+    game_id: str
+    market: str
+    point: Optional[float]
+    side: str
+    direction: int  # -1 = odd caindo (dinheiro entrando), 1 = odd subindo
+    bookmakers: List[str]
+    detected_at: float
+    # Médias entre as casas do movimento no histórico (variação relativa e por hora)
+    movement: float = 0.0
+    velocity: float = 0.0
+
+class PriceHistory:
+    """Buffer circular de preços de um (jogo, mercado, lado, bookmaker)"""
+
+    __slots__ = ('points', 'last_seen')
+
+    def __init__(self, maxlen: int):
+        self.points = deque(maxlen=maxlen)
+        # Última coleta que viu o preço (mudado ou não)
+        self.last_seen: Optional[float] = None
+
+    def append(self, timestamp: float, price: float):
+        self.points.append((timestamp, price))
+        self.last_seen = timestamp
+
+    @property
+    def last_price(self) -> Optional[float]:
+        return self.points[-1][1] if self.points else None
+
+    def movement(self) -> float:
+        """Variação relativa entre o preço mais antigo e o mais recente do buffer"""
+        if len(self.points) < 2:
+            return 0.0
+        first, last = self.points[0][1], self.points[-1][1]
+        return (last - first) / first if first > 0 else 0.0
+
+    def velocity(self) -> float:
+        """Variação de preço por hora dentro do buffer"""
+        if len(self.points) < 2:
+            return 0.0
+        (first_ts, first), (last_ts, last) = self.points[0], self.points[-1]
+        elapsed = last_ts - first_ts
+        return (last - first) / elapsed * 3600 if elapsed > 0 else 0.0
+
+class LineMovementTracker:
+    """Mantém histórico recente de preços em memória e detecta steam moves incrementalmente"""
+
+    def __init__(self, history_size: int = 32, steam_window: float = 600.0,
+                 steam_threshold: float = 0.03, steam_min_bookmakers: int = 3,
+                 max_fetch_interval: Optional[float] = None):
+        self.history_size = history_size
+        self.steam_window = steam_window
+        # Maior intervalo entre coletas de um preço em que a mudança ainda conta para steam:
+        # a janela passa a ser o intervalo entre as coletas quando ele é maior que steam_window
+        self.max_fetch_interval = max(max_fetch_interval or steam_window, steam_window)
+        self.steam_threshold = steam_threshold
+        self.steam_min_bookmakers = steam_min_bookmakers
+
+        self.histories: Dict[PriceKey, PriceHistory] = {}
+        # Movimentos recentes por resultado e direção: deque de (timestamp, bookmaker)
+        self._recent_moves: Dict[Tuple[OutcomeKey, int], deque] = {}
+        # Último movimento de cada bookmaker por resultado e direção
+        self._last_move: Dict[Tuple[OutcomeKey, int], Dict[str, float]] = {}
+        # Último steam emitido por resultado, para não repetir o alerta na mesma janela
+        self._last_steam: Dict[Tuple[OutcomeKey, int], float] = {}
+
+    def update(self, key: PriceKey, price: float, timestamp: float) -> Tuple[bool, Optional[SteamEvent]]:
+        """Registra um preço em O(1); retorna (preço mudou, steam detectado)"""
+        history = self.histories.get(key)
+        if history is None:
+            history = PriceHistory(self.history_size)
+            self.histories[key] = history
+
+        previous = history.last_price
+        previous_ts = history.last_seen
+        if previous == price:
+            history.last_seen = timestamp
+            return False, None
+
+        history.append(timestamp, price)
+        if previous is None or previous <= 0:
+            return True, None
+        # Mudança entre coletas distantes demais (ex.: histórico de dias atrás): fora de qualquer janela
+        fetch_interval = timestamp - previous_ts
+        if fetch_interval > self.max_fetch_interval:
+            return True, None
+
+        change = (price - previous) / previous
+        if abs(change) < self.steam_threshold:
+            return True, None
+
+        direction = 1 if change > 0 else -1
+        window = max(self.steam_window, fetch_interval)
+        return True, self._register_move(key, direction, timestamp, window)
+
+    def _register_move(self, key: PriceKey, direction: int, timestamp: float,
+                       window: float) -> Optional[SteamEvent]:
+        """Registra um movimento relevante e verifica se virou steam"""
+        game_id, market, point, side, bookmaker = key
+        outcome_key = ((game_id, market, point, side), direction)
+
+        moves = self._recent_moves.get(outcome_key)
+        if moves is None:
+            moves = deque()
+            self._recent_moves[outcome_key] = moves
+            self._last_move[outcome_key] = {}
+        last_move = self._last_move[outcome_key]
+
+        moves.append((timestamp, bookmaker))
+        last_move[bookmaker] = timestamp
+
+        # Remover movimentos fora da janela (amortizado O(1)); os da coleta anterior não contam
+        cutoff = timestamp - window
+        while moves and moves[0][0] <= cutoff:
+            old_ts, old_bookmaker = moves.popleft()
+            if last_move.get(old_bookmaker) == old_ts:
+                del last_move[old_bookmaker]
+
+        if len(last_move) < self.steam_min_bookmakers:
+            return None
+
+        last_steam = self._last_steam.get(outcome_key)
+        if last_steam is not None and timestamp - last_steam < window:
+            return None
+
+        self._last_steam[outcome_key] = timestamp
+        bookmakers = sorted(last_move)
+        histories = [self.histories[(game_id, market, point, side, name)] for name in bookmakers]
+        return SteamEvent(
+            game_id=game_id,
+            market=market,
+            point=point,
+            side=side,
+            direction=direction,
+            bookmakers=bookmakers,
+            detected_at=timestamp,
+            movement=sum(history.movement() for history in histories) / len(histories),
+            velocity=sum(history.velocity() for history in histories) / len(histories)
+        )
+
+    def update_from_indexes(self, indexes: Iterable[GameIndex],
+                            timestamp: Optional[float] = None) -> Tuple[List[tuple], List[SteamEvent]]:
+        """Processa uma coleta completa; retorna linhas de snapshot alteradas e steam moves
+
+        Cada jogo usa o horário da sua coleta (GameIndex.fetched_at), se houver.
+        """
+        if timestamp is None:
+            timestamp = time.time()
+
+        changed_rows = []
+        steam_events = []
+
+        for index in indexes:
+            fetched_at = index.fetched_at or timestamp
+            for (market, point), line in index.lines.items():
+                for side_idx, side in enumerate(line.sides):
+                    for price, bookmaker in zip(line.prices[side_idx], line.bookmakers[side_idx]):
+                        key = (index.game_id, market, point, side, bookmaker)
+                        changed, steam = self.update(key, price, fetched_at)
+                        if changed:
+                            changed_rows.append((*key, price, fetched_at))
+                        if steam:
+                            steam_events.append(steam)
+
+        if steam_events:
+            logger.info(f"Steam moves detectados: {len(steam_events)}")
+
+        return changed_rows, steam_events
+
+    def load_snapshots(self, rows: Iterable[tuple]):
+        """Reconstrói os buffers a partir de snapshots armazenados (ordenados por horário)"""
+        count = 0
+        for game_id, market, point, side, bookmaker, price, captured_at in rows:
+            key = (game_id, market, point, side, bookmaker)
+            history = self.histories.get(key)
+            if history is None:
+                history = PriceHistory(self.history_size)
+                self.histories[key] = history
+            history.append(captured_at, price)
+            count += 1
+
+        logger.info(f"Histórico de linhas carregado: {count} preços")
+
+    def get_history(self, game_id: str, market: str, point: Optional[float],
+                    side: str, bookmaker: str) -> Optional[PriceHistory]:
+        """Retorna o histórico de um preço específico"""
+        return self.histories.get((game_id, market, point, side, bookmaker))
+
+    def retain_games(self, game_ids: Iterable[str]):
+        """Descarta o histórico de jogos que saíram da janela de coleta"""
+        active = set(game_ids)
+        for key in [k for k in self.histories if k[0] not in active]:
+            del self.histories[key]
+        for store in (self._recent_moves, self._last_move, self._last_steam):
+            for key in [k for k in store if k[0][0] not in active]:
+                del store[key]
@@ -0,0 +1,388 @@
+"""
+Servidor local que emula a The Odds API, o Telegram e o PostgREST do dashboard
+Uso: python -m src.local_api --port 8080 --replay-dir recordings/
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+import time
+import uuid
+from pathlib import Path
+from typing import Callable, Dict, Any, List, Optional, Tuple
+
+from aiohttp import web
+
+from src.data_collector import recording_key
+
+logger = logging.getLogger(__name__)
+
+# Gera o payload de odds ou placares para (sport, parâmetros); None = esporte desconhecido
+OddsProvider = Callable[[str, Dict[str, str]], Optional[List[Dict[str, Any]]]]
+
+# Tabelas do dashboard (database/supabase-setup.sql): colunas, obrigatórias sem default e únicas
+REST_TABLES = {
+    'opportunities': (
+        ('id', 'game_id', 'home_team', 'away_team', 'league', 'market', 'selection', 'odds', 'value',
+         'confidence', 'bookmaker', 'commence_time', 'status', 'created_at'),
+        ('home_team', 'away_team', 'league', 'market', 'selection', 'odds', 'value', 'confidence',
+         'bookmaker', 'commence_time'),
+        ('id',)
+    ),
+    'activity_logs': (
+        ('id', 'type', 'message', 'details', 'created_at'),
+        ('type', 'message'),
+        ('id',)
+    ),
+    'daily_analytics': (
+        ('id', 'date', 'games_analyzed', 'opportunities_found', 'success_rate', 'total_value', 'created_at'),
+        ('date',),
+        ('id', 'date')
+    ),
+}
+
+def _rest_error(status: int, code: str, message: str) -> web.Response:
+    return web.json_response({'code': code, 'message': message, 'details': None, 'hint': None}, status=status)
+
+class RateLimiter:
+    """Token bucket por chave (ex.: chat_id), com relógio injetável"""
+
+    def __init__(self, rate: float, burst: int, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+
+    def acquire(self, key: str) -> float:
+        """Consome um token; retorna 0 se permitido ou os segundos até o próximo token"""
+        if self.rate <= 0:
+            return 0.0
+
+        now = self.clock()
+        tokens, last = self._buckets.get(key, (float(self.burst), now))
+        tokens = min(self.burst, tokens + (now - last) * self.rate)
+
+        if tokens >= 1:
+            self._buckets[key] = (tokens - 1, now)
+            return 0.0
+
+        self._buckets[key] = (tokens, now)
+        return (1 - tokens) / self.rate
+
+class LocalApiServer:
+    """Stand-in local da The Odds API, da Bot API do Telegram e do PostgREST do dashboard"""
+
+    def __init__(self, replay_dir: Optional[str] = None, odds_provider: Optional[OddsProvider] = None,
+                 odds_rate: float = 10.0, telegram_rate: float = 1.0, telegram_burst: int = 20,
+                 quota: int = 500, latency: float = 0.0, scores_provider: Optional[OddsProvider] = None,
+                 rest_rate: float = 0.0, rest_max_rows: int = 0):
+        self.replay_dir = Path(replay_dir) if replay_dir else None
+        self.odds_provider = odds_provider
+        self.scores_provider = scores_provider
+        self.latency = latency
+
+        # Limites: requisições/s na Odds API e mensagens/s por chat no Telegram
+        self.odds_limiter = RateLimiter(odds_rate, max(1, int(odds_rate)))
+        self.telegram_limiter = RateLimiter(telegram_rate, telegram_burst)
+        # PostgREST: requisições/s (0 = sem limite) e linhas por requisição (0 = sem limite)
+        self.rest_limiter = RateLimiter(rest_rate, max(1, int(rest_rate)))
+        self.rest_max_rows = rest_max_rows
+
+        self.quota = quota
+        self.requests_used = 0
+        self.rate_limited = {'odds': 0, 'telegram': 0, 'rest': 0}
+        self.messages: List[Dict[str, Any]] = []
+        # Linhas do Postgres emulado por tabela e chave primária; status de erro a devolver
+        # nas próximas requisições do PostgREST (falhas injetadas em testes)
+        self.tables: Dict[str, Dict[Any, Dict[str, Any]]] = {table: {} for table in REST_TABLES}
+        self.rest_failures: List[int] = []
+        self.rest_requests = 0
+
+        self.app = web.Application()
+        self.app.router.add_get('/v4/sports/{sport}/odds', self.handle_odds)
+        self.app.router.add_get('/v4/sports/{sport}/scores', self.handle_scores)
+        self.app.router.add_post('/bot{token}/sendMessage', self.handle_send_message)
+        self.app.router.add_post('/rest/v1/{table}', self.handle_rest_upsert)
+        self.app.router.add_get('/rest/v1/{table}', self.handle_rest_select)
+        self.app.router.add_get('/_local/stats', self.handle_stats)
+        self._runner: Optional[web.AppRunner] = None
+
+    def _load(self, endpoint: str, provider: Optional[OddsProvider], sport: str,
+              params: Dict[str, str]) -> Optional[List[Dict[str, Any]]]:
+        if provider:
+            return provider(sport, params)
+
+        if self.replay_dir:
+            path = self.replay_dir / recording_key(f'sports/{sport}/{endpoint}', params)
+            if path.exists():
+                with open(path) as f:
+                    return json.load(f)['data']
+
+        return None
+
+    async def _check_limits(self) -> Optional[web.Response]:
+        """Latência, limite de frequência e cota comuns aos endpoints da Odds API"""
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        retry_after = self.odds_limiter.acquire('odds')
+        if retry_after:
+            self.rate_limited['odds'] += 1
+            return web.json_response(
+                {'message': 'Requests are being made too frequently', 'error_code': 'EXCEEDED_FREQ_LIMIT'},
+                status=429,
+                headers={'Retry-After': f"{retry_after:.2f}"}
+            )
+
+        if self.requests_used >= self.quota:
+            return web.json_response(
+                {'message': 'Usage quota has been reached', 'error_code': 'OUT_OF_USAGE_CREDITS'},
+                status=401
+            )
+        return None
+
+    def _billed_response(self, data: List[Dict[str, Any]], cost: int) -> web.Response:
+        self.requests_used += cost
+        return web.json_response(data, headers={
+            'x-requests-used': str(self.requests_used),
+            'x-requests-remaining': str(max(0, self.quota - self.requests_used)),
+            'x-requests-last': str(cost),
+        })
+
+    async def handle_odds(self, request: web.Request) -> web.Response:
+        """GET /v4/sports/{sport}/odds"""
+        limited = await self._check_limits()
+        if limited:
+            return limited
+
+        sport = request.match_info['sport']
+        params = {key: value for key, value in request.query.items() if key != 'apiKey'}
+        data = self._load('odds', self.odds_provider, sport, params)
+        if data is None:
+            return web.json_response({'message': 'Unknown sport', 'error_code': 'UNKNOWN_SPORT'}, status=404)
+
+        # Casas e mercados pedidos: as demais ficam fora do payload, como na API real
+        markets = params.get('markets', 'h2h').split(',')
+        bookmakers = params['bookmakers'].split(',') if params.get('bookmakers') else None
+        data = [
+            {
+                **game,
+                'bookmakers': [
+                    {**bookmaker, 'markets': [market for market in bookmaker.get('markets', [])
+                                              if market['key'] in markets]}
+                    for bookmaker in game.get('bookmakers', [])
+                    if bookmakers is None or bookmaker['key'] in bookmakers
+                ]
+            }
+            for game in data
+        ]
+
+        # Custo da The Odds API: regiões × mercados (cada 10 casas pedidas valem uma região)
+        regions = math.ceil(len(bookmakers) / 10) if bookmakers else len(params.get('regions', 'us').split(','))
+        return self._billed_response(data, regions * len(markets))
+
+    async def handle_scores(self, request: web.Request) -> web.Response:
+        """GET /v4/sports/{sport}/scores"""
+        limited = await self._check_limits()
+        if limited:
+            return limited
+
+        sport = request.match_info['sport']
+        params = {key: value for key, value in request.query.items() if key != 'apiKey'}
+        data = self._load('scores', self.scores_provider, sport, params)
+        if data is None:
+            return web.json_response({'message': 'Unknown sport', 'error_code': 'UNKNOWN_SPORT'}, status=404)
+
+        # Custo da The Odds API: 2 com daysFrom (jogos concluídos), 1 sem
+        return self._billed_response(data, 2 if params.get('daysFrom') else 1)
+
+    async def handle_send_message(self, request: web.Request) -> web.Response:
+        """POST /bot{token}/sendMessage"""
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        payload = await request.json()
+        chat_id = str(payload.get('chat_id', ''))
+
+        if not payload.get('text'):
+            return web.json_response(
+                {'ok': False, 'error_code': 400, 'description': 'Bad Request: message text is empty'},
+                status=400
+            )
+
+        retry_after = self.telegram_limiter.acquire(chat_id)
+        if retry_after:
+            self.rate_limited['telegram'] += 1
+            seconds = max(1, int(retry_after + 0.999))
+            return web.json_response({
+                'ok': False,
+                'error_code': 429,
+                'description': f'Too Many Requests: retry after {seconds}',
+                'parameters': {'retry_after': seconds}
+            }, status=429)
+
+        message = {
+            'message_id': len(self.messages) + 1,
+            'chat': {'id': chat_id},
+            'date': int(time.time()),
+            'text': payload['text'],
+        }
+        self.messages.append(message)
+        return web.json_response({'ok': True, 'result': message})
+
+    def _apply_defaults(self, table: str, row: Dict[str, Any]) -> Dict[str, Any]:
+        row = dict(row)
+        if 'id' not in row:
+            row['id'] = len(self.tables[table]) + 1 if table == 'daily_analytics' else str(uuid.uuid4())
+        row.setdefault('created_at', time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()))
+        if table == 'opportunities':
+            row.setdefault('status', 'pending')
+        return row
+
+    async def handle_rest_upsert(self, request: web.Request) -> web.Response:
+        """POST /rest/v1/{table}: insert em lote (upsert com Prefer: resolution=...), tudo ou nada"""
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self.rest_requests += 1
+        # Corpo lido antes de qualquer erro (a conexão keep-alive continua utilizável)
+        payload = await request.json()
+
+        retry_after = self.rest_limiter.acquire('rest')
+        if retry_after:
+            self.rate_limited['rest'] += 1
+            return web.json_response(
+                {'message': 'Too Many Requests'}, status=429, headers={'Retry-After': f"{retry_after:.2f}"}
+            )
+        if self.rest_failures:
+            return _rest_error(self.rest_failures.pop(0), 'XX000', 'Falha injetada')
+
+        table = request.match_info['table']
+        if table not in REST_TABLES:
+            return _rest_error(404, '42P01', f'relation "public.{table}" does not exist')
+        columns, required, unique = REST_TABLES[table]
+
+        rows = payload if isinstance(payload, list) else [payload]
+        if self.rest_max_rows and len(rows) > self.rest_max_rows:
+            return _rest_error(413, 'PGRST413', 'Payload Too Large')
+
+        on_conflict = request.query.get('on_conflict', 'id')
+        if on_conflict not in unique:
+            return _rest_error(400, '42P10', 'there is no unique or exclusion constraint matching the ON CONFLICT specification')
+        prefer = request.headers.get('Prefer', '')
+        merge = 'resolution=merge-duplicates' in prefer
+        ignore = 'resolution=ignore-duplicates' in prefer
+
+        # Valida o lote inteiro antes de gravar (uma transação no Postgres)
+        keys = set()
+        for row in rows:
+            for column in row:
+                if column not in columns:
+                    return _rest_error(400, 'PGRST204', f"Could not find the '{column}' column of '{table}' in the schema cache")
+            for column in required:
+                if row.get(column) is None:
+                    return _rest_error(400, '23502', f'null value in column "{column}" of relation "{table}" violates not-null constraint')
+            key = row.get(on_conflict)
+            if key is not None and key in keys:
+                return _rest_error(500, '21000', 'ON CONFLICT DO UPDATE command cannot affect row a second time')
+            keys.add(key)
+            if key is not None and not (merge or ignore) and self._find(table, on_conflict, key):
+                return _rest_error(409, '23505', f'duplicate key value violates unique constraint "{table}_{on_conflict}_key"')
+
+        for row in rows:
+            existing = self._find(table, on_conflict, row.get(on_conflict))
+            if existing is None:
+                row = self._apply_defaults(table, row)
+                self.tables[table][row['id']] = row
+            elif merge:
+                existing.update(row)
+        return web.Response(status=201)
+
+    def _find(self, table: str, column: str, value: Any) -> Optional[Dict[str, Any]]:
+        if value is None:
+            return None
+        if column == 'id':
+            return self.tables[table].get(value)
+        return next((row for row in self.tables[table].values() if row.get(column) == value), None)
+
+    async def handle_rest_select(self, request: web.Request) -> web.Response:
+        """GET /rest/v1/{table}?order=<coluna>.desc&limit=N (leitura do dashboard)"""
+        table = request.match_info['table']
+        if table not in REST_TABLES:
+            return _rest_error(404, '42P01', f'relation "public.{table}" does not exist')
+
+        rows = list(self.tables[table].values())
+        if 'order' in request.query:
+            column, _, direction = request.query['order'].partition('.')
+            rows.sort(key=lambda row: (row.get(column) is None, row.get(column)), reverse=direction == 'desc')
+        if 'limit' in request.query:
+            rows = rows[:int(request.query['limit'])]
+        return web.json_response(rows)
+
+    async def handle_stats(self, request: web.Request) -> web.Response:
+        """GET /_local/stats: contadores para testes de carga"""
+        return web.json_response({
+            'requests_used': self.requests_used,
+            'messages_sent': len(self.messages),
+            'rate_limited': self.rate_limited,
+            'rest_requests': self.rest_requests,
+            'rest_rows': {table: len(rows) for table, rows in self.tables.items()},
+        })
+
+    async def start(self, host: str = '127.0.0.1', port: int = 8080) -> str:
+        """Inicia o servidor e retorna a URL base"""
+        self._runner = web.AppRunner(self.app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+
+        # Porta 0 escolhe uma porta livre
+        port = self._runner.addresses[0][1]
+        logger.info(f"Servidor local em http://{host}:{port}")
+        return f"http://{host}:{port}"
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+async def _serve(args):
+    server = LocalApiServer(
+        replay_dir=args.replay_dir,
+        odds_rate=args.odds_rate,
+        telegram_rate=args.telegram_rate,
+        quota=args.quota,
+        latency=args.latency,
+        rest_rate=args.rest_rate,
+        rest_max_rows=args.rest_max_rows
+    )
+    await server.start(args.host, args.port)
+    try:
+        while True:
+            await asyncio.sleep(3600)
+    finally:
+        await server.stop()
+
+def main():
+    parser = argparse.ArgumentParser(description='Emulador local da The Odds API, do Telegram e do PostgREST')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--replay-dir', help='Diretório com respostas gravadas (ODDS_RECORD_DIR)')
+    parser.add_argument('--odds-rate', type=float, default=10.0, help='Requisições/s aceitas na Odds API')
+    parser.add_argument('--telegram-rate', type=float, default=1.0, help='Mensagens/s aceitas por chat')
+    parser.add_argument('--quota', type=int, default=500, help='Cota de créditos da Odds API')
+    parser.add_argument('--latency', type=float, default=0.0, help='Latência artificial por requisição (s)')
+    parser.add_argument('--rest-rate', type=float, default=0.0, help='Requisições/s aceitas no PostgREST (0 = sem limite)')
+    parser.add_argument('--rest-max-rows', type=int, default=0, help='Linhas por upsert aceitas no PostgREST (0 = sem limite)')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,204 @@
+"""
+Métricas internas (histogramas e gauges) com exposição no formato Prometheus
+"""
+
+import bisect
+import logging
+import time
+from typing import Dict, Tuple, List, Optional, Any
+
+logger = logging.getLogger(__name__)
+
+# Buckets padrão em segundos (1ms a 60s)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+def _escape(value: str) -> str:
+    """Escapa valores de label no formato texto do Prometheus"""
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+class Histogram:
+    """Histograma de buckets fixos para uma combinação de labels"""
+
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+class _Timer:
+    """Context manager que registra a duração no histograma"""
+
+    __slots__ = ('registry', 'name', 'labels', 'start')
+
+    def __init__(self, registry: 'MetricsRegistry', name: str, labels: Dict[str, Any]):
+        self.registry = registry
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.registry.observe(self.name, time.perf_counter() - self.start, **self.labels)
+        return False
+
+class _NoopTimer:
+    """Timer sem custo usado quando as métricas estão desabilitadas"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+_NOOP_TIMER = _NoopTimer()
+
+class MetricsRegistry:
+    """Registro de métricas em memória; desabilitado por padrão"""
+
+    def __init__(self, enabled: bool = False, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.enabled = enabled
+        self.buckets = buckets
+        self.histograms: Dict[str, Dict[LabelKey, Histogram]] = {}
+        self.gauges: Dict[str, Dict[LabelKey, float]] = {}
+        self.descriptions: Dict[str, str] = {}
+
+    def describe(self, name: str, description: str):
+        self.descriptions[name] = description
+
+    def observe(self, name: str, value: float, **labels):
+        """Registra uma observação no histograma `name`"""
+        if not self.enabled:
+            return
+        series = self.histograms.get(name)
+        if series is None:
+            series = self.histograms[name] = {}
+        key = tuple(sorted((k, str(v)) for k, v in labels.items()))
+        histogram = series.get(key)
+        if histogram is None:
+            histogram = series[key] = Histogram(self.buckets)
+        histogram.observe(value)
+
+    def timer(self, name: str, **labels):
+        """Mede a duração de um bloco `with` (sem custo quando desabilitado)"""
+        if not self.enabled:
+            return _NOOP_TIMER
+        return _Timer(self, name, labels)
+
+    def set_gauge(self, name: str, value: float, **labels):
+        """Define o valor atual de um gauge"""
+        if not self.enabled:
+            return
+        key = tuple(sorted((k, str(v)) for k, v in labels.items()))
+        self.gauges.setdefault(name, {})[key] = value
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Resumo das métricas para consumo em processo"""
+        result: Dict[str, Any] = {}
+        for name, series in self.histograms.items():
+            result[name] = [
+                {
+                    'labels': dict(key),
+                    'count': histogram.count,
+                    'sum': histogram.sum,
+                    'avg': histogram.sum / histogram.count if histogram.count else 0.0,
+                }
+                for key, histogram in series.items()
+            ]
+        for name, series in self.gauges.items():
+            result[name] = [{'labels': dict(key), 'value': value} for key, value in series.items()]
+        return result
+
+    def render_prometheus(self) -> str:
+        """Exporta as métricas no formato texto do Prometheus"""
+        lines: List[str] = []
+
+        def fmt_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+            items = list(key) + ([extra] if extra else [])
+            if not items:
+                return ''
+            return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in items) + '}'
+
+        for name, series in sorted(self.histograms.items()):
+            if name in self.descriptions:
+                lines.append(f"# HELP {name} {self.descriptions[name]}")
+            lines.append(f"# TYPE {name} histogram")
+            for key, histogram in series.items():
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{fmt_labels(key, ('le', f'{bound:g}'))} {cumulative}")
+                lines.append(f"{name}_bucket{fmt_labels(key, ('le', '+Inf'))} {histogram.count}")
+                lines.append(f"{name}_sum{fmt_labels(key)} {histogram.sum}")
+                lines.append(f"{name}_count{fmt_labels(key)} {histogram.count}")
+
+        for name, series in sorted(self.gauges.items()):
+            if name in self.descriptions:
+                lines.append(f"# HELP {name} {self.descriptions[name]}")
+            lines.append(f"# TYPE {name} gauge")
+            for key, value in series.items():
+                lines.append(f"{name}{fmt_labels(key)} {value}")
+
+        return '\n'.join(lines) + '\n'
+
+# Registro global usado pelos módulos do bot
+metrics = MetricsRegistry()
+
+metrics.describe('odds_api_request_seconds', 'Latência das requisições à Odds API por liga')
+metrics.describe('odds_api_request_cost', 'Cota consumida pela última requisição à Odds API por liga')
+metrics.describe('odds_api_requests_remaining', 'Cota restante da Odds API')
+metrics.describe('provider_fetch_seconds', 'Duração da coleta por fonte de odds e status')
+metrics.describe('analysis_game_seconds', 'Tempo de análise por jogo')
+metrics.describe('db_write_seconds', 'Tempo de escrita no banco por operação')
+metrics.describe('telegram_send_seconds', 'Latência de envio de mensagens ao Telegram')
+metrics.describe('telegram_queue_depth', 'Mensagens aguardando envio no ciclo atual')
+metrics.describe('cycle_stage_seconds', 'Duração de cada etapa do ciclo de análise')
+metrics.describe('dashboard_sync_seconds', 'Latência dos upserts em lote no Postgres do dashboard por tabela')
+metrics.describe('dashboard_sync_batch_rows', 'Tamanho atual do lote da sincronização com o dashboard')
+
+class MetricsServer:
+    """Servidor HTTP local que expõe /metrics"""
+
+    def __init__(self, registry: MetricsRegistry = metrics):
+        from aiohttp import web
+
+        self.registry = registry
+        self._runner = None
+
+        # Outras rotas de diagnóstico podem ser registradas antes do start()
+        self.app = web.Application()
+        self.app.router.add_get('/metrics', self.handle_metrics)
+
+    async def handle_metrics(self, request):
+        from aiohttp import web
+
+        return web.Response(
+            text=self.registry.render_prometheus(),
+            content_type='text/plain',
+            headers={'X-Content-Type-Options': 'nosniff'}
+        )
+
+    async def start(self, host: str = '127.0.0.1', port: int = 9100):
+        from aiohttp import web
+
+        self._runner = web.AppRunner(self.app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+        logger.info(f"Métricas disponíveis em http://{host}:{port}/metrics")
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
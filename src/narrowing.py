@@ -0,0 +1,144 @@
+"""
+Estreitamento adaptativo das requisições à Odds API (casas e mercados por liga)
+"""
+
+import logging
+import time
+from collections import defaultdict
+from typing import List, Dict, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Preço a até 1% do melhor conta como melhor preço (empates divididos)
+BEST_PRICE_TOLERANCE = 0.01
+# Peso de uma sugestão enviada frente a um melhor preço
+OPPORTUNITY_WEIGHT = 5.0
+
+# (liga, mercado, casa) -> [melhores preços, ofertas vistas, sugestões enviadas]
+StatsKey = Tuple[str, str, str]
+
+class RequestPlanner:
+    """Escolhe casas e mercados por liga a partir do histórico de melhores preços"""
+
+    def __init__(self, full_sweep_hours: float = 24.0, coverage: float = 0.95,
+                 min_bookmakers: int = 4, max_bookmakers: int = 10, decay: float = 0.8):
+        self.full_sweep_hours = full_sweep_hours
+        self.coverage = coverage
+        self.min_bookmakers = min_bookmakers
+        self.max_bookmakers = max_bookmakers
+        self.decay = decay
+        self.stats: Dict[StatsKey, List[float]] = {}
+        # liga -> horário (epoch) da última varredura completa
+        self.last_full_sweep: Dict[str, float] = {}
+        # Título -> chave da casa (sugestões guardam o título)
+        self.bookmaker_keys: Dict[str, str] = {}
+        self._dirty_leagues: set = set()
+
+    def load(self, stats_rows: List[tuple], sweep_rows: List[tuple]):
+        """Carrega estatísticas persistidas: (liga, mercado, casa, melhores, vistas, sugestões)"""
+        for league, market, bookmaker, best, seen, opportunities in stats_rows:
+            self.stats[(league, market, bookmaker)] = [best, seen, opportunities]
+        self.last_full_sweep.update(dict(sweep_rows))
+
+    def needs_full_sweep(self, league: str, now: Optional[float] = None) -> bool:
+        now = time.time() if now is None else now
+        last_sweep = self.last_full_sweep.get(league)
+        return last_sweep is None or now - last_sweep >= self.full_sweep_hours * 3600
+
+    def plan(self, league: str, markets: List[str], regions: str) -> Dict[str, str]:
+        """Parâmetros de casas/mercados da requisição da liga (completos em varredura)"""
+        full = {'regions': regions, 'markets': ','.join(markets)}
+        if self.needs_full_sweep(league):
+            return full
+
+        scores: Dict[str, float] = defaultdict(float)
+        best_by_bookmaker: Dict[str, float] = defaultdict(float)
+        seen_by_bookmaker: Dict[str, float] = defaultdict(float)
+        offered_markets = set()
+        for (stats_league, market, bookmaker), (best, seen, opportunities) in self.stats.items():
+            if stats_league != league or market not in markets:
+                continue
+            if seen > 0:
+                offered_markets.add(market)
+            best_by_bookmaker[bookmaker] += best
+            seen_by_bookmaker[bookmaker] += seen
+            scores[bookmaker] += best + OPPORTUNITY_WEIGHT * opportunities
+
+        total_best = sum(best_by_bookmaker.values())
+        if not offered_markets or total_best <= 0:
+            return full
+
+        # Casas em ordem de relevância até cobrir a fração desejada dos melhores preços
+        ranked = sorted(scores, key=lambda bookmaker: (scores[bookmaker], seen_by_bookmaker[bookmaker]),
+                        reverse=True)
+        chosen = []
+        covered = 0.0
+        for bookmaker in ranked:
+            if covered >= self.coverage * total_best and len(chosen) >= self.min_bookmakers:
+                break
+            chosen.append(bookmaker)
+            covered += best_by_bookmaker[bookmaker]
+        chosen = chosen[:self.max_bookmakers]
+
+        return {
+            'bookmakers': ','.join(sorted(chosen)),
+            'markets': ','.join(market for market in markets if market in offered_markets),
+        }
+
+    def observe_sweep(self, league: str, games: List[Dict[str, Any]], swept_at: Optional[float] = None):
+        """Atualiza as estatísticas com a resposta de uma varredura completa"""
+        for key, values in self.stats.items():
+            if key[0] == league:
+                values[:] = [value * self.decay for value in values]
+
+        self.learn_keys(games)
+        for game in games:
+            # (mercado, resultado, linha) -> [(preço, casa)]
+            prices: Dict[tuple, List[Tuple[float, str]]] = defaultdict(list)
+            for bookmaker in game.get('bookmakers', []):
+                for market in bookmaker.get('markets', []):
+                    self._entry(league, market['key'], bookmaker['key'])[1] += 1
+                    for outcome in market.get('outcomes', []):
+                        prices[(market['key'], outcome['name'], outcome.get('point'))].append(
+                            (outcome['price'], bookmaker['key'])
+                        )
+
+            for (market, _, _), offers in prices.items():
+                best_price = max(price for price, _ in offers)
+                leaders = [key for price, key in offers if price >= best_price * (1 - BEST_PRICE_TOLERANCE)]
+                for bookmaker in leaders:
+                    self._entry(league, market, bookmaker)[0] += 1 / len(leaders)
+
+        self.last_full_sweep[league] = time.time() if swept_at is None else swept_at
+        self._dirty_leagues.add(league)
+
+    def learn_keys(self, games: List[Dict[str, Any]]):
+        """Mapeia títulos de casas para as chaves aceitas pelo parâmetro `bookmakers`"""
+        for game in games:
+            for bookmaker in game.get('bookmakers', []):
+                self.bookmaker_keys[bookmaker['title']] = bookmaker['key']
+
+    def observe_opportunities(self, opportunities: list):
+        """Casas das sugestões enviadas ganham prioridade nas requisições estreitadas"""
+        for opportunity in opportunities:
+            bookmaker = self.bookmaker_keys.get(opportunity.bookmaker)
+            if bookmaker and opportunity.market_key:
+                self._entry(opportunity.league, opportunity.market_key, bookmaker)[2] += 1
+                self._dirty_leagues.add(opportunity.league)
+
+    def _entry(self, league: str, market: str, bookmaker: str) -> List[float]:
+        key = (league, market, bookmaker)
+        if key not in self.stats:
+            self.stats[key] = [0.0, 0.0, 0.0]
+        return self.stats[key]
+
+    def take_pending(self) -> Tuple[List[tuple], List[tuple]]:
+        """Estatísticas e varreduras das ligas alteradas desde a última persistência"""
+        leagues, self._dirty_leagues = self._dirty_leagues, set()
+        stats_rows = [
+            (*key, *values) for key, values in self.stats.items() if key[0] in leagues
+        ]
+        sweep_rows = [
+            (league, self.last_full_sweep[league]) for league in leagues if league in self.last_full_sweep
+        ]
+        return stats_rows, sweep_rows
@@ -0,0 +1,292 @@
+"""
+Índice normalizado de odds por jogo, mercado e linha
+"""
+
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import List, Dict, Any, Optional, Tuple, Iterable
+
+# Lados esperados para cada mercado suportado
+MARKET_SIDES = {
+    'h2h': ('home', 'draw', 'away'),
+    'totals': ('Over', 'Under'),
+    'spreads': ('home', 'away'),
+}
+
+# Nomes de exibição usados nas mensagens e no banco
+MARKET_LABELS = {
+    'h2h': '1X2',
+    'totals': 'Over/Under',
+    'spreads': 'Handicap',
+}
+
+
+def line_key(point: Optional[float]) -> Optional[float]:
+    """Normaliza o ponto de uma linha para uso como chave (evita igualdade de float)"""
+    if point is None:
+        return None
+    return round(float(point), 2)
+
+
+def parse_kickoff(commence_time: str) -> int:
+    """Converte o commence_time ISO 8601 da API em epoch UTC (segundos)"""
+    kickoff = datetime.fromisoformat(commence_time.replace('Z', '+00:00'))
+    if kickoff.tzinfo is None:
+        kickoff = kickoff.replace(tzinfo=timezone.utc)
+    return int(kickoff.timestamp())
+
+
+def kickoff_timestamp(game: Dict[str, Any]) -> int:
+    """Epoch do início do jogo, calculado na ingestão (ou agora, uma única vez)"""
+    commence_ts = game.get('commence_ts')
+    if commence_ts is None:
+        commence_ts = game['commence_ts'] = parse_kickoff(game['commence_time'])
+    return commence_ts
+
+
+def kickoff_datetime(commence_ts: int) -> datetime:
+    """Horário de início (UTC) para exibição"""
+    return datetime.fromtimestamp(commence_ts, tz=timezone.utc)
+
+
+@dataclass
+class MarketLine:
+    """Preços de todas as casas para uma linha de um mercado"""
+    market: str
+    point: Optional[float]
+    sides: Tuple[str, ...]
+    prices: List[List[float]] = field(default_factory=list)
+    bookmakers: List[List[str]] = field(default_factory=list)
+    best_prices: List[float] = field(default_factory=list)
+    best_bookmakers: List[str] = field(default_factory=list)
+
+    def __post_init__(self):
+        if not self.prices:
+            self.prices = [[] for _ in self.sides]
+            self.bookmakers = [[] for _ in self.sides]
+
+    def add_price(self, side_idx: int, price: float, bookmaker: str):
+        """Adiciona o preço de uma casa para um lado da linha"""
+        self.prices[side_idx].append(price)
+        self.bookmakers[side_idx].append(bookmaker)
+
+    def finalize(self):
+        """Calcula melhor preço e casa por lado (uma única vez por linha)"""
+        self.best_prices = []
+        self.best_bookmakers = []
+        for prices, bookmakers in zip(self.prices, self.bookmakers):
+            if not prices:
+                self.best_prices.append(0.0)
+                self.best_bookmakers.append('')
+                continue
+            best_idx = max(range(len(prices)), key=prices.__getitem__)
+            self.best_prices.append(prices[best_idx])
+            self.best_bookmakers.append(bookmakers[best_idx])
+
+    @property
+    def is_complete(self) -> bool:
+        """Indica se todos os lados da linha possuem ao menos um preço"""
+        return all(self.best_prices)
+
+    def mean_price(self, side_idx: int) -> float:
+        """Média dos preços de um lado entre as casas"""
+        prices = self.prices[side_idx]
+        return sum(prices) / len(prices) if prices else 0.0
+
+    def selection_label(self, side_idx: int, home_team: str, away_team: str) -> str:
+        """Texto da seleção no formato usado nas mensagens"""
+        side = self.sides[side_idx]
+        if self.market == 'h2h':
+            return {'home': home_team, 'draw': 'Empate', 'away': away_team}[side]
+        if self.market == 'totals':
+            return f"{side} {self.point:g}"
+        # Handicap: a linha é guardada na perspectiva do mandante
+        point = (self.point if side == 'home' else -self.point) + 0.0
+        team = home_team if side == 'home' else away_team
+        return f"{team} {point:+g}"
+
+
+@dataclass
+class GameIndex:
+    """Índice de odds de um jogo, construído em uma única passada pelos bookmakers"""
+    game_id: str
+    home_team: str
+    away_team: str
+    league: str
+    commence_time: str
+    commence_ts: int = 0
+    # Ids do registro canônico (0 quando o jogo não foi canonicalizado)
+    home_id: int = 0
+    away_id: int = 0
+    league_id: int = 0
+    # Horário (epoch) da coleta do jogo; 0 quando desconhecido
+    fetched_at: float = 0.0
+    lines: Dict[Tuple[str, Optional[float]], MarketLine] = field(default_factory=dict)
+
+    @classmethod
+    def from_game(cls, game: Dict[str, Any], registry=None) -> 'GameIndex':
+        """Constrói o índice a partir do jogo no formato da The Odds API
+
+        Com um NameRegistry, outcomes com apelidos do mandante/visitante também são reconhecidos.
+        """
+        index = cls(
+            game_id=game['id'],
+            home_team=game['home_team'],
+            away_team=game['away_team'],
+            league=game.get('sport', 'Unknown'),
+            commence_time=game['commence_time'],
+            commence_ts=kickoff_timestamp(game),
+            home_id=game.get('home_id', 0),
+            away_id=game.get('away_id', 0),
+            league_id=game.get('league_id', 0),
+            fetched_at=game.get('fetched_at', 0.0),
+        )
+
+        for bookmaker in game.get('bookmakers', []):
+            title = bookmaker['title']
+            for market in bookmaker.get('markets', []):
+                key = market['key']
+                if key not in MARKET_SIDES:
+                    continue
+                for outcome in market['outcomes']:
+                    resolved = index._resolve_outcome(key, outcome, registry)
+                    if resolved is None:
+                        continue
+                    point, side = resolved
+                    line = index.lines.get((key, point))
+                    if line is None:
+                        line = MarketLine(market=key, point=point, sides=MARKET_SIDES[key])
+                        index.lines[(key, point)] = line
+                    line.add_price(MARKET_SIDES[key].index(side), outcome['price'], title)
+
+        for line in index.lines.values():
+            line.finalize()
+
+        return index
+
+    @classmethod
+    def from_prices(cls, game_id: str, home_team: str, away_team: str, league: str,
+                    commence_time: str, prices: Iterable[Tuple[str, Optional[float], str, str, float]],
+                    commence_ts: Optional[int] = None) -> 'GameIndex':
+        """Constrói o índice a partir de preços já normalizados (market, point, side, bookmaker, price)"""
+        index = cls(
+            game_id=game_id,
+            home_team=home_team,
+            away_team=away_team,
+            league=league,
+            commence_time=commence_time,
+            commence_ts=parse_kickoff(commence_time) if commence_ts is None else commence_ts,
+        )
+
+        for market, point, side, bookmaker, price in prices:
+            sides = MARKET_SIDES.get(market)
+            if sides is None or side not in sides:
+                continue
+            line = index.lines.get((market, point))
+            if line is None:
+                line = MarketLine(market=market, point=point, sides=sides)
+                index.lines[(market, point)] = line
+            line.add_price(sides.index(side), price, bookmaker)
+
+        for line in index.lines.values():
+            line.finalize()
+
+        return index
+
+    @property
+    def event_key(self) -> Tuple[int, ...]:
+        """Identidade canônica do evento; vazia se o jogo não foi canonicalizado"""
+        if not self.home_id:
+            return ()
+        return (self.league_id, self.home_id, self.away_id, self.commence_ts)
+
+    def _team_side(self, name: str, registry) -> Optional[str]:
+        """Lado ('home'/'away') de um nome de time: pelo id canônico (com aliases) se o jogo foi canonicalizado"""
+        if registry is not None and self.home_id:
+            team_id = registry.lookup('team', name)
+            if team_id is None:
+                return None
+            if team_id == self.home_id:
+                return 'home'
+            if team_id == self.away_id:
+                return 'away'
+            return None
+        if name == self.home_team:
+            return 'home'
+        if name == self.away_team:
+            return 'away'
+        return None
+
+    def _resolve_outcome(self, market: str, outcome: Dict[str, Any],
+                         registry=None) -> Optional[Tuple[Optional[float], str]]:
+        """Converte um outcome da API em (linha, lado)"""
+        name = outcome['name']
+        if market == 'h2h':
+            if name == 'Draw':
+                return None, 'draw'
+            side = self._team_side(name, registry)
+            return (None, side) if side else None
+
+        point = outcome.get('point')
+        if point is None:
+            return None
+
+        if market == 'totals':
+            if name not in ('Over', 'Under'):
+                return None
+            return line_key(point), name
+
+        # spreads: linha sempre na perspectiva do mandante
+        side = self._team_side(name, registry)
+        if side == 'home':
+            return line_key(point), 'home'
+        if side == 'away':
+            return line_key(-point), 'away'
+        return None
+
+    def market_lines(self, market: str) -> List[MarketLine]:
+        """Linhas de um mercado ordenadas pelo ponto"""
+        lines = [line for (key, _), line in self.lines.items() if key == market]
+        lines.sort(key=lambda line: line.point if line.point is not None else 0.0)
+        return lines
+
+
+def settle_selection(market: str, side: str, point: Optional[float],
+                     home_goals: int, away_goals: int, odds: float) -> float:
+    """Lucro por unidade apostada numa seleção, dado o placar final"""
+    if market == 'h2h':
+        if home_goals > away_goals:
+            winner = 'home'
+        elif home_goals < away_goals:
+            winner = 'away'
+        else:
+            winner = 'draw'
+        return odds - 1 if side == winner else -1.0
+
+    # Linhas asiáticas (x.25 / x.75): metade do stake em cada linha vizinha
+    if (point * 4) % 2 == 1:
+        return (settle_selection(market, side, point - 0.25, home_goals, away_goals, odds) +
+                settle_selection(market, side, point + 0.25, home_goals, away_goals, odds)) / 2
+
+    if market == 'totals':
+        total = home_goals + away_goals
+        margin = total - point if side == 'Over' else point - total
+    else:
+        # Handicap: linha na perspectiva do mandante
+        goal_diff = home_goals - away_goals
+        margin = goal_diff + point if side == 'home' else -goal_diff - point
+
+    if margin > 0:
+        return odds - 1
+    if margin == 0:
+        return 0.0  # Devolução (push)
+    return -1.0
+
+# Mesma regra de settle_selection em SQL, por mercado: margem da seleção (em gols)
+# sobre as colunas side, point, home e away; > 0 ganha, 0 devolve, < 0 perde
+SETTLEMENT_MARGIN_SQL = {
+    'h2h': """CASE WHEN side = CASE WHEN home > away THEN 'home' WHEN home < away THEN 'away' ELSE 'draw' END
+              THEN 1 ELSE -1 END""",
+    'totals': "CASE side WHEN 'Over' THEN home + away - point ELSE point - home - away END",
+    'spreads': "CASE side WHEN 'home' THEN home - away + point ELSE away - home - point END",
+}
@@ -0,0 +1,158 @@
+"""
+Profiler por amostragem acionado sob demanda (sinal ou endpoint HTTP)
+"""
+
+import asyncio
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+Stack = Tuple[str, ...]
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    name = getattr(code, 'co_qualname', code.co_name)
+    return f"{name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+class SamplingProfiler:
+    """Coleta pilhas periodicamente durante uma janela limitada"""
+
+    def __init__(self, output_dir: str = 'profiles', interval: float = 0.005,
+                 task_interval: float = 0.05, max_duration: float = 120.0):
+        self.output_dir = Path(output_dir)
+        self.interval = interval
+        self.task_interval = task_interval
+        self.max_duration = max_duration
+        self._running = False
+        # Janelas acionadas por sinal (referência forte até terminarem)
+        self._tasks: Set[asyncio.Task] = set()
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    def _sample_threads(self, duration: float, counts: Counter):
+        """Executado em thread própria: amostra as pilhas de todas as outras threads"""
+        own_id = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        deadline = time.monotonic() + duration
+
+        while time.monotonic() < deadline:
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                stack.append(f"thread:{names.get(thread_id, thread_id)}")
+                counts[tuple(reversed(stack))] += 1
+            time.sleep(self.interval)
+
+    async def _sample_tasks(self, duration: float, counts: Counter):
+        """Executado no event loop: amostra onde cada task asyncio está suspensa"""
+        current = asyncio.current_task()
+        deadline = time.monotonic() + duration
+
+        while time.monotonic() < deadline:
+            for task in asyncio.all_tasks():
+                if task is current or task.done():
+                    continue
+                frames = task.get_stack()
+                if not frames:
+                    continue
+                stack = (f"task:{task.get_name()}",) + tuple(_frame_label(frame) for frame in frames)
+                counts[stack] += 1
+            await asyncio.sleep(self.task_interval)
+
+    async def profile(self, duration: float) -> Optional[Path]:
+        """Executa uma janela de amostragem e grava o arquivo .folded"""
+        if self._running:
+            logger.warning("Profiler já está em execução")
+            return None
+
+        duration = max(0.1, min(duration, self.max_duration))
+        self._running = True
+        thread_counts: Counter = Counter()
+        task_counts: Counter = Counter()
+
+        try:
+            logger.info(f"Profiler iniciado por {duration:.0f}s")
+            sampler = threading.Thread(
+                target=self._sample_threads,
+                args=(duration, thread_counts),
+                name='sampling-profiler',
+                daemon=True
+            )
+            sampler.start()
+            await self._sample_tasks(duration, task_counts)
+
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, sampler.join)
+
+            path = await loop.run_in_executor(None, self._write, thread_counts + task_counts)
+            logger.info(f"Profile gravado em {path} ({sum(thread_counts.values())} amostras de threads, "
+                        f"{sum(task_counts.values())} de tasks)")
+            return path
+        finally:
+            self._running = False
+
+    def _write(self, counts: Counter) -> Path:
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        path = self.output_dir / f"profile-{time.strftime('%Y%m%d-%H%M%S')}.folded"
+        with open(path, 'w') as f:
+            for stack, count in counts.most_common():
+                f.write(f"{';'.join(stack)} {count}\n")
+        return path
+
+    def install_signal_handler(self, duration: float, signum: int = getattr(signal, 'SIGUSR1', 0)) -> bool:
+        """Aciona o profiler ao receber `signum` (SIGUSR1 por padrão)"""
+        if not signum:
+            return False
+
+        loop = asyncio.get_running_loop()
+        try:
+            loop.add_signal_handler(signum, self._start, duration)
+        except (NotImplementedError, RuntimeError) as e:
+            logger.warning(f"Não foi possível registrar o sinal do profiler: {e}")
+            return False
+
+        logger.info(f"Profiler disponível via sinal {signal.Signals(signum).name} (pid {os.getpid()})")
+        return True
+
+    def _start(self, duration: float):
+        task = asyncio.get_running_loop().create_task(self.profile(duration))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def close(self, app=None):
+        """Cancela janelas em andamento acionadas por sinal"""
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def add_routes(self, app, default_duration: float):
+        """Registra GET /profile?seconds=N em uma aplicação aiohttp (encerrada junto com ela)"""
+        from aiohttp import web
+
+        async def handle_profile(request):
+            try:
+                seconds = float(request.query.get('seconds', default_duration))
+            except ValueError:
+                return web.Response(status=400, text='seconds inválido\n')
+
+            path = await self.profile(seconds)
+            if path is None:
+                return web.Response(status=409, text='profiler já está em execução\n')
+            return web.FileResponse(path)
+
+        app.router.add_get('/profile', handle_profile)
+        app.on_cleanup.append(self.close)
@@ -0,0 +1,250 @@
+"""
+Coleta de odds a partir de múltiplas fontes
+"""
+
+import asyncio
+import json
+import logging
+import time
+from pathlib import Path
+from typing import Awaitable, Callable, List, Dict, Any, Optional, Tuple
+
+from src.data_collector import OddsProvider, OddsDataCollector
+from src.metrics import metrics
+from src.narrowing import RequestPlanner
+from src.odds_index import parse_kickoff
+from src.registry import NameRegistry, game_names
+
+logger = logging.getLogger(__name__)
+
+class FileOddsProvider(OddsProvider):
+    """Fonte offline: arquivos JSON com jogos no formato da The Odds API
+
+    Aceita um arquivo ou um diretório de arquivos *.json contendo uma lista de
+    jogos ou uma gravação do OddsDataCollector ({"data": [...]}). Arquivos só
+    são relidos quando modificados.
+    """
+
+    name = 'file'
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        # arquivo -> (mtime, jogos)
+        self._cache: Dict[Path, Tuple[float, List[Dict[str, Any]]]] = {}
+
+    def _files(self) -> List[Path]:
+        if self.path.is_dir():
+            return sorted(self.path.glob('*.json'))
+        return [self.path] if self.path.exists() else []
+
+    def _read(self, path: Path) -> List[Dict[str, Any]]:
+        mtime = path.stat().st_mtime
+        cached = self._cache.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+
+        with open(path) as f:
+            data = json.load(f)
+        games = data.get('data', []) if isinstance(data, dict) else data
+
+        for game in games:
+            game.setdefault('sport', game.get('sport_key', 'Unknown'))
+            game['commence_ts'] = parse_kickoff(game['commence_time'])
+            # Preços do arquivo valem a partir da sua modificação
+            game.setdefault('fetched_at', mtime)
+
+        self._cache[path] = (mtime, games)
+        return games
+
+    def _load(self, hours_ahead: int, leagues: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        now_ts = int(time.time())
+        cutoff_ts = now_ts + hours_ahead * 3600
+        games = []
+
+        for path in self._files():
+            try:
+                games.extend(
+                    game for game in self._read(path)
+                    if now_ts < game['commence_ts'] < cutoff_ts
+                    and (leagues is None or game['sport'] in leagues)
+                )
+            except (OSError, ValueError, KeyError) as e:
+                logger.error(f"Erro ao ler {path}: {str(e)}")
+
+        logger.info(f"{len(games)} jogos carregados de {self.path}")
+        return games
+
+    async def fetch_upcoming_games(self, hours_ahead: int = 24, checkpoint=None,
+                                   leagues: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        # Leitura local: não há o que economizar com checkpoint
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self._load, hours_ahead, leagues)
+
+    def _load_scores(self, leagues: List[str], days_from: int) -> List[Dict[str, Any]]:
+        since_ts = int(time.time()) - days_from * 86400
+        events = []
+        for path in self._files():
+            try:
+                events.extend(
+                    game for game in self._read(path)
+                    if 'scores' in game and game['commence_ts'] >= since_ts and game['sport'] in leagues
+                )
+            except (OSError, ValueError, KeyError) as e:
+                logger.error(f"Erro ao ler {path}: {str(e)}")
+        return events
+
+    async def fetch_scores(self, leagues: List[str], days_from: int = 3) -> List[Dict[str, Any]]:
+        # Eventos com 'scores' nos mesmos arquivos (formato do endpoint /scores)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self._load_scores, leagues, days_from)
+
+def _merge_bookmakers(target: Dict[str, Any], source: Dict[str, Any]):
+    """Acrescenta ao jogo as casas da outra fonte que ele ainda não tem"""
+    bookmakers = target.setdefault('bookmakers', [])
+    titles = {bookmaker['title'] for bookmaker in bookmakers}
+    for bookmaker in source.get('bookmakers', []):
+        if bookmaker['title'] not in titles:
+            titles.add(bookmaker['title'])
+            bookmakers.append(bookmaker)
+
+class MultiProviderCollector:
+    """Consulta várias fontes em paralelo e unifica os jogos por evento canônico"""
+
+    def __init__(self, providers: List[OddsProvider], registry: Optional[NameRegistry] = None,
+                 timeout: float = 60.0,
+                 allocate: Optional[Callable[[List[Tuple[str, str]]], Awaitable[List[Tuple[int, str]]]]] = None):
+        self.providers = providers
+        self.registry = registry if registry is not None else NameRegistry()
+        self.timeout = timeout
+        # Alocação de ids no banco (DatabaseManager.allocate_entities); sem ela, ids locais
+        self.allocate = allocate
+
+    async def _register(self, events: List[Dict[str, Any]]):
+        """Aloca no banco os nomes novos antes da canonicalização (mesmos ids em todos os workers)"""
+        if self.allocate is None:
+            return
+        names = self.registry.missing(name for event in events for name in game_names(event))
+        if names:
+            self.registry.merge(names, await self.allocate(names))
+
+    async def _fetch(self, provider: OddsProvider, hours_ahead: int, checkpoint=None,
+                     leagues: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Busca de uma fonte liga a liga; em timeout ou erro, mantém as ligas já recebidas"""
+        start = time.perf_counter()
+        status = 'ok'
+        games: List[Dict[str, Any]] = []
+        batches = provider.iter_upcoming_games(hours_ahead, checkpoint, leagues)
+        try:
+            while True:
+                try:
+                    games.extend(await asyncio.wait_for(batches.__anext__(), self.timeout))
+                except StopAsyncIteration:
+                    break
+        except asyncio.TimeoutError:
+            status = 'timeout'
+            logger.warning(
+                f"Fonte {provider.name} excedeu {self.timeout:.0f}s em uma liga; "
+                f"mantidos {len(games)} jogos já coletados neste ciclo"
+            )
+        except Exception as e:
+            status = 'error'
+            logger.error(f"Erro na fonte {provider.name} ({len(games)} jogos já coletados mantidos): {str(e)}")
+        finally:
+            await batches.aclose()
+            metrics.observe('provider_fetch_seconds', time.perf_counter() - start,
+                            provider=provider.name, status=status)
+        return games
+
+    async def fetch_upcoming_games(self, hours_ahead: int = 24, checkpoint=None,
+                                   leagues: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Jogos de todas as fontes, sem duplicatas (a primeira fonte tem prioridade)"""
+        results = await asyncio.gather(*(
+            self._fetch(provider, hours_ahead, checkpoint, leagues) for provider in self.providers
+        ))
+
+        await self._register([game for games in results for game in games])
+        merged: Dict[tuple, Dict[str, Any]] = {}
+        duplicates = 0
+        for provider, games in zip(self.providers, results):
+            for game in games:
+                event_key = self.registry.canonicalize_game(game)
+                existing = merged.get(event_key)
+                if existing is None:
+                    # Cópia rasa: jogos de fontes com cache não podem ser alterados pela mescla
+                    merged[event_key] = {
+                        **game,
+                        'bookmakers': list(game.get('bookmakers', [])),
+                        'providers': [provider.name],
+                    }
+                else:
+                    duplicates += 1
+                    _merge_bookmakers(existing, game)
+                    if provider.name not in existing['providers']:
+                        existing['providers'].append(provider.name)
+
+        games = sorted(merged.values(), key=lambda game: game['commence_ts'])
+        if len(self.providers) > 1:
+            logger.info(f"{len(games)} jogos de {len(self.providers)} fontes ({duplicates} duplicados unificados)")
+        return games
+
+    async def _fetch_scores(self, provider: OddsProvider, leagues: List[str],
+                            days_from: int) -> List[Dict[str, Any]]:
+        try:
+            return await asyncio.wait_for(provider.fetch_scores(leagues, days_from), self.timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Fonte {provider.name} excedeu {self.timeout:.0f}s ao buscar placares")
+        except Exception as e:
+            logger.error(f"Erro ao buscar placares na fonte {provider.name}: {str(e)}")
+        return []
+
+    async def fetch_scores(self, leagues: List[str], days_from: int = 3) -> List[Dict[str, Any]]:
+        """Eventos com placar de todas as fontes, canonicalizados e sem duplicatas"""
+        results = await asyncio.gather(*(
+            self._fetch_scores(provider, leagues, days_from) for provider in self.providers
+        ))
+
+        for events in results:
+            for event in events:
+                event.setdefault('sport', event.get('sport_key', 'Unknown'))
+        await self._register([event for events in results for event in events])
+
+        merged: Dict[tuple, Dict[str, Any]] = {}
+        for events in results:
+            for event in events:
+                event['commence_ts'] = parse_kickoff(event['commence_time'])
+                event_key = self.registry.canonicalize_game(event)
+                # Evento concluído em uma fonte prevalece sobre o mesmo em andamento em outra
+                existing = merged.get(event_key)
+                if existing is None or (event.get('completed') and not existing.get('completed')):
+                    merged[event_key] = event
+        return list(merged.values())
+
+    async def close(self):
+        for provider in self.providers:
+            await provider.close()
+
+def build_collector(config, registry: Optional[NameRegistry] = None,
+                    planner: Optional[RequestPlanner] = None, allocate=None) -> MultiProviderCollector:
+    """Monta o coletor a partir de ODDS_PROVIDERS (ex.: 'the-odds-api,file')"""
+    providers: List[OddsProvider] = []
+
+    for name in config.ODDS_PROVIDERS:
+        if name == OddsDataCollector.name:
+            collector = OddsDataCollector(
+                config.ODDS_API_KEY,
+                base_url=config.ODDS_API_BASE_URL,
+                config=config,
+                record_dir=config.ODDS_RECORD_DIR or None,
+                replay_dir=config.ODDS_REPLAY_DIR or None
+            )
+            collector.planner = planner
+            providers.append(collector)
+        elif name == FileOddsProvider.name:
+            if not config.ODDS_FILE_PROVIDER_PATH:
+                logger.warning("Fonte 'file' configurada sem ODDS_FILE_PROVIDER_PATH; ignorada")
+                continue
+            providers.append(FileOddsProvider(config.ODDS_FILE_PROVIDER_PATH))
+        else:
+            logger.warning(f"Fonte de odds desconhecida: {name}")
+
+    return MultiProviderCollector(providers, registry=registry, timeout=config.PROVIDER_TIMEOUT, allocate=allocate)
@@ -0,0 +1,186 @@
+"""
+Registro canônico de nomes (times, ligas e casas de apostas)
+"""
+
+import json
+import logging
+import sys
+import unicodedata
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Any
+
+from src.odds_index import kickoff_timestamp
+
+logger = logging.getLogger(__name__)
+
+TEAM = 'team'
+LEAGUE = 'league'
+BOOKMAKER = 'bookmaker'
+
+# Identidade canônica de um evento: (liga, mandante, visitante, início)
+EventKey = Tuple[int, int, int, int]
+
+def normalize_name(name: str) -> str:
+    """Chave de comparação: sem acentos, minúscula e com espaços colapsados"""
+    decomposed = unicodedata.normalize('NFKD', name)
+    stripped = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return ' '.join(stripped.casefold().replace('.', ' ').split())
+
+def game_names(game: Dict[str, Any]) -> List[Tuple[str, str]]:
+    """Nomes (tipo, nome) que a canonicalização de um jogo resolve"""
+    names = [
+        (TEAM, game['home_team']),
+        (TEAM, game['away_team']),
+        (LEAGUE, game.get('sport') or game.get('sport_key', 'Unknown')),
+    ]
+    names.extend((BOOKMAKER, bookmaker['title']) for bookmaker in game.get('bookmakers', []))
+    return names
+
+class NameRegistry:
+    """Mapeia nomes e aliases para ids inteiros por tipo (time, liga, casa)"""
+
+    def __init__(self):
+        # (tipo, nome normalizado) -> id
+        self.ids: Dict[Tuple[str, str], int] = {}
+        # id -> nome canônico (internado)
+        self.names: Dict[int, str] = {}
+        self.kinds: Dict[int, str] = {}
+        # Ids provisórios (negativos) de nomes ainda não alocados no banco: nunca colidem
+        # com os ids do banco, nem com os adotados por merge enquanto o nome espera a alocação
+        self.next_local_id = -1
+        # Novos registros ainda não persistidos
+        self.pending_entities: List[Tuple[int, str, str]] = []
+        self.pending_aliases: List[Tuple[str, str, int]] = []
+        # Cache por string exata (evita normalizar o mesmo nome a cada ciclo)
+        self._exact: Dict[Tuple[str, str], int] = {}
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def load(self, entities: List[Tuple[int, str, str]], aliases: List[Tuple[str, str, int]]):
+        """Carrega o registro persistido (id, tipo, nome) e (tipo, alias, id)"""
+        for entity_id, kind, name in entities:
+            self.names[entity_id] = sys.intern(name)
+            self.kinds[entity_id] = kind
+            self.ids[(kind, normalize_name(name))] = entity_id
+        for kind, alias, entity_id in aliases:
+            self.ids[(kind, alias)] = entity_id
+        self._exact.clear()
+
+    def lookup(self, kind: str, name: str) -> Optional[int]:
+        """Id de um nome ou alias conhecido (None se desconhecido)"""
+        entity_id = self._exact.get((kind, name))
+        if entity_id is None:
+            entity_id = self.ids.get((kind, normalize_name(name)))
+            if entity_id is not None:
+                self._exact[(kind, name)] = entity_id
+        return entity_id
+
+    def missing(self, names: Iterable[Tuple[str, str]]) -> List[Tuple[str, str]]:
+        """Nomes (tipo, nome) ainda sem id, um por chave normalizada"""
+        seen = set()
+        result = []
+        for kind, name in names:
+            if self.lookup(kind, name) is not None:
+                continue
+            key = (kind, normalize_name(name))
+            if key not in seen:
+                seen.add(key)
+                result.append((kind, name))
+        return result
+
+    def merge(self, names: List[Tuple[str, str]], allocated: List[Tuple[int, str]]):
+        """Adota os ids alocados no banco (id, nome canônico) para `names`
+
+        Um id local do mesmo nome (de resolve) é substituído pelo do banco.
+        """
+        for (kind, name), (entity_id, canonical) in zip(names, allocated):
+            key = (kind, normalize_name(name))
+            local = self.ids.get(key)
+            if local is not None and local != entity_id:
+                self._rebind(local, entity_id)
+            self.names[entity_id] = sys.intern(canonical)
+            self.kinds[entity_id] = kind
+            self.ids[key] = entity_id
+            self.ids.setdefault((kind, normalize_name(canonical)), entity_id)
+        self._exact.clear()
+
+    def _rebind(self, old: int, new: int):
+        for key, entity_id in self.ids.items():
+            if entity_id == old:
+                self.ids[key] = new
+        self.pending_entities = [entity for entity in self.pending_entities if entity[0] != old]
+        self.pending_aliases = [
+            (kind, alias, new if entity_id == old else entity_id) for kind, alias, entity_id in self.pending_aliases
+        ]
+        self.names.pop(old, None)
+        self.kinds.pop(old, None)
+
+    def resolve(self, kind: str, name: str) -> int:
+        """Id de um nome, registrando-o como nova entidade se for desconhecido
+
+        O id local é provisório quando o registro é persistido: store_registry
+        (ou merge) o troca pelo id alocado no banco. Nomes de jogos devem ser
+        alocados antes (missing + merge) para que ids locais não cheguem às linhas.
+        """
+        entity_id = self.lookup(kind, name)
+        if entity_id is not None:
+            return entity_id
+
+        entity_id = self.next_local_id
+        self.next_local_id -= 1
+        canonical = sys.intern(name)
+        self.names[entity_id] = canonical
+        self.kinds[entity_id] = kind
+        self.ids[(kind, normalize_name(name))] = entity_id
+        self._exact[(kind, name)] = entity_id
+        self.pending_entities.append((entity_id, kind, canonical))
+        return entity_id
+
+    def add_alias(self, kind: str, alias: str, canonical: str) -> int:
+        """Associa um apelido ao nome canônico (que é registrado se necessário)"""
+        entity_id = self.resolve(kind, canonical)
+        key = (kind, normalize_name(alias))
+        if self.ids.get(key) != entity_id:
+            self.ids[key] = entity_id
+            self.pending_aliases.append((kind, key[1], entity_id))
+            # Nomes exatos em cache podem ter mudado de entidade
+            self._exact.clear()
+        return entity_id
+
+    def load_aliases_file(self, path: str) -> int:
+        """Carrega aliases de um JSON {"team": {"Man Utd": "Manchester United"}, ...}"""
+        with open(Path(path)) as f:
+            data = json.load(f)
+
+        count = 0
+        for kind, mapping in data.items():
+            for alias, canonical in mapping.items():
+                self.add_alias(kind, alias, canonical)
+                count += 1
+        logger.info(f"Carregados {count} aliases de {path}")
+        return count
+
+    def name(self, entity_id: int) -> str:
+        """Nome canônico de um id"""
+        return self.names[entity_id]
+
+    def take_pending(self) -> Tuple[List[Tuple[int, str, str]], List[Tuple[str, str, int]]]:
+        """Retorna e limpa os registros ainda não persistidos"""
+        entities, aliases = self.pending_entities, self.pending_aliases
+        self.pending_entities, self.pending_aliases = [], []
+        return entities, aliases
+
+    def canonicalize_game(self, game: Dict[str, Any]) -> EventKey:
+        """Anota os ids no jogo e interna os nomes repetidos; retorna a identidade do evento"""
+        home_id = game['home_id'] = self.resolve(TEAM, game['home_team'])
+        away_id = game['away_id'] = self.resolve(TEAM, game['away_team'])
+        league_id = game['league_id'] = self.resolve(LEAGUE, game.get('sport') or game.get('sport_key', 'Unknown'))
+
+        # Mantém o texto da fonte (os outcomes usam o mesmo), mas compartilhando o objeto
+        game['home_team'] = sys.intern(game['home_team'])
+        game['away_team'] = sys.intern(game['away_team'])
+        for bookmaker in game.get('bookmakers', []):
+            bookmaker['title'] = self.names[self.resolve(BOOKMAKER, bookmaker['title'])]
+
+        return league_id, home_id, away_id, kickoff_timestamp(game)
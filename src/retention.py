@@ -0,0 +1,286 @@
+"""
+Retenção, downsampling e arquivamento do histórico
+"""
+
+import logging
+import sqlite3
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Tabelas movidas para os arquivos de temporada
+ARCHIVED_TABLES = ('games', 'odds_snapshots', 'opportunities', 'game_results')
+
+# Jogos processados por transação (mantém os locks curtos para o bot)
+GAMES_PER_BATCH = 200
+
+# Limite padrão de bancos anexados do SQLite (inclui o principal e o temp)
+MAX_ATTACHED = 10
+
+def season_of(commence_ts: int, start_month: int = 7) -> int:
+    """Ano de início da temporada de um jogo (temporadas de agosto a maio começam em julho)"""
+    kickoff = datetime.fromtimestamp(commence_ts, tz=timezone.utc)
+    return kickoff.year if kickoff.month >= start_month else kickoff.year - 1
+
+def season_bounds(season: int, start_month: int = 7) -> Tuple[int, int]:
+    """Intervalo [início, fim) da temporada em epoch UTC"""
+    start = datetime(season, start_month, 1, tzinfo=timezone.utc)
+    end = datetime(season + 1, start_month, 1, tzinfo=timezone.utc)
+    return int(start.timestamp()), int(end.timestamp())
+
+def season_label(season: int) -> str:
+    return f"{season}-{(season + 1) % 100:02d}"
+
+def archive_dir_for(db_path: str, archive_dir: str = '') -> Path:
+    return Path(archive_dir) if archive_dir else Path(db_path).resolve().parent / 'archive'
+
+def archive_path(db_path: str, season: int, archive_dir: str = '') -> Path:
+    """Arquivo da temporada: <dir>/<nome do banco>_<temporada>.db"""
+    return archive_dir_for(db_path, archive_dir) / f"{Path(db_path).stem}_{season_label(season)}.db"
+
+def list_archives(db_path: str, archive_dir: str = '') -> List[Path]:
+    directory = archive_dir_for(db_path, archive_dir)
+    return sorted(directory.glob(f"{Path(db_path).stem}_*.db")) if directory.exists() else []
+
+def _columns(conn: sqlite3.Connection, schema: str, table: str) -> List[str]:
+    return [row[1] for row in conn.execute(f'PRAGMA {schema}.table_info({table})')]
+
+def _attach_batch(conn: sqlite3.Connection, archives: List[Path], include_main: bool) -> List[str]:
+    """Anexa um lote de arquivos e (re)cria as views temporárias history_<tabela> sobre ele"""
+    schemas = []
+    for position, path in enumerate(archives):
+        schema = f'archive{position}'
+        conn.execute('ATTACH DATABASE ? AS ' + schema, (str(path),))
+        schemas.append(schema)
+
+    for table in ARCHIVED_TABLES:
+        columns = _columns(conn, 'main', table)
+        # Fora do primeiro lote o principal só fornece as colunas (nenhuma linha)
+        selects = [f"SELECT {', '.join(columns)} FROM main.{table}" + ('' if include_main else ' WHERE 0')]
+        for schema in schemas:
+            available = set(_columns(conn, schema, table))
+            if not available:
+                continue
+            selects.append('SELECT ' + ', '.join(
+                column if column in available else f'NULL AS {column}' for column in columns
+            ) + f' FROM {schema}.{table}')
+        conn.execute(f'DROP VIEW IF EXISTS temp.history_{table}')
+        conn.execute(f"CREATE TEMP VIEW history_{table} AS {' UNION ALL '.join(selects)}")
+    return schemas
+
+def history_batches(conn: sqlite3.Connection, db_path: str, archive_dir: str = '') -> Iterator[List[Path]]:
+    """Percorre o histórico em lotes de arquivos anexados, com as views history_<tabela>
+
+    O SQLite limita os bancos anexados por conexão, então os arquivos de
+    temporada são anexados no máximo MAX_ATTACHED - 2 por vez: o primeiro
+    lote une o banco principal e os arquivos mais antigos, os seguintes só
+    arquivos. Cada temporada fica inteira em um banco, então joins por jogo
+    dentro de um lote são completos. As views valem até o próximo lote;
+    cursores sobre elas devem ser consumidos antes de avançar.
+    """
+    archives = list_archives(db_path, archive_dir)
+    size = MAX_ATTACHED - 2
+    batches = [archives[start:start + size] for start in range(0, len(archives), size)] or [[]]
+
+    for position, batch in enumerate(batches):
+        schemas = _attach_batch(conn, batch, include_main=position == 0)
+        try:
+            yield batch
+        finally:
+            for table in ARCHIVED_TABLES:
+                conn.execute(f'DROP VIEW IF EXISTS temp.history_{table}')
+            for schema in schemas:
+                conn.execute(f'DETACH DATABASE {schema}')
+
+class HistoryCompactor:
+    """Downsampling de snapshots, retenção de logs e arquivamento por temporada"""
+
+    def __init__(self, db_path: str, full_resolution_hours: float = 6.0, bucket_seconds: int = 3600,
+                 min_age_hours: float = 48.0, log_retention_days: float = 90.0,
+                 season_start_month: int = 7, archive_grace_days: float = 30.0,
+                 archive_dir: str = '', vacuum: bool = False):
+        self.db_path = db_path
+        self.full_resolution_seconds = full_resolution_hours * 3600
+        self.bucket_seconds = bucket_seconds
+        self.min_age_seconds = min_age_hours * 3600
+        self.log_retention_seconds = log_retention_days * 86400
+        self.season_start_month = season_start_month
+        self.archive_grace_seconds = archive_grace_days * 86400
+        self.archive_dir = archive_dir
+        # VACUUM completo reescreve o banco inteiro (lock exclusivo durante toda a cópia)
+        self.vacuum = vacuum
+
+    def _connect(self) -> sqlite3.Connection:
+        # Espera pelos locks do bot em vez de falhar
+        return sqlite3.connect(self.db_path, timeout=60.0)
+
+    def downsample_snapshots(self, conn: sqlite3.Connection, now: float) -> int:
+        """Reduz snapshots antigos e distantes do início a abertura + último preço por intervalo"""
+        cutoff = now - self.min_age_seconds
+        # Só séries com linhas que ficaram antigas desde a última execução
+        row = conn.execute("SELECT value FROM maintenance_state WHERE key = 'snapshots_compacted_until'").fetchone()
+        since = row[0] if row else 0.0
+
+        game_ids = [
+            game_id for (game_id,) in conn.execute('''
+                SELECT DISTINCT game_id FROM odds_snapshots WHERE captured_at >= ? AND captured_at < ?
+            ''', (since, cutoff))
+        ]
+
+        removed = 0
+        for start in range(0, len(game_ids), GAMES_PER_BATCH):
+            batch = game_ids[start:start + GAMES_PER_BATCH]
+            placeholders = ','.join('?' * len(batch))
+            cursor = conn.execute(f'''
+                DELETE FROM odds_snapshots WHERE id IN (
+                    SELECT id FROM (
+                        SELECT s.id, s.captured_at, g.commence_ts,
+                            ROW_NUMBER() OVER (
+                                PARTITION BY s.game_id, s.market, s.point, s.side, s.bookmaker
+                                ORDER BY s.captured_at, s.id
+                            ) AS opening_rank,
+                            ROW_NUMBER() OVER (
+                                PARTITION BY s.game_id, s.market, s.point, s.side, s.bookmaker,
+                                             CAST(s.captured_at / ? AS INTEGER)
+                                ORDER BY s.captured_at DESC, s.id DESC
+                            ) AS bucket_rank
+                        FROM odds_snapshots s
+                        JOIN games g ON g.id = s.game_id
+                        WHERE s.game_id IN ({placeholders})
+                    )
+                    WHERE captured_at < ? AND captured_at < commence_ts - ?
+                      AND opening_rank > 1 AND bucket_rank > 1
+                )
+            ''', (self.bucket_seconds, *batch, cutoff, self.full_resolution_seconds))
+            removed += cursor.rowcount
+            conn.commit()
+
+        conn.execute('''
+            INSERT OR REPLACE INTO maintenance_state (key, value) VALUES ('snapshots_compacted_until', ?)
+        ''', (cutoff,))
+        conn.commit()
+        return removed
+
+    def prune_logs(self, conn: sqlite3.Connection, now: float) -> int:
+        """Remove logs de execução, ciclos concluídos e notificações enviadas antigos"""
+        cutoff = now - self.log_retention_seconds
+        removed = conn.execute('''
+            DELETE FROM execution_logs WHERE execution_time < datetime(?, 'unixepoch')
+        ''', (cutoff,)).rowcount
+        removed += conn.execute('''
+            DELETE FROM cycle_checkpoints WHERE status != 'RUNNING' AND finished_at < ?
+        ''', (cutoff,)).rowcount
+        # Progresso só interessa a ciclos em andamento (inclui órfãos de ciclos já removidos)
+        removed += conn.execute('''
+            DELETE FROM cycle_progress
+            WHERE cycle_id NOT IN (SELECT id FROM cycle_checkpoints WHERE status = 'RUNNING')
+        ''').rowcount
+        removed += conn.execute('''
+            DELETE FROM notification_outbox WHERE sent_at < ?
+        ''', (cutoff,)).rowcount
+        conn.commit()
+        return removed
+
+    def finished_seasons(self, conn: sqlite3.Connection, now: float) -> List[int]:
+        """Temporadas ainda no banco principal encerradas há mais que a carência"""
+        row = conn.execute('SELECT MIN(commence_ts) FROM games WHERE commence_ts IS NOT NULL').fetchone()
+        if not row or row[0] is None:
+            return []
+
+        seasons = []
+        season = season_of(row[0], self.season_start_month)
+        while True:
+            _, end = season_bounds(season, self.season_start_month)
+            if end + self.archive_grace_seconds > now:
+                break
+            seasons.append(season)
+            season += 1
+        return seasons
+
+    def archive_season(self, conn: sqlite3.Connection, season: int) -> Dict[str, int]:
+        """Move jogos da temporada (e seus snapshots, oportunidades e resultados) para o arquivo"""
+        start, end = season_bounds(season, self.season_start_month)
+        path = archive_path(self.db_path, season, self.archive_dir)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        conn.execute('ATTACH DATABASE ? AS archive', (str(path),))
+        try:
+            moved = {}
+            conn.execute('BEGIN IMMEDIATE')
+            conn.execute('''
+                CREATE TEMP TABLE archived_games AS
+                SELECT id FROM main.games WHERE commence_ts >= ? AND commence_ts < ?
+            ''', (start, end))
+
+            for table in ARCHIVED_TABLES:
+                # Mesmo esquema do principal (colunas de migrações posteriores incluídas)
+                sql = conn.execute(
+                    "SELECT sql FROM main.sqlite_master WHERE type = 'table' AND name = ?", (table,)
+                ).fetchone()[0]
+                conn.execute(sql.replace(f'CREATE TABLE {table}', f'CREATE TABLE IF NOT EXISTS archive.{table}', 1))
+                archived_columns = set(_columns(conn, 'archive', table))
+                for column in _columns(conn, 'main', table):
+                    if column not in archived_columns:
+                        conn.execute(f'ALTER TABLE archive.{table} ADD COLUMN {column}')
+
+                columns = ', '.join(_columns(conn, 'main', table))
+                key = 'id' if table == 'games' else 'game_id'
+                conn.execute(f'''
+                    INSERT OR IGNORE INTO archive.{table} ({columns})
+                    SELECT {columns} FROM main.{table} WHERE {key} IN (SELECT id FROM temp.archived_games)
+                ''')
+                moved[table] = conn.execute(f'''
+                    DELETE FROM main.{table} WHERE {key} IN (SELECT id FROM temp.archived_games)
+                ''').rowcount
+
+            conn.execute('DROP TABLE temp.archived_games')
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            conn.execute('DETACH DATABASE archive')
+
+        logger.info(f"Temporada {season_label(season)} arquivada em {path}: {moved}")
+        return moved
+
+    def reclaim_space(self, conn: sqlite3.Connection) -> None:
+        """Devolve ao sistema o espaço liberado pelo arquivamento
+
+        Com auto_vacuum = INCREMENTAL (bancos criados pelo DatabaseManager)
+        só as páginas livres são liberadas; nos demais elas ficam para reuso
+        pelas próximas escritas, a menos que o VACUUM completo esteja ativo
+        (que também converte o banco para o modo incremental).
+        """
+        if self.vacuum:
+            conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+            conn.execute('VACUUM')
+        elif conn.execute('PRAGMA auto_vacuum').fetchone()[0] == 2:
+            # execute() avança o pragma um passo só (uma página); executescript roda até o fim
+            conn.executescript('PRAGMA incremental_vacuum')
+
+    def run(self, now: Optional[float] = None) -> Dict[str, Any]:
+        """Executa todas as etapas; retorna um resumo"""
+        now = time.time() if now is None else now
+        start = time.perf_counter()
+        conn = self._connect()
+        try:
+            summary: Dict[str, Any] = {
+                'snapshots_removed': self.downsample_snapshots(conn, now),
+                'logs_removed': self.prune_logs(conn, now),
+                'archived': {},
+            }
+            for season in self.finished_seasons(conn, now):
+                summary['archived'][season_label(season)] = self.archive_season(conn, season)
+
+            if summary['archived']:
+                self.reclaim_space(conn)
+        finally:
+            conn.close()
+
+        summary['seconds'] = round(time.perf_counter() - start, 3)
+        logger.info(f"Compactação do histórico concluída: {summary}")
+        return summary
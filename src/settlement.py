@@ -0,0 +1,57 @@
+"""
+Liquidação das oportunidades enviadas
+"""
+
+import logging
+import time
+from typing import Dict, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Jogos só são consultados depois de terminados (início + duração com folga)
+MATCH_DURATION_SECONDS = 2.5 * 3600
+
+def final_score(event: Dict[str, Any]) -> Optional[Tuple[int, int]]:
+    """Placar final (mandante, visitante) de um evento concluído do endpoint /scores"""
+    if not event.get('completed'):
+        return None
+    scores = {item['name']: item['score'] for item in event.get('scores') or []}
+    try:
+        return int(scores[event['home_team']]), int(scores[event['away_team']])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+class SettlementJob:
+    """Busca placares das ligas pendentes e liquida as oportunidades em lote"""
+
+    def __init__(self, db_manager, collector, days_from: int = 3):
+        self.db_manager = db_manager
+        self.collector = collector
+        self.days_from = days_from
+
+    async def run(self, now: Optional[float] = None) -> Dict[str, Any]:
+        now = time.time() if now is None else now
+        leagues = await self.db_manager.get_unsettled_leagues(
+            now - self.days_from * 86400, now - MATCH_DURATION_SECONDS
+        )
+
+        stored = 0
+        if leagues:
+            rows = []
+            for event in await self.collector.fetch_scores(leagues, self.days_from):
+                score = final_score(event)
+                if score is None:
+                    continue
+                rows.append((
+                    event['id'], event['league_id'], event['home_id'], event['away_id'],
+                    event['commence_ts'], *score
+                ))
+            stored = await self.db_manager.store_game_results(rows)
+
+        summary = await self.db_manager.settle_opportunities(now)
+        summary['results_stored'] = stored
+        logger.info(
+            f"Liquidação: {sum(summary['settled'].values())} oportunidades ({summary['settled']}), "
+            f"lucro {summary['profit']:+.2f}u; {stored} placares de {len(leagues)} ligas"
+        )
+        return summary
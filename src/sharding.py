@@ -0,0 +1,104 @@
+"""
+Modo distribuído: ligas divididas entre vários workers por leases no SQLite
+"""
+
+import asyncio
+import json
+import logging
+import time
+from typing import List, Optional
+
+from src.checkpoint import message_key, serialize
+
+logger = logging.getLogger(__name__)
+
+# Papéis exclusivos: envio das notificações enfileiradas, compactação do histórico,
+# liquidação de resultados, resumo diário e sincronização com o dashboard
+NOTIFIER = '@notifier'
+COMPACTOR = '@compactor'
+SETTLER = '@settler'
+REPORTER = '@reporter'
+SYNCER = '@syncer'
+
+# Tipos de notificação na fila
+ARBITRAGE = 'arb'
+BET = 'bet'
+
+def outbox_rows(arbitrages: list, deliveries: list) -> List[tuple]:
+    """Linhas da fila de notificações (surebets primeiro, no chat padrão)
+
+    `deliveries` são tuplas (estratégia, chat_id, oportunidade, store) do plano de envio.
+    """
+    rows = [
+        (message_key(item), ARBITRAGE, json.dumps(serialize(item)), '', None, 0)
+        for item in arbitrages
+    ]
+    rows.extend(
+        (message_key(item, chat_id), BET, json.dumps(serialize(item)), chat_id, strategy, int(store))
+        for strategy, chat_id, item, store in deliveries
+    )
+    return rows
+
+class LeaseManager:
+    """Leases de ligas e papéis de um worker"""
+
+    def __init__(self, db_manager, worker_id: str, ttl: float):
+        self.db_manager = db_manager
+        self.worker_id = worker_id
+        self.ttl = ttl
+        # Ligas detidas após o último acquire/heartbeat
+        self.leagues: List[str] = []
+
+    async def acquire(self, leagues: List[str]) -> List[str]:
+        """Renova as ligas detidas e toma ligas livres até a cota do worker"""
+        owned = await self.db_manager.acquire_leases(self.worker_id, leagues, time.time(), self.ttl)
+
+        gained = [league for league in owned if league not in self.leagues]
+        released = [league for league in self.leagues if league not in owned]
+        if gained:
+            logger.info(f"Worker {self.worker_id} assumiu: {', '.join(gained)}")
+        if released:
+            logger.info(f"Worker {self.worker_id} liberou: {', '.join(released)}")
+
+        self.leagues = owned
+        return owned
+
+    async def acquire_role(self, name: str) -> bool:
+        """Toma (ou renova) um papel exclusivo, como o de notificador"""
+        owned = await self.db_manager.acquire_leases(self.worker_id, [name], time.time(), self.ttl, limit=1)
+        return name in owned
+
+    async def heartbeat(self):
+        """Estende os leases detidos; ligas tomadas por outro worker deixam a lista"""
+        names = set(await self.db_manager.renew_leases(self.worker_id, time.time(), self.ttl))
+        lost = [league for league in self.leagues if league not in names]
+        if lost:
+            logger.warning(f"Worker {self.worker_id} perdeu os leases: {', '.join(lost)}")
+            self.leagues = [league for league in self.leagues if league in names]
+
+    async def run_heartbeat(self, interval: float):
+        """Heartbeat em segundo plano (mantém os leases durante ciclos longos)"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.heartbeat()
+            except Exception as e:
+                logger.error(f"Erro no heartbeat do worker {self.worker_id}: {str(e)}")
+
+    async def due(self, interval_seconds: float, names: Optional[List[str]] = None) -> List[str]:
+        """Ligas (ou papéis) cuja última execução, por qualquer worker, passou do intervalo"""
+        names = self.leagues if names is None else names
+        now = time.time()
+        runs = await self.db_manager.get_lease_runs(names)
+        return [
+            name for name in names
+            if runs[name] is None or now - runs[name] >= interval_seconds
+        ]
+
+    async def mark_run(self, leagues: List[str], ran_at: float):
+        await self.db_manager.mark_leases_run(self.worker_id, leagues, ran_at)
+
+    async def release(self):
+        """Libera os leases para que outro worker assuma sem esperar o vencimento"""
+        await self.db_manager.release_leases(self.worker_id)
+        self.leagues = []
@@ -0,0 +1,92 @@
+"""
+Perfis de estratégia avaliados sobre uma única coleta
+"""
+
+import json
+import logging
+from dataclasses import dataclass, field, fields
+from typing import List
+
+from src.config import Config
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STRATEGY = 'default'
+
+@dataclass
+class StrategyProfile:
+    """Limiares e destino de uma estratégia (mesmos nomes e padrões de limiares da Config)"""
+    NAME: str = DEFAULT_STRATEGY
+    MIN_ODDS: float = Config.MIN_ODDS
+    MAX_ODDS: float = Config.MAX_ODDS
+    MIN_VALUE_THRESHOLD: float = Config.MIN_VALUE_THRESHOLD
+    MIN_CONFIDENCE: float = Config.MIN_CONFIDENCE
+    TOP_K: int = Config.TOP_K
+    # Chaves de mercado da API e ligas; vazio = todas as coletadas
+    MARKETS: List[str] = field(default_factory=list)
+    LEAGUES: List[str] = field(default_factory=list)
+    # Chats do Telegram; vazio = TELEGRAM_CHAT_ID
+    CHAT_IDS: List[str] = field(default_factory=list)
+
+    def covers(self, opportunity) -> bool:
+        """A oportunidade está no escopo (mercado e liga) da estratégia"""
+        return ((not self.MARKETS or opportunity.market_key in self.MARKETS) and
+                (not self.LEAGUES or opportunity.league in self.LEAGUES))
+
+def default_strategy(config) -> StrategyProfile:
+    """Estratégia equivalente à Config (comportamento de um único perfil)"""
+    return StrategyProfile(
+        NAME=DEFAULT_STRATEGY,
+        MIN_ODDS=config.MIN_ODDS,
+        MAX_ODDS=config.MAX_ODDS,
+        MIN_VALUE_THRESHOLD=config.MIN_VALUE_THRESHOLD,
+        MIN_CONFIDENCE=config.MIN_CONFIDENCE,
+        TOP_K=config.TOP_K
+    )
+
+def load_strategies(config) -> List[StrategyProfile]:
+    """Perfis de STRATEGIES_FILE ou, sem arquivo, apenas a estratégia padrão"""
+    if not config.STRATEGIES_FILE:
+        return [default_strategy(config)]
+
+    with open(config.STRATEGIES_FILE) as f:
+        entries = json.load(f)
+
+    base = default_strategy(config)
+    known = {item.name for item in fields(StrategyProfile)}
+    strategies = []
+    for entry in entries:
+        unknown = set(entry) - known
+        if unknown:
+            raise ValueError(f"Campos desconhecidos na estratégia {entry.get('NAME')}: {', '.join(sorted(unknown))}")
+        values = {item.name: getattr(base, item.name) for item in fields(StrategyProfile)}
+        values.update(entry)
+        strategies.append(StrategyProfile(**values))
+
+    names = [strategy.NAME for strategy in strategies]
+    if not strategies or len(set(names)) != len(names):
+        raise ValueError(f"STRATEGIES_FILE precisa de estratégias com nomes únicos: {names}")
+
+    logger.info(f"{len(strategies)} estratégias carregadas: {', '.join(names)}")
+    return strategies
+
+def analysis_envelope(strategies: List[StrategyProfile]) -> StrategyProfile:
+    """Limiares mais permissivos entre os perfis, usados na única passada de análise"""
+    return StrategyProfile(
+        NAME='envelope',
+        MIN_ODDS=min(strategy.MIN_ODDS for strategy in strategies),
+        MAX_ODDS=max(strategy.MAX_ODDS for strategy in strategies),
+        MIN_VALUE_THRESHOLD=min(strategy.MIN_VALUE_THRESHOLD for strategy in strategies),
+        MIN_CONFIDENCE=min(strategy.MIN_CONFIDENCE for strategy in strategies),
+        TOP_K=max(strategy.TOP_K for strategy in strategies)
+    )
+
+def extend_targets(config, strategies: List[StrategyProfile]):
+    """Inclui na coleta as ligas e mercados pedidos pelas estratégias"""
+    for strategy in strategies:
+        for league in strategy.LEAGUES:
+            if league not in config.TARGET_LEAGUES:
+                config.TARGET_LEAGUES.append(league)
+        for market in strategy.MARKETS:
+            if market not in config.TARGET_MARKETS:
+                config.TARGET_MARKETS.append(market)
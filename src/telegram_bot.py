@@ -2,47 +2,63 @@
 Módulo de integração com Telegram
 """
 
-import aiohttp
+import asyncio
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from datetime import datetime
 
 from src.analyzer import BettingOpportunity
+from src.arbitrage import ArbitrageOpportunity
+from src.metrics import metrics
 
 logger = logging.getLogger(__name__)
 
 class TelegramNotifier:
     """Notificador via Telegram"""
     
-    def __init__(self, bot_token: str, chat_id: str):
+    def __init__(self, bot_token: str, chat_id: str, api_base_url: str = 'https://api.telegram.org',
+                 retry_attempts: int = 3):
         self.bot_token = bot_token
         self.chat_id = chat_id
-        self.base_url = f"https://api.telegram.org/bot{bot_token}"
+        self.base_url = f"{api_base_url.rstrip('/')}/bot{bot_token}"
+        self.retry_attempts = retry_attempts
         
-    async def send_message(self, text: str, parse_mode: str = 'HTML') -> bool:
-        """Envia mensagem para o Telegram"""
+    async def send_message(self, text: str, parse_mode: str = 'HTML', chat_id: Optional[str] = None) -> bool:
+        """Envia mensagem para o Telegram (chat padrão se `chat_id` não for informado)"""
         url = f"{self.base_url}/sendMessage"
         
         payload = {
-            'chat_id': self.chat_id,
+            'chat_id': chat_id or self.chat_id,
             'text': text,
             'parse_mode': parse_mode
         }
         
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, json=payload) as response:
-                    if response.status == 200:
-                        logger.info("Mensagem enviada com sucesso")
-                        return True
-                    else:
-                        error_text = await response.text()
-                        logger.error(f"Erro ao enviar mensagem: {response.status} - {error_text}")
-                        return False
+            with metrics.timer('telegram_send_seconds'):
+                import aiohttp
+                
+                async with aiohttp.ClientSession() as session:
+                    for attempt in range(self.retry_attempts):
+                        async with session.post(url, json=payload) as response:
+                            if response.status == 200:
+                                logger.info("Mensagem enviada com sucesso")
+                                return True
+                            elif response.status == 429 and attempt < self.retry_attempts - 1:
+                                # Telegram informa o tempo de espera em parameters.retry_after
+                                error = await response.json(content_type=None)
+                                retry_after = error.get('parameters', {}).get('retry_after', 1)
+                                logger.warning(f"Limite do Telegram atingido, nova tentativa em {retry_after}s")
+                                await asyncio.sleep(retry_after)
+                            else:
+                                error_text = await response.text()
+                                logger.error(f"Erro ao enviar mensagem: {response.status} - {error_text}")
+                                return False
                         
         except Exception as e:
             logger.error(f"Erro na requisição Telegram: {str(e)}")
             return False
+        
+        return False
     
     def format_betting_message(self, opportunity: BettingOpportunity) -> str:
         """Formata mensagem de sugestão de aposta"""
@@ -87,9 +103,44 @@ class TelegramNotifier:
         
         return message.strip()
     
-    async def send_betting_suggestion(self, opportunity: BettingOpportunity) -> bool:
-        """Envia sugestão de aposta"""
+    async def send_betting_suggestion(self, opportunity: BettingOpportunity,
+                                      chat_id: Optional[str] = None) -> bool:
+        """Envia sugestão de aposta (para o chat da estratégia, se informado)"""
         message = self.format_betting_message(opportunity)
+        return await self.send_message(message, chat_id=chat_id)
+    
+    def format_arbitrage_message(self, arbitrage: ArbitrageOpportunity) -> str:
+        """Formata mensagem de surebet com a divisão de stakes"""
+        game_time = arbitrage.commence_time.strftime('%d/%m %H:%M')
+        
+        legs = '\n'.join(
+            f"• {selection}: {odds:.2f} ({bookmaker}) → stake {stake:.2f}"
+            for selection, odds, bookmaker, stake in zip(
+                arbitrage.selections, arbitrage.odds, arbitrage.bookmakers, arbitrage.stakes
+            )
+        )
+        
+        message = f"""
+💎 <b>SUREBET DETECTADA</b> 💎
+
+🏆 <b>Liga:</b> {arbitrage.league.replace('soccer_', '').replace('_', ' ').title()}
+⚽ <b>Jogo:</b> {arbitrage.home_team} vs {arbitrage.away_team}
+🕐 <b>Horário:</b> {game_time}
+
+💡 <b>Mercado:</b> {arbitrage.market}
+📈 <b>Margem:</b> {arbitrage.margin:.2%}
+
+💰 <b>Divisão de stakes:</b>
+{legs}
+
+⚠️ <i>Surebets duram pouco tempo. Confirme as odds antes de apostar.</i>
+        """
+        
+        return message.strip()
+    
+    async def send_arbitrage_alert(self, arbitrage: ArbitrageOpportunity) -> bool:
+        """Envia alerta de surebet"""
+        message = self.format_arbitrage_message(arbitrage)
         return await self.send_message(message)
     
     async def send_error_notification(self, error_message: str) -> bool:
@@ -107,18 +158,42 @@ class TelegramNotifier:
         
         return await self.send_message(message.strip())
     
-    async def send_daily_summary(self, opportunities_sent: int, total_games_analyzed: int) -> bool:
-        """Envia resumo diário"""
+    async def send_daily_summary(self, opportunities_sent: int, total_games_analyzed: int,
+                                 summary: Optional[Dict[str, Any]] = None) -> bool:
+        """Envia resumo diário (com resultados e P&L por liga se `summary` vier dos agregados)"""
+        day = datetime.strptime(summary['day'], '%Y-%m-%d') if summary else datetime.now()
+        
+        results = ''
+        if summary and summary['settled']:
+            decided = summary['settled'] - summary['pushes']
+            leagues: Dict[str, float] = {}
+            for item in summary['breakdown']:
+                if item['settled']:
+                    leagues[item['league']] = leagues.get(item['league'], 0.0) + item['profit']
+            lines = '\n'.join(
+                f"• {league.replace('soccer_', '').replace('_', ' ').title()}: {profit:+.2f}u"
+                for league, profit in sorted(leagues.items(), key=lambda entry: -entry[1])
+            )
+            results = f"""
+💰 <b>Resultados:</b>
+• Apostas Liquidadas: {summary['settled']}
+• Taxa de Acerto: {(summary['wins'] / decided * 100) if decided > 0 else 0:.1f}%
+• Lucro: {summary['profit']:+.2f} unidades
+
+🏆 <b>Por Liga:</b>
+{lines}
+"""
+        
         message = f"""
 📊 <b>RESUMO DIÁRIO</b> 📊
 
-⏰ <b>Data:</b> {datetime.now().strftime('%d/%m/%Y')}
+⏰ <b>Data:</b> {day.strftime('%d/%m/%Y')}
 
 📈 <b>Estatísticas:</b>
 • Jogos Analisados: {total_games_analyzed}
 • Sugestões Enviadas: {opportunities_sent}
 • Taxa de Oportunidades: {(opportunities_sent/total_games_analyzed*100) if total_games_analyzed > 0 else 0:.1f}%
-
+{results}
 🤖 Bot funcionando normalmente.
         """
         
@@ -0,0 +1,106 @@
+from types import SimpleNamespace
+
+import pytest
+
+from src.analyzer import BettingAnalyzer, DEFAULT_EXPECTED_GOALS, poisson_pmf, split_line
+
+GAME = {'id': 'g1', 'home_team': 'Flamengo', 'away_team': 'Santos'}
+
+@pytest.fixture
+def analyzer():
+    config = SimpleNamespace(MIN_ODDS=1.5, MAX_ODDS=5.0, MIN_VALUE_THRESHOLD=0.05, MIN_CONFIDENCE=0.6)
+    return BettingAnalyzer(config)
+
+def _decided(outcome):
+    win, push, lose = outcome
+    return win / (win + lose)
+
+def test_poisson_pmf_soma_um():
+    pmf = poisson_pmf(DEFAULT_EXPECTED_GOALS)
+    assert sum(pmf) == pytest.approx(1.0, abs=1e-3)
+    assert pmf[0] == pytest.approx(0.0561, abs=1e-4)
+
+def test_split_line():
+    assert split_line(2.5) == [2.5]
+    assert split_line(-1.0) == [-1.0]
+    assert split_line(2.25) == [2.0, 2.5]
+    assert split_line(-0.75) == [-1.0, -0.5]
+
+def test_totals_linha_meia(analyzer):
+    [over] = analyzer.estimate_totals_outcomes(GAME, 'Over', 2.5)
+    [under] = analyzer.estimate_totals_outcomes(GAME, 'Under', 2.5)
+    assert over[0] == pytest.approx(0.55, abs=0.01)
+    assert over[1] == under[1] == 0.0
+    assert over[0] == pytest.approx(under[2])
+
+def test_totals_linha_inteira_tem_devolucao(analyzer):
+    pmf = poisson_pmf(DEFAULT_EXPECTED_GOALS)
+    [over] = analyzer.estimate_totals_outcomes(GAME, 'Over', 3.0)
+    [under] = analyzer.estimate_totals_outcomes(GAME, 'Under', 3.0)
+    assert over[1] == under[1] == pytest.approx(pmf[3])
+    assert under[0] == pytest.approx(sum(pmf[:3]))
+    assert sum(over) == pytest.approx(1.0)
+
+def test_totals_probabilidade_decresce_com_a_linha(analyzer):
+    points = [0.5, 1.0, 1.5, 2.0, 2.5, 3.0, 4.5]
+    overs = [_decided(analyzer.estimate_totals_outcomes(GAME, 'Over', point)[0]) for point in points]
+    assert overs == sorted(overs, reverse=True)
+
+def test_goal_difference_soma_um(analyzer):
+    difference = analyzer.estimate_goal_difference(GAME)
+    assert sum(difference.values()) == pytest.approx(1.0, abs=1e-3)
+
+def test_1x2_da_mesma_distribuicao_do_handicap(analyzer):
+    home = analyzer.estimate_probability(GAME, 'home')
+    draw = analyzer.estimate_probability(GAME, 'draw')
+    away = analyzer.estimate_probability(GAME, 'away')
+    assert home + draw + away == pytest.approx(1.0, abs=1e-3)
+    assert draw == pytest.approx(0.245, abs=0.005)
+    # Mandante -0.5 ganha exatamente quando o mandante vence
+    [cover] = analyzer.estimate_spreads_outcomes(GAME, 'home', -0.5)
+    assert cover[0] == pytest.approx(home)
+    # Handicap 0: o empate devolve a aposta
+    [level] = analyzer.estimate_spreads_outcomes(GAME, 'home', 0.0)
+    assert level == pytest.approx((home, draw, away))
+
+def test_spreads_valores_do_modelo(analyzer):
+    [half] = analyzer.estimate_spreads_outcomes(GAME, 'home', -0.5)
+    [level] = analyzer.estimate_spreads_outcomes(GAME, 'home', 0.0)
+    assert half[0] == pytest.approx(0.4547, abs=1e-3)
+    assert _decided(level) == pytest.approx(0.602, abs=1e-3)
+
+@pytest.mark.parametrize('point', [-1.5, -1.0, -0.5, 0.0, 0.5, 1.0, 1.5])
+def test_spreads_lados_complementares(analyzer, point):
+    [(home_win, home_push, home_lose)] = analyzer.estimate_spreads_outcomes(GAME, 'home', point)
+    [(away_win, away_push, away_lose)] = analyzer.estimate_spreads_outcomes(GAME, 'away', -point)
+    assert home_win == pytest.approx(away_lose)
+    assert home_push == pytest.approx(away_push)
+
+def test_valor_sem_devolucao_igual_ao_valor_1x2(analyzer):
+    outcomes = [(0.5, 0.0, 0.5)]
+    assert analyzer.calculate_line_value(outcomes, 2.2) == pytest.approx(analyzer.calculate_value(0.5, 2.2))
+
+def test_valor_linha_inteira_conta_devolucao_como_zero(analyzer):
+    # 40% ganha a 2.0, 20% devolve, 40% perde: valor esperado nulo
+    assert analyzer.calculate_line_value([(0.4, 0.2, 0.4)], 2.0) == pytest.approx(0.0)
+
+@pytest.mark.parametrize('market, side, point', [
+    ('spreads', 'home', -0.75), ('spreads', 'away', 0.25), ('spreads', 'home', -1.25),
+    ('totals', 'Over', 2.25), ('totals', 'Under', 2.75),
+])
+def test_valor_linha_asiatica_e_media_das_metades(analyzer, market, side, point):
+    estimate = (analyzer.estimate_spreads_outcomes if market == 'spreads'
+                else analyzer.estimate_totals_outcomes)
+    odds = 1.95
+    quarter = analyzer.calculate_line_value(estimate(GAME, side, point), odds)
+    halves = [analyzer.calculate_line_value(estimate(GAME, side, half), odds) for half in split_line(point)]
+    assert quarter == pytest.approx(sum(halves) / 2)
+
+def test_valor_linha_asiatica_meia_vitoria(analyzer):
+    # Over 2.25: metade em 2.0 (3+ ganha, 2 devolve) e metade em 2.5 (3+ ganha, 2 perde)
+    pmf = poisson_pmf(DEFAULT_EXPECTED_GOALS)
+    over_3 = 1 - sum(pmf[:3])
+    odds = 1.9
+    expected = over_3 * (odds - 1) - sum(pmf[:2]) - pmf[2] / 2
+    value = analyzer.calculate_line_value(analyzer.estimate_totals_outcomes(GAME, 'Over', 2.25), odds)
+    assert value == pytest.approx(expected)
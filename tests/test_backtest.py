@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+
+from src.backtest import CandidateSet, MARKET_KEYS, ThresholdSet, evaluate_thresholds
+
+def _candidates(odds, profit):
+    n = len(odds)
+    return CandidateSet(
+        selection=np.arange(n),
+        decided_at=np.zeros(n),
+        league=np.zeros(n, dtype=np.int64),
+        market=np.full(n, MARKET_KEYS.index('totals'), dtype=np.int64),
+        odds=np.array(odds, dtype=float),
+        value=np.full(n, 0.1),
+        confidence=np.full(n, 0.8),
+        clv=np.full(n, np.nan),
+        profit=np.array(profit, dtype=float),
+        leagues=['soccer_epl'],
+    )
+
+def test_acerto_conta_meia_vitoria_e_exclui_devolucao():
+    # Vitória, meia vitória, devolução, meia derrota, derrota e um jogo sem resultado
+    candidates = _candidates([2.0] * 6, [1.0, 0.5, 0.0, -0.5, -1.0, np.nan])
+    [row, total] = evaluate_thresholds(candidates, ThresholdSet())
+    assert total['league'] == 'ALL'
+    assert row['bets'] == 6
+    assert row['settled'] == 5
+    assert row['hit_rate'] == pytest.approx(1.5 / 4)
+    assert row['roi'] == pytest.approx(0.0)
+
+def test_sem_apostas_decididas():
+    [row, _] = evaluate_thresholds(_candidates([2.0], [0.0]), ThresholdSet())
+    assert row['hit_rate'] is None
@@ -0,0 +1,34 @@
+import sqlite3
+
+from src.bulk_import import HistoryImporter
+
+CSV = '''Div,Date,Time,HomeTeam,AwayTeam,FTHG,FTAG,B365H,B365D,B365A
+E0,16/08/2024,20:00,Man United,Fulham,1,0,1.60,4.20,5.25
+E0,17/08/2024,12:30,Ipswich,,0,2,4.50,3.90,1.70
+E0,17/08/2024,15:00,Arsenal,Wolves,2,0,1.25,6.50,11.00
+'''
+
+def test_importacao_ignora_linhas_sem_um_dos_times(tmp_path):
+    path = tmp_path / 'E0.csv'
+    path.write_text(CSV)
+    db_path = str(tmp_path / 'bot.db')
+
+    totals = HistoryImporter(db_path).run([str(path)])
+    assert totals == {'games': 2, 'results': 2, 'snapshots': 6}
+
+    conn = sqlite3.connect(db_path)
+    teams = conn.execute("SELECT name FROM entities WHERE kind = 'team' ORDER BY name").fetchall()
+    assert [name for (name,) in teams] == ['Arsenal', 'Fulham', 'Man United', 'Wolves']
+    conn.close()
+
+def test_reimportacao_reutiliza_os_jogos(tmp_path):
+    path = tmp_path / 'E0.csv'
+    path.write_text(CSV)
+    db_path = str(tmp_path / 'bot.db')
+
+    HistoryImporter(db_path).run([str(path)])
+    HistoryImporter(db_path).run([str(path)])
+    conn = sqlite3.connect(db_path)
+    assert conn.execute('SELECT COUNT(*) FROM games').fetchone()[0] == 2
+    assert conn.execute('SELECT COUNT(*) FROM odds_snapshots').fetchone()[0] == 6
+    conn.close()
@@ -0,0 +1,55 @@
+import asyncio
+
+from src.dashboard_sync import DashboardSync
+from src.database import DatabaseManager
+
+class FakeSink:
+    def __init__(self):
+        self.failing = set()
+        self.rows = {}
+
+    async def upsert(self, table, rows, on_conflict='id'):
+        if table in self.failing:
+            return 503
+        self.rows.setdefault(table, []).extend(rows)
+        return 201
+
+def _setup(tmp_path):
+    db_manager = DatabaseManager(str(tmp_path / 'bot.db'))
+
+    async def prepare():
+        await db_manager.init_database()
+        for _ in range(3):
+            await db_manager.log_execution(10, 2, 1)
+
+    asyncio.run(prepare())
+    return db_manager
+
+def test_dias_pendentes_sobrevivem_a_falha_do_daily_analytics(tmp_path):
+    db_manager = _setup(tmp_path)
+    sink = FakeSink()
+    sink.failing.add('daily_analytics')
+
+    summary = asyncio.run(DashboardSync(db_manager, sink).run())
+    assert summary['activity_logs'] == 3
+    assert summary['daily_analytics'] is None
+    assert asyncio.run(db_manager.get_pending_sync_days())
+
+    # Nada novo para enviar, mas o dia tocado ainda é reenviado
+    sink.failing.clear()
+    summary = asyncio.run(DashboardSync(db_manager, sink).run())
+    assert summary['activity_logs'] == 0
+    assert summary['daily_analytics'] == 1
+    assert sink.rows['daily_analytics'][0]['games_analyzed'] == 30
+    assert asyncio.run(db_manager.get_pending_sync_days()) == []
+
+def test_cursor_dos_logs_retoma_depois_do_ultimo_enviado(tmp_path):
+    db_manager = _setup(tmp_path)
+    sink = FakeSink()
+    sync = DashboardSync(db_manager, sink, batch_size=2)
+
+    assert asyncio.run(sync.run())['activity_logs'] == 3
+    asyncio.run(db_manager.log_execution(5, 0, 0, status='NO_GAMES'))
+    assert asyncio.run(sync.run())['activity_logs'] == 1
+    ids = [row['id'] for row in sink.rows['activity_logs']]
+    assert len(ids) == len(set(ids)) == 4
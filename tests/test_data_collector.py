@@ -0,0 +1,56 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from src.data_collector import OddsDataCollector
+from src.local_api import LocalApiServer
+
+def _game(game_id, hours):
+    kickoff = datetime.now(timezone.utc) + timedelta(hours=hours)
+    return {'id': game_id, 'sport_key': 'soccer_epl', 'commence_time': kickoff.strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'home_team': 'Arsenal', 'away_team': 'Chelsea', 'bookmakers': []}
+
+def _config(stream):
+    return SimpleNamespace(RETRY_ATTEMPTS=3, STREAM_JSON=stream, TARGET_LEAGUES=['soccer_epl'],
+                           TARGET_MARKETS=['h2h'], LEAGUE_REQUEST_INTERVAL=0)
+
+async def _collect(stream, odds_rate=10.0, requests=1):
+    games = [_game('in', 2), _game('late', 48), _game('past', -2)]
+    server = LocalApiServer(odds_provider=lambda sport, params: games, odds_rate=odds_rate)
+    url = await server.start(port=0)
+    collector = OddsDataCollector('key', base_url=f'{url}/v4', config=_config(stream))
+    try:
+        results = [await collector.fetch_upcoming_games(hours_ahead=24) for _ in range(requests)]
+    finally:
+        await collector.close()
+        await server.stop()
+    return results, server
+
+@pytest.mark.parametrize('stream', [True, False])
+def test_coleta_filtra_a_janela(stream):
+    [games], _ = asyncio.run(_collect(stream))
+    assert [game['id'] for game in games] == ['in']
+    assert games[0]['sport'] == 'soccer_epl'
+
+@pytest.mark.parametrize('stream', [True, False])
+def test_nova_tentativa_apos_429(stream):
+    # Uma requisição por segundo: a segunda coleta recebe 429 e repete após o Retry-After
+    results, server = asyncio.run(_collect(stream, odds_rate=1.0, requests=2))
+    assert [[game['id'] for game in games] for games in results] == [['in'], ['in']]
+    assert server.rate_limited['odds'] >= 1
+
+def test_parametros_do_chamador_nao_recebem_a_chave():
+    async def run():
+        server = LocalApiServer(odds_provider=lambda sport, params: [])
+        url = await server.start(port=0)
+        collector = OddsDataCollector('secret', base_url=f'{url}/v4', config=_config(False))
+        params = {'regions': 'eu', 'markets': 'h2h'}
+        try:
+            await collector._make_request('sports/soccer_epl/odds', params)
+        finally:
+            await collector.close()
+            await server.stop()
+        return params
+    assert asyncio.run(run()) == {'regions': 'eu', 'markets': 'h2h'}
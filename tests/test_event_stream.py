@@ -0,0 +1,22 @@
+import json
+
+from src.event_stream import event_message, parse_position
+
+def test_parse_position_valido():
+    assert parse_position('12.345') == (12, 345)
+
+def test_parse_position_invalido_ou_ausente():
+    for value in (None, '', '12', '12.x', 'a.1', '1.2.3'):
+        assert parse_position(value) is None, value
+
+def test_event_message_com_id():
+    message = event_message('opportunity', {'id': 1, 'value': 0.1}, '3.7')
+    assert message.endswith(b'\n\n')
+    lines = message.decode().strip().split('\n')
+    assert lines[0] == 'event: opportunity'
+    assert lines[1] == 'id: 3.7'
+    assert json.loads(lines[2][len('data: '):]) == {'id': 1, 'value': 0.1}
+
+def test_event_message_sem_id():
+    lines = event_message('metrics', {}).decode().strip().split('\n')
+    assert lines == ['event: metrics', 'data: {}']
@@ -0,0 +1,36 @@
+import json
+
+from src.json_stream import JsonArrayStreamer, peek_commence_time
+
+EVENTS = [
+    {'id': 'a1', 'commence_time': '2024-05-01T19:00:00Z', 'home_team': 'Flamengo',
+     'bookmakers': [{'key': 'bk', 'markets': [{'key': 'h2h', 'outcomes': [1, 2]}]}]},
+    {'id': 'a2', 'commence_time': '2024-05-02T19:00:00Z', 'home_team': 'Time {com} [chaves]'},
+    {'id': 'a3', 'commence_time': '2024-05-03T19:00:00Z', 'home_team': 'Aspas \\"}] e barra \\\\'},
+]
+PAYLOAD = json.dumps(EVENTS).encode()
+
+def _stream(chunks):
+    streamer = JsonArrayStreamer()
+    elements = []
+    for chunk in chunks:
+        elements.extend(streamer.feed(chunk))
+    return [json.loads(element) for element in elements]
+
+def test_payload_inteiro_em_um_chunk():
+    assert _stream([PAYLOAD]) == EVENTS
+
+def test_payload_dividido_em_qualquer_posicao():
+    for cut in range(1, len(PAYLOAD)):
+        assert _stream([PAYLOAD[:cut], PAYLOAD[cut:]]) == EVENTS, cut
+
+def test_payload_byte_a_byte():
+    assert _stream([PAYLOAD[i:i + 1] for i in range(len(PAYLOAD))]) == EVENTS
+
+def test_chunks_vazios_e_array_vazio():
+    assert _stream([b'', b'[', b'', b']']) == []
+
+def test_peek_commence_time():
+    element = json.dumps(EVENTS[0]).encode()
+    assert peek_commence_time(element) == '2024-05-01T19:00:00Z'
+    assert peek_commence_time(b'{"id": "x"}') is None
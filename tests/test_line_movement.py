@@ -0,0 +1,57 @@
+import pytest
+
+from src.line_movement import LineMovementTracker
+
+HOUR = 3600.0
+BOOKMAKERS = ('bk1', 'bk2', 'bk3')
+
+def _key(bookmaker):
+    return ('g1', 'h2h', None, 'home', bookmaker)
+
+def _collect(tracker, price, timestamp, bookmakers=BOOKMAKERS):
+    events = []
+    for bookmaker in bookmakers:
+        _, steam = tracker.update(_key(bookmaker), price, timestamp)
+        if steam:
+            events.append(steam)
+    return events
+
+def test_steam_dentro_da_janela():
+    tracker = LineMovementTracker(steam_window=600)
+    _collect(tracker, 2.0, 0)
+    events = _collect(tracker, 1.9, 300)
+    assert len(events) == 1
+    assert events[0].direction == -1
+    assert events[0].bookmakers == list(BOOKMAKERS)
+    assert events[0].movement == pytest.approx(-0.05)
+
+def test_sem_steam_com_poucas_casas():
+    tracker = LineMovementTracker(steam_window=600)
+    _collect(tracker, 2.0, 0)
+    assert _collect(tracker, 1.9, 300, BOOKMAKERS[:2]) == []
+
+def test_coletas_espacadas_usam_o_intervalo_como_janela():
+    tracker = LineMovementTracker(steam_window=600, max_fetch_interval=18 * HOUR)
+    _collect(tracker, 2.0, 0)
+    events = _collect(tracker, 1.9, 12 * HOUR)
+    assert len(events) == 1
+    assert events[0].velocity == pytest.approx(-0.1 / 12)
+
+def test_movimentos_da_coleta_anterior_nao_se_somam():
+    tracker = LineMovementTracker(steam_window=600, max_fetch_interval=18 * HOUR)
+    _collect(tracker, 2.0, 0)
+    # Duas casas movem em um ciclo e a terceira só no seguinte
+    assert _collect(tracker, 1.9, 12 * HOUR, BOOKMAKERS[:2]) == []
+    _collect(tracker, 2.0, 12 * HOUR, BOOKMAKERS[2:])
+    assert _collect(tracker, 1.9, 24 * HOUR, BOOKMAKERS[2:]) == []
+
+def test_intervalo_acima_do_limite_ignora_a_mudanca():
+    tracker = LineMovementTracker(steam_window=600)
+    _collect(tracker, 2.0, 0)
+    assert _collect(tracker, 1.9, 12 * HOUR) == []
+
+def test_intervalo_medido_desde_a_ultima_coleta_sem_mudanca():
+    tracker = LineMovementTracker(steam_window=600, max_fetch_interval=18 * HOUR)
+    _collect(tracker, 2.0, 0)
+    _collect(tracker, 2.0, 12 * HOUR)
+    assert len(_collect(tracker, 1.9, 24 * HOUR)) == 1
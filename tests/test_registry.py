@@ -0,0 +1,117 @@
+import asyncio
+import sqlite3
+from datetime import datetime
+
+from src.analyzer import BettingOpportunity
+from src.database import DatabaseManager
+from src.odds_index import GameIndex
+from src.registry import BOOKMAKER, LEAGUE, NameRegistry, TEAM, game_names, normalize_name
+
+def test_ids_locais_sao_provisorios_e_negativos():
+    registry = NameRegistry()
+    assert registry.resolve(TEAM, 'Arsenal') == -1
+    assert registry.resolve(TEAM, 'arsenal') == -1
+    assert registry.resolve(TEAM, 'Chelsea') == -2
+
+def test_merge_nao_mistura_ids_locais_e_do_banco():
+    registry = NameRegistry()
+    registry.add_alias(TEAM, 'Man Utd', 'Manchester United')
+    # O banco aloca 1 e 2 para outros nomes enquanto o time ainda é provisório
+    names = [(LEAGUE, 'soccer_epl'), (BOOKMAKER, 'Bet365')]
+    registry.merge(names, [(1, 'soccer_epl'), (2, 'Bet365')])
+    registry.merge([(TEAM, 'Manchester United')], [(3, 'Manchester United')])
+    assert registry.lookup(LEAGUE, 'soccer_epl') == 1
+    assert registry.lookup(BOOKMAKER, 'Bet365') == 2
+    assert registry.lookup(TEAM, 'Man Utd') == 3
+    assert registry.name(3) == 'Manchester United'
+
+def test_registros_que_compartilham_o_banco_recebem_os_mesmos_ids(tmp_path):
+    manager = DatabaseManager(str(tmp_path / 'bot.db'))
+
+    async def run():
+        await manager.init_database()
+        first, second = NameRegistry(), NameRegistry()
+        first.resolve(TEAM, 'Arsenal')
+        first.resolve(BOOKMAKER, 'Bet365')
+        await manager.store_registry(first)
+        second.add_alias(TEAM, 'Arsenal FC', 'Arsenal')
+        second.resolve(BOOKMAKER, 'bet365')
+        second.resolve(TEAM, 'Chelsea')
+        await manager.store_registry(second)
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first.lookup(TEAM, 'Arsenal') == second.lookup(TEAM, 'Arsenal FC') > 0
+    assert first.lookup(BOOKMAKER, 'Bet365') == second.lookup(BOOKMAKER, 'bet365') > 0
+    assert second.lookup(TEAM, 'Chelsea') not in (first.lookup(TEAM, 'Arsenal'), first.lookup(BOOKMAKER, 'Bet365'))
+
+def _game(home='Manchester United', away='Chelsea', outcomes=('Man Utd', 'Chelsea FC')):
+    return {
+        'id': 'g1', 'sport': 'soccer_epl', 'commence_time': '2024-05-01T19:00:00Z',
+        'home_team': home, 'away_team': away,
+        'bookmakers': [{'title': 'Bet365', 'markets': [
+            {'key': 'h2h', 'outcomes': [{'name': outcomes[0], 'price': 2.1},
+                                        {'name': 'Draw', 'price': 3.4},
+                                        {'name': outcomes[1], 'price': 3.2}]},
+            {'key': 'spreads', 'outcomes': [{'name': outcomes[0], 'price': 1.9, 'point': -0.5},
+                                            {'name': outcomes[1], 'price': 1.9, 'point': 0.5}]},
+        ]}],
+    }
+
+def _registry():
+    registry = NameRegistry()
+    registry.add_alias(TEAM, 'Man Utd', 'Manchester United')
+    registry.add_alias(TEAM, 'Chelsea FC', 'Chelsea')
+    return registry
+
+def test_normalize_name():
+    assert normalize_name('  São  Paulo F.C. ') == 'sao paulo f c'
+
+def test_lado_pelo_id_canonico_com_aliases():
+    registry = _registry()
+    game = _game()
+    registry.canonicalize_game(game)
+    index = GameIndex.from_game(game, registry)
+    h2h = index.lines[('h2h', None)]
+    assert h2h.best_prices == [2.1, 3.4, 3.2]
+    assert index.lines[('spreads', -0.5)].best_prices == [1.9, 1.9]
+
+def test_nome_de_outro_time_nao_casa_pelo_texto():
+    registry = _registry()
+    registry.resolve(TEAM, 'Arsenal')
+    game = _game(outcomes=('Arsenal', 'Chelsea'))
+    registry.canonicalize_game(game)
+    index = GameIndex.from_game(game, registry)
+    # Arsenal não é nenhum dos lados; Chelsea (texto exato) casa pelo id
+    assert index.lines[('h2h', None)].prices == [[], [3.4], [3.2]]
+
+def test_sem_registro_compara_o_texto():
+    index = GameIndex.from_game(_game(outcomes=('Manchester United', 'Chelsea')))
+    assert index.lines[('h2h', None)].best_prices == [2.1, 3.4, 3.2]
+
+def test_ids_gravados_nas_oportunidades_e_snapshots(tmp_path):
+    db_path = str(tmp_path / 'bot.db')
+    manager = DatabaseManager(db_path)
+    registry = _registry()
+    game = _game()
+
+    async def run():
+        await manager.init_database()
+        names = registry.missing(game_names(game))
+        registry.merge(names, await manager.allocate_entities(names))
+        await manager.store_registry(registry)
+        event_key = registry.canonicalize_game(game)
+        await manager.store_games_data([game])
+        await manager.store_odds_snapshots([('g1', 'h2h', None, 'home', 'Bet365', 2.1, 1.0)])
+        await manager.store_opportunity(BettingOpportunity(
+            'g1', game['home_team'], game['away_team'], 'soccer_epl', datetime.now(), '1X2', 'home',
+            2.1, 'Bet365', 0.47, 0.5, 0.05, 0.8, '', market_key='h2h', side='home', event_key=event_key))
+        return event_key
+
+    league_id, home_id, away_id, _ = asyncio.run(run())
+    bookmaker_id = registry.lookup(BOOKMAKER, 'Bet365')
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute('SELECT bookmaker_id FROM odds_snapshots').fetchone() == (bookmaker_id,)
+        assert conn.execute(
+            'SELECT league_id, home_id, away_id, bookmaker_id FROM opportunities'
+        ).fetchone() == (league_id, home_id, away_id, bookmaker_id)
@@ -0,0 +1,56 @@
+import asyncio
+import sqlite3
+from datetime import datetime, timezone
+
+from src.database import DatabaseManager
+from src.retention import HistoryCompactor, MAX_ATTACHED, history_batches, list_archives, season_bounds
+
+SEASONS = range(2010, 2010 + MAX_ATTACHED + 2)
+
+def _database(tmp_path):
+    db_path = str(tmp_path / 'bot.db')
+    asyncio.run(DatabaseManager(db_path).init_database())
+    conn = sqlite3.connect(db_path)
+    for season in (*SEASONS, SEASONS[-1] + 1):
+        start, _ = season_bounds(season)
+        kickoff = start + 86400 * 60
+        conn.executemany('''
+            INSERT INTO games (id, home_team, away_team, league, commence_time, commence_ts, data_json)
+            VALUES (?, 'Flamengo', 'Santos', 'soccer_brazil_campeonato', ?, ?, '{}')
+        ''', [
+            (f'{season}-{number}', datetime.fromtimestamp(kickoff, tz=timezone.utc).isoformat(), kickoff)
+            for number in range(50)
+        ])
+    conn.commit()
+    conn.close()
+    return db_path
+
+def _archive(db_path):
+    _, end = season_bounds(SEASONS[-1])
+    return HistoryCompactor(db_path, archive_grace_days=1).run(now=end + 2 * 86400)
+
+def test_arquivos_alem_do_limite_de_anexos_entram_em_lotes(tmp_path):
+    db_path = _database(tmp_path)
+    summary = _archive(db_path)
+    assert len(summary['archived']) == len(SEASONS)
+    assert len(list_archives(db_path)) > MAX_ATTACHED
+
+    conn = sqlite3.connect(db_path)
+    batches, game_ids = [], []
+    for batch in history_batches(conn, db_path):
+        batches.append(batch)
+        game_ids.extend(row[0] for row in conn.execute('SELECT id FROM history_games'))
+    assert all(len(batch) <= MAX_ATTACHED - 2 for batch in batches)
+    assert sum(len(batch) for batch in batches) == len(SEASONS)
+    # Principal (temporada em andamento) e todos os arquivos, cada jogo uma vez
+    assert len(game_ids) == len(set(game_ids)) == 50 * (len(SEASONS) + 1)
+    assert conn.execute('PRAGMA database_list').fetchall()[-1][1] != 'archive0'
+    conn.close()
+
+def test_arquivamento_libera_paginas_sem_vacuum_completo(tmp_path):
+    db_path = _database(tmp_path)
+    _archive(db_path)
+    conn = sqlite3.connect(db_path)
+    assert conn.execute('PRAGMA auto_vacuum').fetchone()[0] == 2
+    assert conn.execute('PRAGMA freelist_count').fetchone()[0] == 0
+    conn.close()
@@ -0,0 +1,59 @@
+import asyncio
+import sqlite3
+
+import pytest
+
+from src.database import DatabaseManager
+from src.odds_index import settle_selection
+
+ODDS = 2.0
+
+@pytest.mark.parametrize('side, home, away, profit', [
+    ('home', 2, 1, 1.0),
+    ('home', 1, 1, -1.0),
+    ('draw', 1, 1, 1.0),
+    ('away', 0, 3, 1.0),
+    ('away', 3, 0, -1.0),
+])
+def test_h2h(side, home, away, profit):
+    assert settle_selection('h2h', side, None, home, away, ODDS) == profit
+
+@pytest.mark.parametrize('side, point, home, away, profit', [
+    ('Over', 2.5, 2, 1, 1.0),
+    ('Under', 2.5, 2, 1, -1.0),
+    # Linha inteira: placar na linha devolve a aposta
+    ('Over', 3.0, 2, 1, 0.0),
+    ('Under', 3.0, 2, 1, 0.0),
+    ('Over', 3.0, 2, 2, 1.0),
+    # Linhas asiáticas: metade em cada linha vizinha
+    ('Over', 2.75, 2, 1, 0.5),     # 2.5 ganha, 3.0 devolve
+    ('Under', 2.75, 2, 1, -0.5),   # 2.5 perde, 3.0 devolve
+    ('Over', 2.25, 1, 1, -0.5),    # 2.0 devolve, 2.5 perde
+    ('Under', 2.25, 1, 1, 0.5),    # 2.0 devolve, 2.5 ganha
+])
+def test_totals(side, point, home, away, profit):
+    assert settle_selection('totals', side, point, home, away, ODDS) == pytest.approx(profit)
+
+# Handicap: linha sempre na perspectiva do mandante (visitante +1 é point -1)
+@pytest.mark.parametrize('side, point, home, away, profit', [
+    ('home', -0.5, 1, 0, 1.0),
+    ('away', -0.5, 1, 0, -1.0),
+    # Linha inteira: saldo igual ao handicap devolve a aposta
+    ('home', -1.0, 2, 1, 0.0),
+    ('away', -1.0, 2, 1, 0.0),
+    ('home', 0.0, 1, 1, 0.0),
+    # Linhas asiáticas
+    ('home', -0.75, 2, 1, 0.5),    # -0.5 ganha, -1.0 devolve
+    ('away', -0.75, 2, 1, -0.5),   # +0.5 perde, +1.0 devolve
+    ('home', -0.25, 1, 1, -0.5),   # 0.0 devolve, -0.5 perde
+    ('away', -0.25, 1, 1, 0.5),    # 0.0 devolve, +0.5 ganha
+    ('home', -1.25, 2, 1, -0.5),   # -1.0 devolve, -1.5 perde
+])
+def test_spreads(side, point, home, away, profit):
+    assert settle_selection('spreads', side, point, home, away, ODDS) == pytest.approx(profit)
+
+def test_sqlite_antigo_e_recusado(tmp_path, monkeypatch):
+    monkeypatch.setattr(sqlite3, 'sqlite_version_info', (3, 31, 1))
+    with pytest.raises(RuntimeError, match='3.35.0'):
+        asyncio.run(DatabaseManager(str(tmp_path / 'bot.db')).init_database())
+    assert not (tmp_path / 'bot.db').exists()
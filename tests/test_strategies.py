@@ -0,0 +1,18 @@
+from types import SimpleNamespace
+
+from src.backtest import ThresholdSet
+from src.config import Config
+from src.strategies import StrategyProfile, analysis_envelope, default_strategy
+
+def test_padroes_vem_da_config():
+    profile = StrategyProfile()
+    thresholds = ThresholdSet()
+    for name in ('MIN_ODDS', 'MAX_ODDS', 'MIN_VALUE_THRESHOLD', 'MIN_CONFIDENCE'):
+        assert getattr(profile, name) == getattr(thresholds, name) == getattr(Config, name)
+    assert profile.TOP_K == Config.TOP_K
+
+def test_envelope_mais_permissivo():
+    config = SimpleNamespace(MIN_ODDS=1.5, MAX_ODDS=5.0, MIN_VALUE_THRESHOLD=0.05, MIN_CONFIDENCE=0.7, TOP_K=5)
+    strict = StrategyProfile(NAME='estrita', MAX_ODDS=3.0, MIN_CONFIDENCE=0.8, TOP_K=3)
+    envelope = analysis_envelope([default_strategy(config), strict])
+    assert (envelope.MAX_ODDS, envelope.MIN_CONFIDENCE, envelope.TOP_K) == (5.0, 0.7, 5)